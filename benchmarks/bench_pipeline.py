@@ -0,0 +1,406 @@
+"""
+Benchmark of the offline stages of the SOMEF pipeline over the test corpus.
+It runs file exploration (process_repository_files), software type detection (check_repository_type), header
+analysis, excerpt creation, the classifiers, the regular expression extraction (URL checks skipped) and the JSON and
+Turtle exports on the repositories and READMEs bundled in src/somef/test/test_data, with warmup and repeats.
+Other stages run on synthetic inputs that stress a single function: removing the links and images of a link-dense
+README (an awesome list), detecting the ontologies of a repository with many candidate files (Maven pom.xml files,
+RDF data and a few ontologies, parsed in the process pool), and exporting many repositories to a single graph.
+For each stage it reports the latency percentiles (per repository or README, or per run of a synthetic stage) and the
+peak memory allocated (measured with tracemalloc in an additional run, so it does not affect the times), plus the peak
+RSS of the process. Results can be saved as a baseline and compared with a previous baseline, e.g., to compare the
+JSON serializers (--json-serializer) or the compiled RDF mapping with the RML engine (--rml-engine).
+
+The header analysis needs the WordNet data of nltk, and the classifiers need the models set up by somef configure.
+Stages can be selected with --stages (only the modules they need are imported).
+
+Usage: python benchmarks/bench_pipeline.py [--stages S [S ...]] [--warmup N] [--repeats N] [--save FILE]
+       [--baseline FILE] [--no-memory] [--json-serializer S] [--rml-engine] [--links N] [--ontology-files N]
+       [--ontology-workers N] [--graph-repos N]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import logging
+import math
+import os
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from somef import extract_ontologies, process_files, regular_expressions
+from somef.export import json_export
+from somef.export.reconciliation import ReconciledResults
+from somef.export.turtle_export import DataGraph
+from somef.process_results import Result
+from somef.timing import StageTimer, peak_rss_mb
+from somef.url_resolution import ResolutionQueue
+from somef.utils import constants
+
+test_data_path = str(Path(__file__).parent.parent / "src" / "somef" / "test" / "test_data") + os.path.sep
+# READMEs with BibTeX entries that make REGEXP_BIBTEX backtrack for a long time
+SLOW_BIBTEX = ["test_issue_181_3.txt"]
+STAGE_EXCERPTS = "excerpts"
+STAGE_LINKS_IMAGES = "links_images"
+STAGE_ONTOLOGY_DETECTION = "ontology_detection"
+STAGE_GRAPH_ACCUMULATION = "graph_accumulation"
+CORPUS_STAGES = [constants.STAGE_PROCESS_FILES, constants.STAGE_REPOSITORY_TYPE, constants.STAGE_HEADER_ANALYSIS,
+                 STAGE_EXCERPTS, constants.STAGE_CLASSIFIERS, constants.STAGE_REGULAR_EXPRESSIONS,
+                 constants.STAGE_JSON_EXPORT, constants.STAGE_GRAPH_EXPORT]
+# stages run once per repeat on synthetic inputs, instead of on each item of the corpus
+SYNTHETIC_STAGES = [STAGE_LINKS_IMAGES, STAGE_ONTOLOGY_DETECTION, STAGE_GRAPH_ACCUMULATION]
+STAGES = CORPUS_STAGES + SYNTHETIC_STAGES
+# stages that use the text excerpts found by the header analysis
+NEEDS_HEADER_ANALYSIS = [STAGE_EXCERPTS, constants.STAGE_CLASSIFIERS]
+PERCENTILES = [50, 90, 99]
+POM = """<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <modelVersion>4.0.0</modelVersion>
+  <groupId>org.example</groupId>
+  <artifactId>module{index}</artifactId>
+  <dependencies>
+{dependencies}
+  </dependencies>
+</project>
+"""
+DEPENDENCY = "    <dependency><groupId>org.example</groupId><artifactId>lib{index}</artifactId></dependency>\n"
+RDF_DATA = "@prefix ex: <https://example.org/> .\n" + "".join(f"ex:item{index} ex:value {index} .\n"
+                                                            for index in range(2000))
+ONTOLOGY = """@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix ex: <https://example.org/ontology{index}#> .
+<https://example.org/ontology{index}> a owl:Ontology .
+ex:Thing a owl:Class .
+"""
+
+
+class MemoryStages:
+    """Measures the peak memory allocated (tracemalloc) in each stage, with the same interface as StageTimer"""
+
+    def __init__(self):
+        self.peaks = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1] - start
+            self.peaks[name] = max(self.peaks.get(name, 0), peak)
+
+
+class Pipeline:
+    """
+    Runs the selected stages of the pipeline on a repository (folder) or a README (text), and the synthetic stages on
+    their inputs
+    """
+
+    def __init__(self, stages, folder, json_serializer=None, rml_engine=False, links=4000, ontology_files=300,
+                 graph_repos=200):
+        """
+        Parameters
+        ----------
+        @param stages: stages to run
+        @param folder: folder where the candidate ontologies are created
+        @param json_serializer: serializer of the JSON export (json or orjson). If None, the default one is used
+        @param rml_engine: materialize the RDF mapping with the RML engine instead of the compiled mapping
+        @param links: number of links of the README cleaned in the links_images stage
+        @param ontology_files: number of candidate files in the ontology_detection stage
+        @param graph_repos: number of repositories exported to a single graph in the graph_accumulation stage
+        """
+        self.stages = stages
+        self.json_serializer = json_serializer
+        self.rml_engine = rml_engine
+        self.file_paths = None
+        if STAGE_LINKS_IMAGES in stages:
+            self.awesome_list = awesome_list(links)
+        if STAGE_ONTOLOGY_DETECTION in stages:
+            self.candidate_ontologies = create_candidate_ontologies(folder, ontology_files)
+        if STAGE_GRAPH_ACCUMULATION in stages:
+            self.repositories = [repository_results(index) for index in range(graph_repos)]
+        if constants.STAGE_HEADER_ANALYSIS in stages:
+            from somef import header_analysis
+            self.header_analysis = header_analysis
+        if STAGE_EXCERPTS in stages:
+            from somef.parser import create_excerpts
+            self.create_excerpts = create_excerpts
+        if constants.STAGE_CLASSIFIERS in stages:
+            from somef import configuration, supervised_classification
+            from somef.parser import create_excerpts, mardown_parser
+            self.create_excerpts = create_excerpts
+            self.mardown_parser = mardown_parser
+            self.supervised_classification = supervised_classification
+            self.file_paths = configuration.get_configuration_file()
+        if constants.STAGE_REPOSITORY_TYPE in stages:
+            from somef.extract_software_type import check_repository_type
+            self.check_repository_type = check_repository_type
+
+    def run(self, item, timer):
+        """
+        Runs the pipeline on an item of the corpus
+        Parameters
+        ----------
+        @param item: pair (repository folder, README text). One of them is None
+        @param timer: StageTimer (or MemoryStages) measuring the stages
+
+        Returns
+        -------
+        @return: the results found
+        """
+        # some stages print their progress
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.run_stages(item, timer)
+
+    def run_stages(self, item, timer):
+        """Runs the stages of the pipeline on an item of the corpus (see run)"""
+        repository, text = item
+        result = Result()
+        if repository is not None:
+            if constants.STAGE_PROCESS_FILES not in self.stages:
+                text = None
+            else:
+                with timer.stage(constants.STAGE_PROCESS_FILES):
+                    text, result = process_files.process_repository_files(repository, result,
+                                                                           constants.RepositoryType.LOCAL)
+            if constants.STAGE_REPOSITORY_TYPE in self.stages:
+                with timer.stage(constants.STAGE_REPOSITORY_TYPE):
+                    result = self.check_repository_type(repository, os.path.basename(repository), result)
+        if text:
+            self.run_readme_stages(text, result, timer)
+        if constants.STAGE_JSON_EXPORT in self.stages:
+            with timer.stage(constants.STAGE_JSON_EXPORT):
+                json_export.serialize_json(result.results, pretty=True, serializer=self.json_serializer)
+        if constants.STAGE_GRAPH_EXPORT in self.stages:
+            with timer.stage(constants.STAGE_GRAPH_EXPORT):
+                data_graph = DataGraph(use_rml_engine=self.rml_engine)
+                data_graph.somef_data_to_graph(ReconciledResults(result.results))
+                data_graph.g.serialize(format="turtle")
+        return result
+
+    def run_readme_stages(self, text, result, timer):
+        """Runs the stages that analyze the README, as done by cli_get_data"""
+        string_list = None
+        if constants.STAGE_HEADER_ANALYSIS in self.stages:
+            with timer.stage(constants.STAGE_HEADER_ANALYSIS):
+                result, string_list = self.header_analysis.extract_categories(text, result)
+        if STAGE_EXCERPTS in self.stages:
+            with timer.stage(STAGE_EXCERPTS):
+                self.create_excerpts.create_excerpts(string_list)
+        if constants.STAGE_CLASSIFIERS in self.stages:
+            with timer.stage(constants.STAGE_CLASSIFIERS):
+                classification = self.supervised_classification
+                result = classification.run_category_classification(text, 0.8, result)
+                excerpts = self.create_excerpts.create_excerpts(string_list)
+                excerpts_headers = self.mardown_parser.extract_text_excerpts_header(text)
+                header_parents = self.mardown_parser.extract_headers_parents(text)
+                score_dict = classification.run_classifiers(excerpts, self.file_paths)
+                result = classification.classify(score_dict, 0.8, excerpts_headers, header_parents, result)
+        if constants.STAGE_REGULAR_EXPRESSIONS in self.stages:
+            with timer.stage(constants.STAGE_REGULAR_EXPRESSIONS):
+                resolution_queue = ResolutionQueue()
+                regular_expressions.extract_readme_metadata(text, None, None, result, "README.md", "main",
+                                                            resolution_queue)
+                resolution_queue.skip()
+
+    def run_synthetic(self, timer):
+        """Runs the synthetic stages once"""
+        if STAGE_LINKS_IMAGES in self.stages:
+            with timer.stage(STAGE_LINKS_IMAGES):
+                regular_expressions.remove_links_images(self.awesome_list)
+        if STAGE_ONTOLOGY_DETECTION in self.stages:
+            with timer.stage(STAGE_ONTOLOGY_DETECTION):
+                extract_ontologies.detect_ontologies(self.candidate_ontologies)
+        if STAGE_GRAPH_ACCUMULATION in self.stages:
+            with timer.stage(STAGE_GRAPH_ACCUMULATION):
+                DataGraph(use_rml_engine=self.rml_engine).somef_data_list_to_graph(self.repositories)
+
+
+def awesome_list(num_links):
+    """Creates a README similar to an awesome list, with badges, images and one link per line"""
+    lines = ["# Awesome benchmark", "",
+             "[![Awesome](https://awesome.re/badge.svg)](https://awesome.re)", ""]
+    for i in range(num_links):
+        if i % 50 == 0:
+            lines.append(f"## Section {i // 50}")
+            lines.append(f"![diagram {i}](https://example.org/img/{i}.png)")
+        lines.append(f"- [project-{i}](https://github.com/owner{i}/project-{i}) - Description of project {i}.")
+    return "\n".join(lines)
+
+
+def create_candidate_ontologies(folder, num_files):
+    """Creates the candidate files of a repository: one ontology every 50 files, and the rest XML or RDF data"""
+    file_paths = []
+    dependencies = "".join(DEPENDENCY.format(index=dependency) for dependency in range(50))
+    for index in range(num_files):
+        if index % 50 == 0:
+            name, text = f"ontology{index}.ttl", ONTOLOGY.format(index=index)
+        elif index % 3 == 0:
+            name, text = f"data{index}.ttl", RDF_DATA
+        else:
+            name, text = f"module{index}/pom.xml", POM.format(index=index, dependencies=dependencies)
+        file_path = os.path.join(folder, name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as file:
+            file.write(text)
+        file_paths.append(file_path)
+    return file_paths
+
+
+def repository_results(i):
+    """Creates the results of a synthetic repository, similar to those obtained from GitHub"""
+    result = Result()
+    technique = constants.TECHNIQUE_GITHUB_API
+    result.add_result(constants.CAT_NAME, {constants.PROP_TYPE: constants.STRING, constants.PROP_VALUE: f"repo{i}"},
+                      1, technique)
+    result.add_result(constants.CAT_FULL_NAME, {constants.PROP_TYPE: constants.STRING,
+                                                constants.PROP_VALUE: f"owner{i % 50}/repo{i}"}, 1, technique)
+    result.add_result(constants.CAT_DESCRIPTION, {constants.PROP_TYPE: constants.STRING,
+                                                  constants.PROP_VALUE: f"Description of repository {i}"}, 1, technique)
+    result.add_result(constants.CAT_OWNER, {constants.PROP_TYPE: "Person", constants.PROP_VALUE: f"owner{i % 50}"},
+                      1, technique)
+    result.add_result(constants.CAT_CODE_REPOSITORY, {constants.PROP_TYPE: constants.URL,
+                                                      constants.PROP_VALUE: f"https://github.com/owner/repo{i}"},
+                      1, technique)
+    result.add_result(constants.CAT_LICENSE, {constants.PROP_TYPE: constants.LICENSE,
+                                              constants.PROP_VALUE: "https://api.github.com/licenses/mit",
+                                              constants.PROP_NAME: "MIT License", constants.PROP_SPDX_ID: "MIT",
+                                              constants.PROP_URL: "https://api.github.com/licenses/mit"},
+                      1, technique)
+    for release in range(3):
+        result.add_result(constants.CAT_RELEASES, {constants.PROP_TYPE: constants.RELEASE,
+                                                   constants.PROP_VALUE: f"https://github.com/owner/repo{i}/v{release}",
+                                                   constants.PROP_RELEASE_ID: i * 10 + release,
+                                                   constants.PROP_TAG: f"v{release}",
+                                                   constants.PROP_AUTHOR: {constants.PROP_NAME: f"owner{i % 50}",
+                                                                           constants.PROP_TYPE: "User"}},
+                          1, technique)
+    return result.results
+
+
+def load_corpus(pipeline):
+    """
+    Loads the repositories and READMEs of the test corpus, leaving out those the pipeline fails on (e.g., READMEs
+    with images without a path)
+    """
+    corpus = []
+    repositories_path = test_data_path + "repositories" + os.path.sep
+    for repository in sorted(os.listdir(repositories_path)):
+        if os.path.isdir(repositories_path + repository):
+            corpus.append((repositories_path + repository, None))
+    paths = glob.glob(test_data_path + "*.md") + glob.glob(test_data_path + "*.txt") + \
+        glob.glob(test_data_path + "*.rst")
+    for path in sorted(paths):
+        if os.path.basename(path) in SLOW_BIBTEX:
+            continue
+        with open(path, "r", encoding="utf-8", errors="ignore") as readme_file:
+            corpus.append((None, readme_file.read()))
+    items = []
+    for item in corpus:
+        try:
+            pipeline.run(item, StageTimer())
+            items.append(item)
+        except Exception as e:
+            logging.debug("Skipping item of the corpus: " + str(e))
+    return items
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of a sorted list"""
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    arg_parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to run")
+    arg_parser.add_argument("--warmup", type=int, default=1, help="Number of runs over the corpus before measuring")
+    arg_parser.add_argument("--repeats", type=int, default=5, help="Number of measured runs over the corpus")
+    arg_parser.add_argument("--save", help="Save the results as a baseline in this JSON file")
+    arg_parser.add_argument("--baseline", help="Compare the results with a baseline saved with --save")
+    arg_parser.add_argument("--no-memory", action="store_true", help="Do not measure the memory of each stage")
+    arg_parser.add_argument("--json-serializer", choices=[constants.JSON_SERIALIZER_STDLIB,
+                                                          constants.JSON_SERIALIZER_ORJSON],
+                            help="Serializer of the JSON export (orjson if it is installed, if not given)")
+    arg_parser.add_argument("--rml-engine", action="store_true",
+                            help="Export the graphs with the RML engine (morph-kgc) instead of the compiled mapping")
+    arg_parser.add_argument("--links", type=int, default=4000, help="Links of the README of the links_images stage")
+    arg_parser.add_argument("--ontology-files", type=int, default=300,
+                            help="Candidate files of the ontology_detection stage")
+    arg_parser.add_argument("--ontology-workers", type=int, default=None,
+                            help="Processes of the pool of the ontology_detection stage (number of CPUs if not given)")
+    arg_parser.add_argument("--graph-repos", type=int, default=200,
+                            help="Repositories exported to a single graph in the graph_accumulation stage")
+    args = arg_parser.parse_args()
+    logging.disable(logging.WARNING)
+    stages = [stage for stage in STAGES if stage in args.stages]
+    if any(stage in stages for stage in NEEDS_HEADER_ANALYSIS) and constants.STAGE_HEADER_ANALYSIS not in stages:
+        arg_parser.error("the excerpts and classifiers stages need the header_analysis stage")
+
+    if args.ontology_workers is not None:
+        constants.ONTOLOGY_WORKERS = args.ontology_workers
+
+    with tempfile.TemporaryDirectory() as folder:
+        pipeline = Pipeline(stages, folder, json_serializer=args.json_serializer, rml_engine=args.rml_engine,
+                            links=args.links, ontology_files=args.ontology_files, graph_repos=args.graph_repos)
+        corpus = load_corpus(pipeline) if any(stage in CORPUS_STAGES for stage in stages) else []
+        # the warmup runs also start the process pool of the ontology detection
+        for _ in range(args.warmup):
+            for item in corpus:
+                pipeline.run(item, StageTimer())
+            pipeline.run_synthetic(StageTimer())
+        samples = {stage: [] for stage in stages}
+        for _ in range(args.repeats):
+            for item in corpus + [None]:
+                timer = StageTimer(True)
+                if item is None:
+                    pipeline.run_synthetic(timer)
+                else:
+                    pipeline.run(item, timer)
+                for stage, elapsed in timer.times.items():
+                    samples[stage].append(elapsed * 1000)
+        memory = MemoryStages()
+        if not args.no_memory:
+            tracemalloc.start()
+            for item in corpus:
+                pipeline.run(item, memory)
+            pipeline.run_synthetic(memory)
+            tracemalloc.stop()
+
+    report = {"corpus": len(corpus), "repeats": args.repeats, "peak_rss_mb": peak_rss_mb(), "stages": {}}
+    for stage in stages:
+        stage_samples = sorted(samples[stage])
+        if len(stage_samples) == 0:
+            continue
+        report["stages"][stage] = {"n": len(stage_samples), "mean_ms": sum(stage_samples) / len(stage_samples)}
+        for p in PERCENTILES:
+            report["stages"][stage][f"p{p}_ms"] = percentile(stage_samples, p)
+        if stage in memory.peaks:
+            report["stages"][stage]["peak_kb"] = memory.peaks[stage] / 1024
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    print(f"{len(corpus)} repositories and READMEs, {args.repeats} repeats (after {args.warmup} warmup runs)")
+    header = "stage\t\t\tmean (ms)\t" + "\t".join(f"p{p} (ms)" for p in PERCENTILES) + "\tpeak (KB)"
+    print(header + ("\tbaseline p50 (ms)\tchange" if baseline is not None else ""))
+    for stage, values in report["stages"].items():
+        line = f"{stage:<24}{values['mean_ms']:.2f}\t\t" + "\t\t".join(
+            f"{values[f'p{p}_ms']:.2f}" for p in PERCENTILES) + f"\t\t{values.get('peak_kb', float('nan')):.0f}"
+        baseline_values = baseline["stages"].get(stage) if baseline is not None else None
+        if baseline_values is not None:
+            change = (values["p50_ms"] - baseline_values["p50_ms"]) / baseline_values["p50_ms"] * 100 \
+                if baseline_values["p50_ms"] > 0 else 0
+            line += f"\t{baseline_values['p50_ms']:.2f}\t\t\t{change:+.1f}%"
+        print(line)
+    if report["peak_rss_mb"] is not None:
+        print(f"peak RSS: {report['peak_rss_mb']:.1f} MB")
+    if args.save is not None:
+        with open(args.save, "w") as save_file:
+            json.dump(report, save_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
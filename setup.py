@@ -79,5 +79,6 @@ setup(
     exclude_package_data={"somef": ["test/*"]},
     zip_safe=False,
     install_requires=install_requires,
+    extras_require={"fast-json": ["orjson"]},
     python_requires=">=3.9",
 )
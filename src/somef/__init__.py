@@ -1,3 +1,13 @@
 # -*- coding: utf-8 -*-
 
 __version__ = "0.9.4"
+
+
+def describe_many(repositories, **kwargs):
+    """
+    Analyzes several repositories, yielding pairs (repository, Result) as each one is analyzed.
+    See somef_cli.describe_many for the options (e.g., workers, ordered)
+    """
+    # imported here, so importing somef does not load the classifiers and WordNet
+    from .somef_cli import describe_many as describe_repositories
+    return describe_repositories(repositories, **kwargs)
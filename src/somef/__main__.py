@@ -120,14 +120,17 @@ def configure(auto, base_uri):
     "-g",
     type=click.Path(),
     help="""Path to the output Knowledge Graph export file. If supplied, the output will be a Knowledge Graph,
-            in the format given in the --format option chosen (turtle, json-ld)"""
+            in the format given in the --format option chosen (turtle, json-ld, nt, nquads). If the path ends with .gz,
+            the file will be compressed with gzip"""
 )
 @click.option(
     "--graph_format",
     "-f",
-    type=click.Choice(["turtle", "json-ld"]),
+    type=click.Choice(["turtle", "json-ld", "nt", "nquads"]),
     default="turtle",
-    help="""If the --graph_out option is given, this is the format that the graph will be stored in"""
+    help="""If the --graph_out option is given, this is the format that the graph will be stored in. N-Triples (nt)
+    and N-Quads (nquads, one named graph per repository) are written repository by repository, without keeping the
+    whole graph in memory"""
 )
 @click.option(
     "--pretty",
@@ -151,8 +154,166 @@ def configure(auto, base_uri):
     help="""SOMEF will NOT delete the temporary folder where files are stored for analysis. Files will be stored at the
     desired path"""
 )
+@click.option(
+    "--fetch_mode",
+    type=click.Choice(constants.FETCH_MODES),
+    default=constants.FETCH_MODE_ARCHIVE,
+    help="""How the files of a GitHub repository are obtained: downloading its archive (archive), only its README and
+    the key files at its root, such as the license or citation files (key_files), or only the files whose content is
+    analyzed, selected from the list of files of the repository (tree). key_files avoids downloading the archive, but
+    the files in folders (e.g., notebooks, ontologies, workflows) and the type of the repository are not analyzed.
+    tree gives the same results as archive, and the archive is downloaded instead if there are too many files to
+    download. mirror (GitHub and GitLab) keeps a bare git mirror of each repository in --mirror_dir, so analyzing a
+    repository again only fetches its new commits (git must be installed)"""
+)
+@click.option(
+    "--mirror_dir",
+    type=click.Path(file_okay=False),
+    envvar="SOMEF_MIRROR_DIR",
+    default=constants.MIRROR_DEFAULT_DIR,
+    help="""Folder where the git mirrors of the repositories are kept with --fetch_mode mirror. It can also be set with
+    the SOMEF_MIRROR_DIR environment variable"""
+)
+@click.option(
+    "--cache",
+    type=click.Path(dir_okay=False),
+    envvar="SOMEF_CACHE",
+    default=None,
+    help="""Keep the results of the analysis of each file (README, ontologies, workflows) in the given file (SQLite
+    database), by path and content. When a repository is analyzed again, only the files that changed are analyzed.
+    It can also be set with the SOMEF_CACHE environment variable"""
+)
+@click.option(
+    "--prune_dirs",
+    default=None,
+    help="""Comma separated names of the folders skipped when analyzing the files of a repository. By default,
+    dependencies, version control and build folders are skipped (""" + ", ".join(constants.WALK_PRUNED_DIRS) + """).
+    An empty value skips no folders"""
+)
+@click.option(
+    "--gitignore",
+    is_flag=True,
+    default=False,
+    help="""Skip the files and folders ignored by the .gitignore files of the repository when analyzing its files"""
+)
+@click.option(
+    "--max_walk_files",
+    type=click.IntRange(min=1),
+    default=constants.WALK_MAX_FILES,
+    help="""Maximum number of files of a repository that are analyzed (""" + str(constants.WALK_MAX_FILES) + """ by
+    default). The rest of the files are ignored"""
+)
+@click.option(
+    "--max_walk_mb",
+    type=click.IntRange(min=1),
+    default=None,
+    help="""Maximum size (in MB) of the files of a repository that are analyzed. The rest of the files are ignored.
+    By default there is no limit"""
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    default=False,
+    help="""Skip the URL checks done while analyzing the README (repository wiki and package links). By default these
+    checks are done concurrently once the README has been analyzed"""
+)
+@click.option(
+    "--timing",
+    is_flag=True,
+    default=False,
+    help="""Measure the time spent in each stage of the analysis (GitHub API, download, header analysis, classifiers,
+    etc.) and of the export. Times are logged and added to the somef_provenance field of the JSON output"""
+)
+@click.option(
+    "--profile_memory",
+    is_flag=True,
+    default=False,
+    help="""Record the memory used in each stage of the analysis and of the export (peak memory allocated, top
+    allocations and RSS of the process). The report is saved next to the output file, with the extension .memory.json"""
+)
+@click.option(
+    "--profile",
+    type=click.Path(dir_okay=False),
+    envvar="SOMEF_PROFILE",
+    default=None,
+    help="""Profile the run with cProfile and save the statistics (pstats format) in the given file. It can also be set
+    with the SOMEF_PROFILE environment variable"""
+)
+@click.option(
+    "--profile_per_repository",
+    is_flag=True,
+    envvar="SOMEF_PROFILE_PER_REPOSITORY",
+    default=False,
+    help="""With --profile and --in_file, save a profile for each repository (and one for the export), adding the
+    name of the repository to the file name (e.g., out.github.com_owner_repo.prof)"""
+)
 def describe(**kwargs):
     # import so missing packages get installed when appropriate
     from . import somef_cli
     somef_cli.run_cli(**kwargs)
-    click.secho(f"Success", fg="green")
\ No newline at end of file
+    click.secho(f"Success", fg="green")
+
+
+@cli.command(help="Run SOMEF as an HTTP service, keeping the models loaded between requests")
+@click.option("--host", default=constants.SERVER_DEFAULT_HOST, help="Address where the service listens")
+@click.option("--port", "-p", type=int, default=constants.SERVER_DEFAULT_PORT,
+              help="Port where the service listens")
+@click.option("--workers", "-w", type=click.IntRange(min=1), default=constants.SERVER_DEFAULT_WORKERS,
+              help="Number of repositories analyzed at once")
+@click.option("--max_upload", type=click.IntRange(min=1), default=constants.SERVER_MAX_UPLOAD_MB,
+              help="Maximum size of the requests (e.g., uploaded archives of repositories), in MB")
+def serve(host, port, workers, max_upload):
+    from . import server
+    server.serve(host, port, workers, max_upload)
+
+
+@cli.command(help="Add the repositories of a file to a queue, to be analyzed by somef worker")
+@click.option("--in_file", "-i", type=click.Path(exists=True), required=True,
+              help="A file of newline separated links to GitHub repositories")
+@click.option("--queue", "-q", required=True,
+              help="Queue of repositories: path of a SQLite database, or <backend>://<location>")
+def enqueue(in_file, queue):
+    from . import job_queue
+    with open(in_file, "r") as in_handle:
+        repo_list = [line.strip() for line in in_handle if len(line.strip()) > 0]
+    repositories = job_queue.open_queue(queue)
+    added = repositories.put(repo_list)
+    click.echo(f"{added} repositories added to the queue: {repositories.stats()}")
+    repositories.close()
+
+
+@cli.command(help="Analyze the repositories of a queue, saving the results of each one in a folder. Several workers "
+                  "can share the same queue")
+@click.option("--queue", "-q", required=True,
+              help="Queue of repositories: path of a SQLite database, or <backend>://<location>")
+@click.option("--output_dir", "-o", type=click.Path(file_okay=False), required=True,
+              help="Folder where the JSON results of each repository are saved (<host>_<owner>_<repo>.json)")
+@click.option("--threshold", "-t", type=float, default=0.8, help="Threshold to classify the text")
+@click.option("--ignore_classifiers", "-ic", is_flag=True, default=False,
+              help="Flag to ignore running the classifiers (by default False)")
+@click.option("--codemeta", "-c", is_flag=True, default=False,
+              help="Also save the results of each repository as Codemeta (<host>_<owner>_<repo>.codemeta.json)")
+@click.option("--pretty", "-p", is_flag=True, default=False, help="Pretty print the JSON output files")
+@click.option("--offline", is_flag=True, default=False, help="Skip the URL checks done while analyzing the README")
+@click.option("--visibility_timeout", type=click.IntRange(min=1), default=constants.QUEUE_VISIBILITY_TIMEOUT,
+              help="Seconds a repository is hidden from other workers once taken. If it has not been analyzed by "
+                   "then, it is given to another worker")
+@click.option("--max_attempts", type=click.IntRange(min=1), default=constants.QUEUE_MAX_ATTEMPTS,
+              help="Attempts before giving up on a repository")
+@click.option("--wait", is_flag=True, default=False,
+              help="Wait for new repositories when the queue is empty, instead of stopping")
+@click.option("--cache", type=click.Path(dir_okay=False), envvar="SOMEF_CACHE", default=None,
+              help="File (SQLite database) where the results of the analysis of each file are kept, so only the "
+                   "files that changed are analyzed when a repository is analyzed again")
+def worker(queue, output_dir, threshold, ignore_classifiers, codemeta, pretty, offline, visibility_timeout,
+           max_attempts, wait, cache):
+    from . import job_queue
+    repositories = job_queue.open_queue(queue, max_attempts)
+    try:
+        processed = job_queue.run_worker(repositories, output_dir, threshold=threshold,
+                                         ignore_classifiers=ignore_classifiers, codemeta=codemeta, pretty=pretty,
+                                         offline=offline, visibility_timeout=visibility_timeout, wait=wait,
+                                         cache=cache)
+        click.echo(f"{processed} repositories analyzed. Queue: {repositories.stats()}")
+    finally:
+        repositories.close()
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from . import __version__
+from .utils import constants
+
+# returned by AnalysisCache.get when there are no results for the input (None is a valid result)
+MISSING = object()
+
+
+def blob_hash(file_path):
+    """
+    Computes the git blob hash of a file (the same as git hash-object), so files are identified by their content
+    regardless of how the repository was obtained
+    Parameters
+    ----------
+    @param file_path: path of the file
+
+    Returns
+    -------
+    @return: hexadecimal SHA-1 of the blob
+    """
+    sha = hashlib.sha1(b"blob %d\0" % os.path.getsize(file_path))
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(2 ** 16), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def text_hash(text):
+    """Computes the git blob hash of a text, encoded in UTF-8"""
+    data = text.encode("utf-8", "surrogateescape")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Results of the extractors of SOMEF, stored in a SQLite database and keyed by the path and blob hash of their
+    input file (and the options of the extractor, and the version of SOMEF). When a repository is analyzed again,
+    only the extractors whose input files changed are run, and the cached results are used for the rest. It can be
+    shared by several threads.
+    """
+
+    def __init__(self, path):
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS results (
+            extractor TEXT NOT NULL,
+            options TEXT NOT NULL,
+            path TEXT NOT NULL,
+            blob TEXT NOT NULL,
+            version TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (extractor, options, path, blob, version))""")
+
+    def get(self, extractor, path, blob, options=""):
+        """Returns the cached result of an extractor for a file, or MISSING"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM results WHERE extractor = ? AND options = ? AND path = ? AND blob = ? AND "
+                "version = ?", (extractor, options, path, blob, __version__)).fetchone()
+        if row is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, extractor, path, blob, value, options=""):
+        """Stores the result of an extractor for a file (it must be serializable as JSON)"""
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                                    (extractor, options, path, blob, __version__, json.dumps(value)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        logging.info(f"Analysis cache: {self.hits} results reused, {self.misses} computed")
+        self.connection.close()
+
+
+def check_file(cache, extractor, repo_dir, file_path, function):
+    """
+    Runs an extractor on a file of a repository, or returns its cached result if the file has not changed
+    Parameters
+    ----------
+    @param cache: AnalysisCache (if None, the extractor is always run)
+    @param extractor: name of the extractor (see constants.CACHE_*)
+    @param repo_dir: folder of the repository
+    @param file_path: path of the file, relative to repo_dir
+    @param function: extractor, which receives the full path of the file. Its result must be serializable as JSON
+
+    Returns
+    -------
+    @return: the result of the extractor
+    """
+    full_path = os.path.join(repo_dir, file_path)
+    if cache is None:
+        return function(full_path)
+    try:
+        blob = blob_hash(full_path)
+    except OSError as e:
+        logging.error("Error while reading " + full_path + ": " + str(e))
+        return function(full_path)
+    path = os.path.normpath(file_path).replace(os.sep, "/")
+    value = cache.get(extractor, path, blob)
+    if value is MISSING:
+        value = function(full_path)
+        cache.put(extractor, path, blob, value)
+    return value
+
+
+def check_files(cache, extractor, repo_dir, file_paths, function):
+    """
+    Runs an extractor on several files of a repository at once, using the cached results of the files that have not
+    changed
+    Parameters
+    ----------
+    @param cache: AnalysisCache (if None, the extractor is run on all the files)
+    @param extractor: name of the extractor (see constants.CACHE_*)
+    @param repo_dir: folder of the repository
+    @param file_paths: paths of the files, relative to repo_dir
+    @param function: extractor, which receives the list of full paths of the files and returns the list of their
+    results. They must be serializable as JSON
+
+    Returns
+    -------
+    @return: list with the result of the extractor for each file
+    """
+    full_paths = [os.path.join(repo_dir, file_path) for file_path in file_paths]
+    if cache is None:
+        return function(full_paths)
+    values = [MISSING] * len(file_paths)
+    blobs = [None] * len(file_paths)
+    for index, file_path in enumerate(file_paths):
+        try:
+            blobs[index] = blob_hash(full_paths[index])
+        except OSError as e:
+            logging.error("Error while reading " + full_paths[index] + ": " + str(e))
+            continue
+        values[index] = cache.get(extractor, os.path.normpath(file_path).replace(os.sep, "/"), blobs[index])
+    missing = [index for index, value in enumerate(values) if value is MISSING]
+    for index, value in zip(missing, function([full_paths[index] for index in missing])):
+        values[index] = value
+        if blobs[index] is not None:
+            cache.put(extractor, os.path.normpath(file_paths[index]).replace(os.sep, "/"), blobs[index], value)
+    return values
+
+
+def readme_options(repository_metadata, **options):
+    """
+    Serializes the inputs of the README extractors besides the README text: their options, and the results they read
+    (the URL of the README and the name of the repository)
+    """
+    for category in [constants.CAT_README_URL, constants.CAT_NAME]:
+        try:
+            options[category] = repository_metadata.results[category][0][constants.PROP_RESULT][constants.PROP_VALUE]
+        except (KeyError, IndexError, TypeError):
+            options[category] = None
+    return json.dumps(options, sort_keys=True)
+
+
+def count_results(repository_metadata):
+    """Returns the number of results of each category, to obtain the results added afterwards (see new_results)"""
+    return {category: len(values) for category, values in repository_metadata.results.items()
+            if category != constants.PROP_PROVENANCE}
+
+
+def new_results(repository_metadata, counts):
+    """Returns the results added to a Result since count_results was called (the extractors only add results)"""
+    return {category: values[counts.get(category, 0):] for category, values in repository_metadata.results.items()
+            if category != constants.PROP_PROVENANCE and len(values) > counts.get(category, 0)}
+
+
+def merge_results(repository_metadata, results):
+    """Adds results obtained by new_results (e.g., from the cache) to a Result"""
+    for category, values in results.items():
+        repository_metadata.results.setdefault(category, []).extend(values)
+    return repository_metadata
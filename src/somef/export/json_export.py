@@ -1,6 +1,13 @@
 import json
-from dateutil import parser as date_parser
-from ..utils import constants
+import logging
+import math
+from .reconciliation import ReconciledResults
+from ..utils import constants, regexp
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 def save_json_output(repo_data, out_path, missing, pretty=False):
@@ -21,11 +28,133 @@ def save_json_output(repo_data, out_path, missing, pretty=False):
     if missing:
         # add a new key-value papir to the dictionary
         repo_data[constants.CAT_MISSING] = create_missing_fields(repo_data)
+    text = serialize_json(repo_data, pretty)
     with open(out_path, 'w') as output:
-        if pretty:
-            json.dump(repo_data, output, sort_keys=True, indent=2)
-        else:
-            json.dump(repo_data, output)
+        output.write(text)
+
+
+def serialize_json_stdlib(data, pretty=False):
+    """
+    Serializes data in JSON with the standard library
+    Parameters
+    ----------
+    @param data: dictionary to serialize
+    @param pretty: sort the keys and indent the JSON to make it human-readable
+
+    Returns
+    -------
+    @return: the JSON document (str)
+    """
+    if pretty:
+        return json.dumps(data, sort_keys=True, indent=2)
+    return json.dumps(data)
+
+
+def serialize_json_orjson(data, pretty=False):
+    """
+    Serializes data in JSON with orjson, producing the same text as serialize_json_stdlib: keys are sorted, the
+    indentation is that of the standard library, and non-ASCII characters are escaped. Only pretty printing is done
+    with orjson, as the standard library writes compact JSON with its C encoder (turning the compact output of orjson
+    into the separators of the standard library takes longer than that). If orjson cannot produce the same text
+    (e.g., floats written in scientific notation, NaN and infinite floats, non-string keys), the standard library is
+    used instead.
+    Parameters
+    ----------
+    @param data: dictionary to serialize
+    @param pretty: sort the keys and indent the JSON to make it human-readable
+
+    Returns
+    -------
+    @return: the JSON document (str)
+    """
+    if not pretty:
+        return serialize_json_stdlib(data, pretty)
+    try:
+        text = orjson.dumps(data, default=_orjson_default,
+                           option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode("utf-8")
+    except TypeError:
+        return serialize_json_stdlib(data, pretty)
+    if _has_orjson_floats(text, regexp.REGEXP_ORJSON_EXPONENT) or \
+            ("0.0000" in text and _has_orjson_floats(text, regexp.REGEXP_ORJSON_DECIMAL)):
+        return serialize_json_stdlib(data, pretty)
+    # orjson writes NaN and infinite floats as null, and the standard library as NaN, Infinity and -Infinity
+    if "null" in text and _has_non_finite_floats(data):
+        return serialize_json_stdlib(data, pretty)
+    if not text.isascii() or "\x7f" in text:
+        text = _escape_non_ascii(text)
+    return text
+
+
+def _orjson_default(value):
+    """Serializes the subclasses of float (e.g., numpy.float64) as the standard library does"""
+    if isinstance(value, float):
+        return float(value)
+    raise TypeError("Type is not JSON serializable: " + type(value).__name__)
+
+
+def _has_non_finite_floats(data):
+    """Checks whether the data has NaN or infinite floats"""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(_has_non_finite_floats(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_has_non_finite_floats(value) for value in data)
+    return False
+
+
+def _has_orjson_floats(text, expression):
+    """Checks whether the floats written by orjson in the text (one value per line) match the given expression"""
+    for match in expression.finditer(text):
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        if regexp.REGEXP_ORJSON_FLOAT.fullmatch(text, line_start, match.end()):
+            return True
+    return False
+
+
+def _escape_non_ascii(text):
+    """Escapes the non-ASCII characters of a JSON document as the standard library does (ensure_ascii)"""
+    # escaped backslashes are replaced by a character that cannot appear in the document (control characters are
+    # always escaped), so the escapes added by backslashreplace are not confused with them
+    text = text.replace("\\\\", "\x00").replace("\x7f", "\\u007f")
+    escaped = text.encode("ascii", "backslashreplace")
+    escaped = regexp.REGEXP_BACKSLASH_LATIN1.sub(rb"\\u00\1", escaped)
+    if b"\\U" in escaped:
+        escaped = regexp.REGEXP_BACKSLASH_ASTRAL.sub(_escape_astral, escaped)
+    return escaped.decode("ascii").replace("\x00", "\\\\")
+
+
+def _escape_astral(match):
+    """Escapes a character outside the Basic Multilingual Plane as a surrogate pair"""
+    code = int(match.group(1), 16) - 0x10000
+    return "\\u{0:04x}\\u{1:04x}".format(0xd800 | (code >> 10), 0xdc00 | (code & 0x3ff)).encode("ascii")
+
+
+JSON_SERIALIZERS = {
+    constants.JSON_SERIALIZER_STDLIB: serialize_json_stdlib,
+    constants.JSON_SERIALIZER_ORJSON: serialize_json_orjson
+}
+
+
+def serialize_json(data, pretty=False, serializer=None):
+    """
+    Serializes data in JSON with the selected serializer. All serializers produce the same text.
+    Parameters
+    ----------
+    @param data: dictionary to serialize
+    @param pretty: sort the keys and indent the JSON to make it human-readable
+    @param serializer: name of the serializer (json or orjson). If None, orjson is used when it is installed
+
+    Returns
+    -------
+    @return: the JSON document (str)
+    """
+    if serializer is None:
+        serializer = constants.JSON_SERIALIZER_ORJSON if orjson is not None else constants.JSON_SERIALIZER_STDLIB
+    elif serializer == constants.JSON_SERIALIZER_ORJSON and orjson is None:
+        logging.warning("orjson is not installed, using the standard JSON serializer")
+        serializer = constants.JSON_SERIALIZER_STDLIB
+    return JSON_SERIALIZERS[serializer](data, pretty)
 
 
 def save_codemeta_output(repo_data, outfile, pretty=False):
@@ -34,141 +163,14 @@ def save_codemeta_output(repo_data, outfile, pretty=False):
 
     Parameters
     ----------
-    @param repo_data: JSON with the results to translate to Codemeta
+    @param repo_data: JSON with the results to translate to Codemeta, or its ReconciledResults (if they have already
+    been reconciled for other exporters)
     @param outfile: path where to save the codemeta file
     @param pretty: option to show the JSON results in a nice format
     """
-
-    def format_date(date_string):
-        date_object = date_parser.parse(date_string)
-        return date_object.strftime("%Y-%m-%d")
-
-    # latest_release = None
-    # releases = data_path(["releases", "excerpt"])
-    #
-    # if releases is not None and len(releases) > 0:
-    #     latest_release = releases[0]
-    #     latest_pub_date = date_parser.parse(latest_release["datePublished"])
-    #     for index in range(1, len(releases)):
-    #         release = releases[index]
-    #         pub_date = date_parser.parse(release["datePublished"])
-    #
-    #         if pub_date > latest_pub_date:
-    #             latest_release = release
-    #             latest_pub_date = pub_date
-
-    # def release_path(path):
-    #     return DataGraph.resolve_path(latest_release, path)
-
-    code_repository = None
-    if constants.CAT_CODE_REPOSITORY in repo_data:
-        code_repository = repo_data[constants.CAT_CODE_REPOSITORY][0][constants.PROP_RESULT][constants.PROP_VALUE]
-
-    author_name = None
-    if constants.CAT_OWNER in repo_data:
-        author_name = repo_data[constants.CAT_OWNER][0][constants.PROP_RESULT][constants.PROP_VALUE]
-
-    descriptions = repo_data[constants.CAT_DESCRIPTION]
-    descriptions_text = []
-    if descriptions is not None:
-        descriptions.sort(key=lambda x: (x[constants.PROP_CONFIDENCE] + (1 if x[constants.PROP_TECHNIQUE] == constants.GITHUB_API else 0)),
-                          reverse=True)
-        descriptions_text = [x[constants.PROP_RESULT][constants.PROP_VALUE] for x in descriptions]
-
-    codemeta_output = {
-        "@context": "https://doi.org/10.5063/schema/codemeta-2.0",
-        "@type": "SoftwareSourceCode"
-    }
-    if constants.CAT_LICENSE in repo_data:
-        # We mix the name of the license from github API with the URL of the file (if found)
-        l_result = {}
-        for l in repo_data[constants.CAT_LICENSE]:
-            if constants.PROP_NAME in l[constants.PROP_RESULT].keys():
-                l_result["name"] = l[constants.PROP_RESULT][constants.PROP_NAME]
-            if "url" not in l_result.keys() and constants.PROP_URL in l[constants.PROP_RESULT].keys():
-                    l_result["url"] = l[constants.PROP_RESULT][constants.PROP_URL]
-            # We get the first license we find from the repo
-            elif l[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_FILE_EXPLORATION \
-                    and constants.PROP_SOURCE in l.keys() and "api.github.com" in l_result["url"]:
-                l_result["url"] = l[constants.PROP_SOURCE]
-        codemeta_output["license"] = l_result
-    if code_repository is not None:
-        codemeta_output["codeRepository"] = code_repository
-        codemeta_output["issueTracker"] = code_repository + "/issues"
-    if constants.CAT_DATE_CREATED in repo_data:
-        codemeta_output["dateCreated"] = format_date(repo_data[constants.CAT_DATE_CREATED][0][constants.PROP_RESULT][constants.PROP_VALUE])
-    if constants.CAT_DATE_UPDATED in repo_data:
-        codemeta_output["dateModified"] = format_date(repo_data[constants.CAT_DATE_UPDATED][0][constants.PROP_RESULT][constants.PROP_VALUE])
-    if constants.CAT_DOWNLOAD_URL in repo_data:
-        codemeta_output["downloadUrl"] = repo_data[constants.CAT_DOWNLOAD_URL][0][constants.PROP_RESULT][constants.PROP_VALUE]
-    if constants.CAT_NAME in repo_data:
-        codemeta_output["name"] = repo_data[constants.CAT_NAME][0][constants.PROP_RESULT][constants.PROP_VALUE]
-    if constants.CAT_LOGO in repo_data:
-        codemeta_output["logo"] = repo_data[constants.CAT_LOGO][0][constants.PROP_RESULT][constants.PROP_VALUE]
-    if constants.CAT_KEYWORDS in repo_data:
-        codemeta_output["keywords"] = repo_data[constants.CAT_KEYWORDS][0][constants.PROP_RESULT][constants.PROP_VALUE]
-    if constants.CAT_PROGRAMMING_LANGUAGES in repo_data:
-        codemeta_output["programmingLanguage"] = [x[constants.PROP_RESULT][constants.PROP_VALUE] for x in repo_data[constants.CAT_PROGRAMMING_LANGUAGES]]
-    if constants.CAT_REQUIREMENTS in repo_data:
-        codemeta_output["softwareRequirements"] = [x[constants.PROP_RESULT][constants.PROP_VALUE] for x in repo_data[constants.CAT_REQUIREMENTS]]
-    install_links = []
-    if constants.CAT_INSTALLATION in repo_data:
-        for inst in repo_data[constants.CAT_INSTALLATION]:
-            if inst[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_HEADER_ANALYSIS and constants.PROP_SOURCE in inst.keys():
-                install_links.append(inst[constants.PROP_SOURCE])
-            elif inst[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_FILE_EXPLORATION:
-                install_links.append(inst[constants.PROP_RESULT][constants.PROP_VALUE])
-    if constants.CAT_DOCUMENTATION in repo_data:
-        for inst in repo_data[constants.CAT_DOCUMENTATION]:
-            if inst[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_HEADER_ANALYSIS and constants.PROP_SOURCE in inst.keys():
-                install_links.append(inst[constants.PROP_SOURCE])
-            elif inst[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_FILE_EXPLORATION or \
-                    inst[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_REGULAR_EXPRESSION:
-                install_links.append(inst[constants.PROP_RESULT][constants.PROP_VALUE])
-    if len(install_links) > 0:
-        # remove duplicates and generate codemeta
-        install_links = list(set(install_links))
-        codemeta_output["buildInstructions"] = install_links
-    if constants.CAT_OWNER in repo_data:
-        # if user then person, otherwise organization
-        type_aux = repo_data[constants.CAT_OWNER][0][constants.PROP_RESULT][constants.PROP_TYPE]
-        if type_aux == "User":
-            type_aux = "Person"
-        codemeta_output["author"] = [
-            {
-                "@type": type_aux,
-                "@id": "https://github.com/" + author_name
-            }
-        ]
-    if constants.CAT_CITATION in repo_data:
-        url_cit = []
-        for cit in repo_data[constants.CAT_CITATION]:
-            if constants.PROP_DOI in cit[constants.PROP_RESULT].keys():
-                url_cit.append(cit[constants.PROP_RESULT][constants.PROP_DOI])
-            elif constants.PROP_FORMAT in cit[constants.PROP_RESULT].keys() \
-                    and cit[constants.PROP_RESULT][constants.PROP_FORMAT] == constants.FORMAT_CFF:
-                url_cit.append(cit[constants.PROP_SOURCE])
-        if len(url_cit) > 0:
-            codemeta_output["citation"] = url_cit
-    if constants.CAT_IDENTIFIER in repo_data:
-        codemeta_output["identifier"] = repo_data[constants.CAT_IDENTIFIER][0][constants.PROP_RESULT][constants.PROP_VALUE]
-    if constants.CAT_README_URL in repo_data:
-        codemeta_output["readme"] = repo_data[constants.CAT_README_URL][0][constants.PROP_RESULT][constants.PROP_VALUE]
-    # if "contributors" in repo_data:
-    #     codemeta_output["contributor"] = data_path(["contributors", "excerpt"])
-    # A person is expected, and we extract text at the moment
-    if descriptions_text:
-        codemeta_output["description"] = descriptions_text
-    # if published_date != "":
-    # commenting this out because we cannot assume the last published date to be the published date
-    #     codemeta_output["datePublished"] = published_date
-    pruned_output = {}
-
-    for key, value in codemeta_output.items():
-        if not (value is None or ((isinstance(value, list) or isinstance(value, tuple)) and len(value) == 0)):
-            pruned_output[key] = value
-    # now, prune out the variables that are None
-    save_json_output(pruned_output, outfile, None, pretty=pretty)
+    if not isinstance(repo_data, ReconciledResults):
+        repo_data = ReconciledResults(repo_data)
+    save_json_output(repo_data.codemeta, outfile, None, pretty=pretty)
 
 
 def create_missing_fields(result):
@@ -0,0 +1,222 @@
+import functools
+import itertools
+import re
+from urllib.parse import quote
+
+from rdflib import Graph, Literal, Namespace, URIRef
+from rdflib.namespace import RDF, XSD
+
+RR = Namespace("http://www.w3.org/ns/r2rml#")
+RML = Namespace("http://semweb.mmlab.be/ns/rml#")
+
+# values that the RML engine (morph-kgc) treats as null: no triples are generated for them
+NULL_VALUES = ("", "nan")
+REGEXP_TEMPLATE_REFERENCE = re.compile(r"\{([^}]+)\}")
+
+
+@functools.lru_cache(maxsize=None)
+def load_mapping(mapping_path):
+    """
+    Compiles an RML mapping into a list of rules that can be applied directly to a Python dictionary.
+    The mapping is parsed once per process. Only the subset of RML used by the SOMEF mappings is supported: JSONPath
+    iterators over objects/arrays, and constant, reference and template term maps (no joins or functions).
+    Parameters
+    ----------
+    @param mapping_path: path to the RML mapping (Turtle)
+
+    Returns
+    -------
+    @return list of rules (iterator, subject term map, list of (predicate, object term map) pairs)
+    """
+    mapping = Graph()
+    mapping.parse(mapping_path, format="turtle")
+    rules = []
+    for triples_map in sorted(mapping.subjects(RDF.type, RR.TriplesMap)):
+        logical_source = mapping.value(triples_map, RML.logicalSource)
+        iterator = str(mapping.value(logical_source, RML.iterator, default="$"))
+        subject_map = _compile_term_map(mapping, mapping.value(triples_map, RR.subjectMap), RR.IRI)
+        predicate_objects = []
+        for subject_class in mapping.objects(mapping.value(triples_map, RR.subjectMap), RR["class"]):
+            predicate_objects.append((RDF.type, _constant_term_map(subject_class)))
+        for pom in sorted(mapping.objects(triples_map, RR.predicateObjectMap)):
+            predicates = [_constant_predicate(mapping, pm) for pm in mapping.objects(pom, RR.predicateMap)]
+            predicates += list(mapping.objects(pom, RR.predicate))
+            objects = [_compile_term_map(mapping, om, None) for om in mapping.objects(pom, RR.objectMap)]
+            objects += [_constant_term_map(o) for o in mapping.objects(pom, RR.object)]
+            for predicate in predicates:
+                for object_map in objects:
+                    predicate_objects.append((predicate, object_map))
+        rules.append((_compile_iterator(iterator), subject_map, predicate_objects))
+    return rules
+
+
+def materialize(mapping_path, data, graph=None) -> Graph:
+    """
+    Applies an RML mapping to a dictionary (e.g., the reconciled results of a repository), producing the same triples
+    as materializing the mapping with morph-kgc over the dictionary serialized in JSON
+    Parameters
+    ----------
+    @param mapping_path: path to the RML mapping (Turtle)
+    @param data: dictionary to transform
+    @param graph: graph where the triples are added. If None, a new graph is created
+
+    Returns
+    -------
+    @return the graph with the triples generated by the mapping
+    """
+    if graph is None:
+        graph = Graph()
+    for iterator, subject_map, predicate_objects in load_mapping(mapping_path):
+        records = iterator(data)
+        for predicate, object_map in predicate_objects:
+            # references shared by the subject and the object are bound to the same value (as in a table row)
+            for row in _rows(records, list(dict.fromkeys(subject_map[0] + object_map[0]))):
+                graph.add((subject_map[1](row), predicate, object_map[1](row)))
+    return graph
+
+
+def _compile_iterator(iterator):
+    """Compiles a JSONPath iterator of the form $, $.key or $.key[*] (keys can be nested)"""
+    steps = [step for step in iterator.lstrip("$").split(".") if step != ""]
+
+    def iterate(data):
+        records = [data]
+        for step in steps:
+            key = step[:-3] if step.endswith("[*]") else step
+            next_records = []
+            for record in records:
+                if isinstance(record, dict) and key in record:
+                    value = record[key]
+                    if step.endswith("[*]") and isinstance(value, (list, tuple)):
+                        next_records.extend(value)
+                    else:
+                        next_records.append(value)
+            records = next_records
+        return [record for record in records if isinstance(record, dict)]
+    return iterate
+
+
+def _rows(records, references):
+    """
+    Returns the rows of values of the given references (e.g., name, owner.type) in a list of records.
+    Rows are built as done by morph-kgc for JSON sources: lists are expanded (creating one row per combination of
+    values), and rows with null or missing values in any of the fields of the referenced objects are dropped.
+    Unlike morph-kgc (which loads the values in pandas), integers are not turned into floats when they are mixed with
+    floats in the same field.
+    """
+    keys = list(dict.fromkeys(reference.split(".")[0] for reference in references))
+    rows = []
+    columns = set()
+    for record in records:
+        selected = {key: record[key] for key in keys if key in record}
+        if len(selected) == 0:
+            continue
+        for row in _expand(selected):
+            if None in row.values():
+                continue
+            columns_row = {}
+            _flatten_columns(row, "", columns_row)
+            columns.update(columns_row.keys())
+            rows.append(columns_row)
+    output = []
+    for columns_row in rows:
+        if len(columns_row) < len(columns) or None in columns_row.values():
+            continue
+        values = [columns_row.get(reference) for reference in references]
+        if None in values:
+            continue
+        values = [str(value) for value in values]
+        if not any(value in NULL_VALUES for value in values):
+            output.append(dict(zip(references, values)))
+    return output
+
+
+def _expand(data):
+    """Expands the lists of a JSON object, yielding one object per combination of the values of its lists"""
+    if isinstance(data, dict):
+        for values in itertools.product(*[list(_expand(value)) for value in data.values()]):
+            yield dict(zip(data.keys(), values))
+    elif isinstance(data, (list, tuple)):
+        for value in data:
+            yield from _expand(value)
+    else:
+        yield data
+
+
+def _flatten_columns(data, prefix, columns):
+    """Flattens nested objects into columns named with the path of each value (e.g., owner.type)"""
+    for key, value in data.items():
+        if isinstance(value, dict) and len(value) > 0:
+            _flatten_columns(value, prefix + key + ".", columns)
+        elif not isinstance(value, dict):
+            columns[prefix + key] = value
+
+
+def _constant_predicate(mapping, predicate_map):
+    constant = mapping.value(predicate_map, RR.constant)
+    if constant is None:
+        raise ValueError("Only constant predicate maps are supported: " + str(predicate_map))
+    return URIRef(constant)
+
+
+def _constant_term_map(term):
+    return [], lambda row: term
+
+
+def _compile_term_map(mapping, term_map, default_term_type):
+    """
+    Compiles a term map into a pair (references used, function that creates the term from a row of values)
+    """
+    term_type = mapping.value(term_map, RR.termType)
+    datatype = mapping.value(term_map, RR.datatype)
+    language = mapping.value(term_map, RR.language)
+    constant = mapping.value(term_map, RR.constant)
+    reference = mapping.value(term_map, RML.reference)
+    template = mapping.value(term_map, RR.template)
+    if term_type is None:
+        # R2RML defaults: references (or term maps with datatype/language) generate literals
+        if default_term_type is not None:
+            term_type = default_term_type
+        elif reference is not None or datatype is not None or language is not None:
+            term_type = RR.Literal
+        else:
+            term_type = RR.IRI
+    if constant is not None:
+        return _constant_term_map(URIRef(constant) if term_type == RR.IRI else constant)
+    if reference is not None:
+        references = [str(reference)]
+        parts = ["", str(reference), ""]
+    elif template is not None:
+        parts = REGEXP_TEMPLATE_REFERENCE.split(str(template))
+        references = parts[1::2]
+    else:
+        raise ValueError("Unsupported term map: " + str(term_map))
+    # only IRI templates encode the values inserted in them
+    encode = term_type == RR.IRI and template is not None
+    datatype = URIRef(datatype) if datatype is not None else None
+    language = str(language) if language is not None else None
+
+    def create_term(row):
+        value = ""
+        for index, part in enumerate(parts):
+            if index % 2 == 0:
+                value += part
+            elif encode:
+                value += quote(row[part], safe="")
+            else:
+                value += _natural_value(row[part], datatype)
+        if term_type == RR.IRI:
+            return URIRef(value)
+        return Literal(value, datatype=datatype, lang=language)
+    return references, create_term
+
+
+def _natural_value(value, datatype):
+    """Natural mapping of values for typed literals, as done by the RML engine"""
+    if datatype == XSD.dateTime:
+        return value.replace(" ", "T")
+    if datatype == XSD.boolean:
+        return value.lower()
+    if datatype == XSD.integer:
+        return str(int(float(value)))
+    return value
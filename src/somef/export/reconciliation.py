@@ -0,0 +1,212 @@
+import logging
+from dateutil import parser as date_parser
+from ..utils import constants
+
+# order of the Codemeta properties in the exported file
+CODEMETA_PROPERTIES = ["@context", "@type", "license", "codeRepository", "issueTracker", "dateCreated", "dateModified",
+                       "downloadUrl", "name", "logo", "keywords", "programmingLanguage", "softwareRequirements",
+                       "buildInstructions", "author", "citation", "identifier", "readme", "description"]
+
+
+class ReconciledResults:
+    """
+    Normalized view of the results of a repository (Result.results), shared by the exporters. The results are
+    traversed once, producing the reconciled data transformed into RDF (graph_data) and the Codemeta document
+    (codemeta). The JSON export uses the full results (results), as it keeps the confidence and provenance.
+    """
+
+    def __init__(self, results):
+        self.results = results
+        self.graph_data = {}
+        self.codemeta = {}
+        self.reconcile()
+
+    def reconcile(self):
+        """
+        Method to reconcile all somef data to produce a KG and a Codemeta description of the repository.
+        Confidence and provenance information are not kept in the reconciled data.
+        Returns
+        -------
+        @return: Does not return a value
+        """
+        out = {}
+        codemeta = {
+            "@context": "https://doi.org/10.5063/schema/codemeta-2.0",
+            "@type": "SoftwareSourceCode"
+        }
+        install_links = []
+        for key, value in self.results.items():
+            # for now, we are not exporting provenance keys. Ignore all keys like somef_provenance
+            if "somef" in key:
+                continue
+            # if it is not a list, just get the excerpt
+            if not (isinstance(value, list) or isinstance(value, tuple)):
+                out[key] = value[constants.PROP_RESULT][constants.PROP_VALUE]
+                continue
+            if len(value) == 0:
+                continue
+            if key == constants.CAT_LICENSE:
+                # Create a License object with its id, URL, name and sameAs spdx identifier URL.
+                # We don't keep the license content, as in a KG it may be too many file text
+                license_result = {}
+                for l in value:
+                    if constants.PROP_SPDX_ID in l[constants.PROP_RESULT].keys():
+                        license_result[constants.PROP_SPDX_ID] = l[constants.PROP_RESULT][constants.PROP_SPDX_ID]
+                    if constants.PROP_NAME in l[constants.PROP_RESULT].keys():
+                        license_result[constants.PROP_NAME] = l[constants.PROP_RESULT][constants.PROP_NAME]
+                    if constants.PROP_URL not in license_result.keys() and constants.PROP_URL in \
+                            l[constants.PROP_RESULT].keys():
+                        license_result[constants.PROP_URL] = l[constants.PROP_RESULT][constants.PROP_URL]
+                    # We get the first license we find from the repo
+                    elif l[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_FILE_EXPLORATION \
+                            and constants.PROP_SOURCE in l.keys() and "api.github.com" in \
+                            license_result.get(constants.PROP_URL, ""):
+                        license_result[constants.PROP_URL] = l[constants.PROP_SOURCE]
+                out["license"] = license_result
+                # Codemeta mixes the name of the license from github API with the URL of the file (if found)
+                codemeta["license"] = {k: v for k, v in license_result.items()
+                                       if k in [constants.PROP_NAME, constants.PROP_URL]}
+            elif key in [constants.CAT_DOWNLOAD, constants.CAT_USAGE, constants.CAT_INSTALLATION]:
+                # if there are multiple excerpts in separate sub-headers we concatenate them
+                aggregated_value = ""
+                other_results = []
+                for result in value:
+                    if result[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_HEADER_ANALYSIS:
+                        # Note: this could be improved by adding as many '#' as parent headers
+                        aggregated_value += "##" + result[constants.PROP_RESULT][constants.PROP_ORIGINAL_HEADER] + "\n"
+                        aggregated_value += result[constants.PROP_RESULT][constants.PROP_VALUE]
+                    else:
+                        other_results.append(result[constants.PROP_RESULT][constants.PROP_VALUE])
+                    if key == constants.CAT_INSTALLATION:
+                        if result[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_HEADER_ANALYSIS and \
+                                constants.PROP_SOURCE in result.keys():
+                            install_links.append(result[constants.PROP_SOURCE])
+                        elif result[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_FILE_EXPLORATION:
+                            install_links.append(result[constants.PROP_RESULT][constants.PROP_VALUE])
+                # if there are file dumps like install.md, they are separate values for the property
+                other_results.append(aggregated_value)
+                out[key] = other_results
+            elif key == constants.CAT_CITATION:
+                # from each publication, we take its DOI or URL (if available from the previous extraction)
+                # Note: This is a point of improvement to have a proper Publication object.
+                citation_urls = []
+                codemeta_citations = []
+                for cite in value:
+                    result = cite[constants.PROP_RESULT]
+                    if constants.PROP_DOI in result.keys():
+                        citation_urls.append(result[constants.PROP_DOI])
+                        codemeta_citations.append(result[constants.PROP_DOI])
+                    elif constants.PROP_URL in result.keys():
+                        citation_urls.append(result[constants.PROP_URL])
+                    if constants.PROP_DOI not in result.keys() and constants.PROP_FORMAT in result.keys() \
+                            and result[constants.PROP_FORMAT] == constants.FORMAT_CFF:
+                        codemeta_citations.append(cite[constants.PROP_SOURCE])
+                if len(citation_urls) > 0:
+                    # remove duplicates
+                    citation_urls = list(set(citation_urls))
+                    out[key] = citation_urls
+                codemeta["citation"] = codemeta_citations
+            elif key == constants.CAT_DOCUMENTATION:
+                # we only keep links
+                doc_links = [obj[constants.PROP_RESULT][constants.PROP_VALUE] for obj in value if
+                             obj[constants.PROP_RESULT][constants.PROP_TYPE] == constants.URL]
+                if len(doc_links) > 0:
+                    out[key] = doc_links
+                for inst in value:
+                    if inst[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_HEADER_ANALYSIS and \
+                            constants.PROP_SOURCE in inst.keys():
+                        install_links.append(inst[constants.PROP_SOURCE])
+                    elif inst[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_FILE_EXPLORATION or \
+                            inst[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_REGULAR_EXPRESSION:
+                        install_links.append(inst[constants.PROP_RESULT][constants.PROP_VALUE])
+            elif key == constants.CAT_OWNER:
+                out[key] = value[0][constants.PROP_RESULT]
+                # if user then person, otherwise organization
+                type_aux = value[0][constants.PROP_RESULT][constants.PROP_TYPE]
+                if type_aux == "User":
+                    type_aux = "Person"
+                codemeta["author"] = [
+                    {
+                        "@type": type_aux,
+                        "@id": "https://github.com/" + value[0][constants.PROP_RESULT][constants.PROP_VALUE]
+                    }
+                ]
+            elif key == constants.CAT_RELEASES:
+                # we keep the full object
+                out[key] = [obj[constants.PROP_RESULT] for obj in value]
+                # we add a special property (hack) for making the mapping work
+                out[constants.AUX_RELEASES_IDS] = [obj[constants.PROP_RESULT][constants.PROP_RELEASE_ID] for obj in
+                                                   value]
+            else:
+                try:
+                    if len(value) == 1:
+                        # remove list for easing mapping
+                        out[key] = value[0][constants.PROP_RESULT][constants.PROP_VALUE]
+                    else:
+                        out[key] = [obj[constants.PROP_RESULT][constants.PROP_VALUE] for obj in value]
+                except:
+                    logging.warning("Error when converting field in RDF: " + key)
+                self.reconcile_codemeta_value(key, value, codemeta)
+        if len(install_links) > 0:
+            # remove duplicates and generate codemeta
+            codemeta["buildInstructions"] = list(set(install_links))
+        self.graph_data = out
+        # now, prune out the variables that are None
+        self.codemeta = {}
+        for key in CODEMETA_PROPERTIES:
+            value = codemeta.get(key)
+            if not (value is None or ((isinstance(value, list) or isinstance(value, tuple)) and len(value) == 0)):
+                self.codemeta[key] = value
+
+    @staticmethod
+    def reconcile_codemeta_value(key, value, codemeta):
+        """
+        Adds the Codemeta property (if any) of a category with one or more values
+        Parameters
+        ----------
+        @param key: category
+        @param value: results of the category
+        @param codemeta: Codemeta document being created
+
+        Returns
+        -------
+        @return: Does not return a value
+        """
+        first_value = value[0][constants.PROP_RESULT].get(constants.PROP_VALUE)
+        if key == constants.CAT_CODE_REPOSITORY:
+            codemeta["codeRepository"] = first_value
+            codemeta["issueTracker"] = first_value + "/issues"
+        elif key == constants.CAT_DATE_CREATED:
+            codemeta["dateCreated"] = format_date(first_value)
+        elif key == constants.CAT_DATE_UPDATED:
+            codemeta["dateModified"] = format_date(first_value)
+        elif key == constants.CAT_DOWNLOAD_URL:
+            codemeta["downloadUrl"] = first_value
+        elif key == constants.CAT_NAME:
+            codemeta["name"] = first_value
+        elif key == constants.CAT_LOGO:
+            codemeta["logo"] = first_value
+        elif key == constants.CAT_KEYWORDS:
+            codemeta["keywords"] = first_value
+        elif key == constants.CAT_PROGRAMMING_LANGUAGES:
+            codemeta["programmingLanguage"] = [x[constants.PROP_RESULT][constants.PROP_VALUE] for x in value]
+        elif key == constants.CAT_REQUIREMENTS:
+            codemeta["softwareRequirements"] = [x[constants.PROP_RESULT][constants.PROP_VALUE] for x in value]
+        elif key == constants.CAT_IDENTIFIER:
+            codemeta["identifier"] = first_value
+        elif key == constants.CAT_README_URL:
+            codemeta["readme"] = first_value
+        elif key == constants.CAT_DESCRIPTION:
+            # descriptions from the GitHub API first, then by confidence
+            descriptions = sorted(value, key=lambda x: (x[constants.PROP_CONFIDENCE] + (
+                1 if x[constants.PROP_TECHNIQUE] == constants.GITHUB_API else 0)), reverse=True)
+            codemeta["description"] = [x[constants.PROP_RESULT][constants.PROP_VALUE] for x in descriptions]
+
+
+def format_date(date_string):
+    """Formats a date as YYYY-MM-DD for Codemeta"""
+    try:
+        return date_parser.parse(date_string).strftime("%Y-%m-%d")
+    except (ValueError, TypeError, OverflowError):
+        logging.warning("Could not parse date: " + str(date_string))
+        return None
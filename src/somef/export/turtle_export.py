@@ -1,19 +1,55 @@
 import datetime
+import gzip
 import json
 import logging
 import os
 import tempfile
-from pathlib import Path
 
-import morph_kgc
-from rdflib import Graph
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDF
 
+from . import rdf_mapping
+from .reconciliation import ReconciledResults
 from ..utils import constants
 
 
+# formats in which the triples of each repository can be written as soon as they are produced
+STREAMING_FORMATS = ["nt", "nquads"]
+SOFTWARE_CLASS = URIRef("https://w3id.org/okn/o/sd#Software")
+
+
+def open_graph_file(path):
+    """Opens a file to write an RDF serialization, compressing it with gzip if the path ends with .gz"""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "wb")
+    return open(path, "wb")
+
+
 class DataGraph:
-    def __init__(self):
+    def __init__(self, stream_path=None, stream_format="nt", use_rml_engine=False):
+        """
+        Graph with the results of one or more repositories.
+        Parameters
+        ----------
+        @param stream_path: if given, the triples of each repository are written to this file (N-Triples or N-Quads,
+        gzipped if the path ends with .gz) instead of being kept in memory
+        @param stream_format: format of the stream (nt, or nquads to use one named graph per repository)
+        @param use_rml_engine: flag to materialize the mapping with morph-kgc instead of applying it directly
+        """
         self.g = Graph()
+        self.stream = None
+        self.stream_format = stream_format
+        self.use_rml_engine = use_rml_engine
+        if not use_rml_engine:
+            try:
+                rdf_mapping.load_mapping(constants.mapping_path)
+            except ValueError as e:
+                logging.warning("The mapping cannot be applied directly, using the RML engine: " + str(e))
+                self.use_rml_engine = True
+        if stream_path is not None:
+            if stream_format not in STREAMING_FORMATS:
+                raise ValueError("Streaming is only available for the formats " + ", ".join(STREAMING_FORMATS))
+            self.stream = open_graph_file(stream_path)
 
     def somef_data_to_graph(self, somef_data):
         """
@@ -21,33 +57,93 @@ class DataGraph:
         This method does some operations in order to improve the quality of the final graph.
         Parameters
         ----------
-        @param somef_data: JSON to transform into RDF
+        @param somef_data: JSON to transform into RDF (or its ReconciledResults)
+
+        Returns
+        -------
+        @returns: No value
+        """
+        data = self.prepare_somef_data(somef_data)
+        if data is None:
+            return
+        if self.use_rml_engine:
+            self.add_graph(self.apply_mapping_data(constants.mapping_path, data))
+        # the mapping is applied directly to the reconciled data (same triples as apply_mapping, without temp files).
+        # Triples are added to the graph in place, so exporting many repositories does not copy the graph each time
+        elif self.stream is None:
+            rdf_mapping.materialize(constants.mapping_path, data, self.g)
+        else:
+            self.write_to_stream(rdf_mapping.materialize(constants.mapping_path, data))
+
+    def somef_data_list_to_graph(self, somef_data_list):
+        """
+        Method that transforms the results of several repositories into RDF.
+        Each repository is mapped separately: the compiled mapping (see rdf_mapping.materialize) does not start the
+        RML engine for each repository, so repositories are not materialized at once with the RML engine (which
+        loses the triples of nested objects with fewer fields than in other repositories).
+        Parameters
+        ----------
+        @param somef_data_list: list of Result.results or ReconciledResults (one per repository) to transform into RDF
 
         Returns
         -------
         @returns: No value
         """
+        for somef_data in somef_data_list:
+            self.somef_data_to_graph(somef_data)
+
+    def prepare_somef_data(self, somef_data):
+        """
+        Method that reconciles the results of a repository and adds the fields needed by the mapping
+        Parameters
+        ----------
+        @param somef_data: JSON to transform into RDF, or its ReconciledResults
+
+        Returns
+        -------
+        @returns the reconciled data, or None if no fields were found
+        """
         current_date = datetime.datetime.now()
-        data = self.reconcile_somef_data(somef_data)
+        if isinstance(somef_data, ReconciledResults):
+            data = somef_data.graph_data
+        else:
+            data = self.reconcile_somef_data(somef_data)
         if len(data.keys()) == 0:
             logging.warning("No fields were found in file")
-            return
+            return None
         if constants.CAT_NAME not in data.keys():
             data['name'] = 'Software' + current_date.strftime("%Y%m%d%H%M%S")
         if constants.CAT_FULL_NAME not in data.keys():
             data['fullName'] = data['name']
-        # save JSON in temp file
-        temp_file = "tmp"+current_date.strftime("%Y%m%d%H%M%S")+".json"
-        with open(temp_file, 'w') as output:
-            json.dump(data, output)
-        result_graph = self.apply_mapping(constants.mapping_path, output.name)
-        self.g += self.g + result_graph
-        os.remove(output.name)
-        # temp_file = tempfile.NamedTemporaryFile()
-        # with open(temp_file.name, 'w') as output:
-        #     json.dump(data, output)
-        # result_graph = self.apply_mapping(constants.mapping_path, output.name)
-        # self.g += self.g + result_graph
+        return data
+
+    def add_graph(self, graph):
+        """Adds the triples of a graph to the DataGraph (or to its stream)"""
+        if self.stream is None:
+            self.g += graph
+        else:
+            self.write_to_stream(graph)
+
+    def write_to_stream(self, repository_graph):
+        """
+        Writes the triples of a repository to the stream. In N-Quads, the graph name is the IRI of the software
+        Parameters
+        ----------
+        @param repository_graph: graph with the triples of the repository
+
+        Returns
+        -------
+        @returns no value
+        """
+        if len(repository_graph) == 0:
+            return
+        triples = repository_graph.serialize(format="nt").encode("UTF-8")
+        software = repository_graph.value(predicate=RDF.type, object=SOFTWARE_CLASS)
+        if self.stream_format == "nquads" and software is not None:
+            graph_name = b" " + software.n3().encode("UTF-8") + b" .\n"
+            triples = b"".join(line[:-3] + graph_name for line in triples.splitlines(keepends=True)
+                               if line.endswith(b" .\n"))
+        self.stream.write(triples)
 
     @staticmethod
     def reconcile_somef_data(data):
@@ -64,94 +160,14 @@ class DataGraph:
         @return a clean JSON output removing confidence and provenance information to transform
 
         """
-        out = {}
-        for key, value in data.items():
-            # for now, we are not exporting provenance keys. Ignore all keys like somef_provenance
-            if "somef" not in key:
-                # if the value is a list, preserve the list
-                if isinstance(value, list) or isinstance(value, tuple):
-                    if len(value) > 0:
-                        if key == constants.CAT_LICENSE:
-                            # Create a License object with its id, URL, name and sameAs spdx identifier URL.
-                            # We don't keep the license content, as in a KG it may be too many file text
-                            license_result = {}
-                            for l in data[key]:
-                                if constants.PROP_SPDX_ID in l[constants.PROP_RESULT].keys():
-                                    license_result[constants.PROP_SPDX_ID] = l[constants.PROP_RESULT][
-                                        constants.PROP_SPDX_ID]
-                                if constants.PROP_NAME in l[constants.PROP_RESULT].keys():
-                                    license_result[constants.PROP_NAME] = l[constants.PROP_RESULT][constants.PROP_NAME]
-                                if constants.PROP_URL not in license_result.keys() and constants.PROP_URL in \
-                                        l[constants.PROP_RESULT].keys():
-                                    license_result[constants.PROP_URL] = l[constants.PROP_RESULT][constants.PROP_URL]
-                                # We get the first license we find from the repo
-                                elif l[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_FILE_EXPLORATION \
-                                        and constants.PROP_SOURCE in l.keys() and "api.github.com" in \
-                                        license_result[constants.PROP_URL]:
-                                    license_result[constants.PROP_URL] = l[constants.PROP_SOURCE]
-                            out["license"] = license_result
-                        elif key in [constants.CAT_DOWNLOAD, constants.CAT_USAGE, constants.CAT_INSTALLATION]:
-                            # if there are multiple excerpts in separate sub-headers we concatenate them
-                            aggregated_value = ""
-                            other_results = []
-                            for result in data[key]:
-                                if result[constants.PROP_TECHNIQUE] == constants.TECHNIQUE_HEADER_ANALYSIS:
-                                    # Note: this could be improved by adding as many '#' as parent headers
-                                    aggregated_value += "##" + result[constants.PROP_RESULT][
-                                        constants.PROP_ORIGINAL_HEADER] + "\n"
-                                    aggregated_value += result[constants.PROP_RESULT][constants.PROP_VALUE]
-                                else:
-                                    other_results.append(result[constants.PROP_RESULT][constants.PROP_VALUE])
-                            # if there are file dumps like install.md, they are separate values for the property
-                            other_results.append(aggregated_value)
-                            out[key] = other_results
-
-                        elif key == constants.CAT_CITATION:
-                            # from each publication, we take its DOI or URL (if available from the previous extraction)
-                            # Note: This is a point of improvement to have a proper Publication object.
-                            citation_urls = []
-                            for cite in data[key]:
-                                result = cite[constants.PROP_RESULT]
-                                if constants.PROP_DOI in result.keys():
-                                    citation_urls.append(result[constants.PROP_DOI])
-                                elif constants.PROP_URL in result.keys():
-                                    citation_urls.append(result[constants.PROP_URL])
-                            if len(citation_urls) > 0:
-                                # remove duplicates
-                                citation_urls = list(set(citation_urls))
-                                out[key] = citation_urls
-                        elif key == constants.CAT_DOCUMENTATION:
-                            # we only keep links
-                            doc_links = [obj[constants.PROP_RESULT][constants.PROP_VALUE] for obj in value if
-                                         obj[constants.PROP_RESULT][constants.PROP_TYPE] == constants.URL]
-                            if len(doc_links) > 0:
-                                out[key] = doc_links
-                        elif key == constants.CAT_OWNER:
-                            out[key] = value[0][constants.PROP_RESULT]
-                        elif key == constants.CAT_RELEASES:
-                            # we keep the full object
-                            out[key] = [obj[constants.PROP_RESULT] for obj in value]
-                            # we add a special property (hack) for making the mapping work
-                            out[constants.AUX_RELEASES_IDS] = [obj[constants.PROP_RESULT][constants.PROP_RELEASE_ID] for obj in value]
-                        else:
-                            try:
-                                if len(value) == 1:
-                                    # remove list for easing mapping
-                                    out[key] = value[0][constants.PROP_RESULT][constants.PROP_VALUE]
-                                else:
-                                    out[key] = [obj[constants.PROP_RESULT][constants.PROP_VALUE] for obj in value]
-                            except:
-                                logging.warning("Error when converting field in RDF: " + key)
-                # if it is not a list, just get the excerpt
-                else:
-                    out[key] = value[constants.PROP_RESULT][constants.PROP_VALUE]
-        print(out)
-        return out
+        return ReconciledResults(data).graph_data
 
     @staticmethod
     def apply_mapping(mapping_path, data_path) -> Graph:
         """
-        Given a mapping file and a data file, this method returns the MORPH-KGC materialization for the mapping
+        Given a mapping file and a data file, this method returns the MORPH-KGC materialization for the mapping.
+        somef_data_to_graph uses rdf_mapping.materialize instead, which produces the same triples without starting
+        the RML engine for each repository.
         Parameters
         ----------
         @param mapping_path: file path of the mapping
@@ -161,27 +177,63 @@ class DataGraph:
         -------
         An RDF graph with the desired triples
         """
+        import morph_kgc
         # mini test for morph-kgc
         config = constants.MAPPING_CONFIG
         # TO DO: Change RML URIs if they have been changed in the configuration.
         config = config.replace("$PATH", mapping_path).replace("$DATA", data_path)
         return morph_kgc.materialize(config)
 
+    @staticmethod
+    def apply_mapping_data(mapping_path, data) -> Graph:
+        """
+        Materializes the mapping with MORPH-KGC for the reconciled data of a repository, saved in a temporary JSON file
+        Parameters
+        ----------
+        @param mapping_path: file path of the mapping
+        @param data: reconciled data of the repository
+
+        Returns
+        -------
+        An RDF graph with the triples of the repository
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_path = os.path.join(temp_dir, "data.json")
+            with open(data_path, "w", encoding="utf-8") as output:
+                json.dump(data, output)
+            return DataGraph.apply_mapping(mapping_path, data_path)
+
     def export_to_file(self, path, graph_format):
         """
-        Function to save the RDF graph in a file
+        Function to save the RDF graph in a file. If the graph is being streamed, the stream is closed instead, as its
+        triples have already been written.
         Parameters
         ----------
-        @param path: output path where to save the file
-        @param graph_format: format of the serialization (TTL, JSON-LD)
+        @param path: output path where to save the file (gzipped if it ends with .gz)
+        @param graph_format: format of the serialization (TTL, JSON-LD, NT, NQUADS)
 
         Returns
         -------
         @returns no value
         """
+        if self.stream is not None:
+            self.close()
+            return
         try:
             logging.info("Saving RDF data to " + str(path))
-            with open(path, "wb") as out_file:
+            with open_graph_file(path) as out_file:
                 out_file.write(self.g.serialize(format=graph_format, encoding="UTF-8"))
         except Exception as e:
             logging.error("Error while saving RDF results "+str(e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the stream of the graph, if any (the triples written so far are kept in the file)"""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
@@ -1,11 +1,83 @@
+import codecs
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 from rdflib import Graph
-from rdflib.plugins.sparql import prepareQuery
+from rdflib.namespace import OWL, RDF
 
+from .utils import constants
 
-def is_file_ontology(file_path):
+# processes where candidate ontologies are parsed, shared by all the repositories analyzed (see detect_ontologies)
+ontology_pool = None
+ontology_pool_lock = threading.Lock()
+
+
+class OntologyFound(Exception):
+    """Raised by OntologySink to stop parsing a file once its ontology has been found"""
+
+    def __init__(self, uri):
+        super().__init__(uri)
+        self.uri = uri
+
+
+class OntologySink(Graph):
     """
-    Method that, given a file, returns its URI.
-    This method is in a separate file in case we want to extract additional metadata if required
+    Graph that receives the triples of a file as they are parsed without storing them, and stops the parsing at the
+    first ontology declaration (?onto a owl:Ontology). Triples added to its store directly by a parser are kept
+    """
+
+    def add(self, triple):
+        if triple[1] == RDF.type and triple[2] == OWL.Ontology:
+            raise OntologyFound(triple[0])
+        return self
+
+    def addN(self, quads):
+        for subject, predicate, rdf_object, context in quads:
+            self.add((subject, predicate, rdf_object))
+        return self
+
+
+def may_be_ontology(file_path, chunk_size=constants.ONTOLOGY_PREFILTER_CHUNK):
+    """
+    Checks if a file may declare an ontology, scanning its bytes for the "Ontology" token (of owl:Ontology,
+    owl#Ontology, or owl:Ontology with any other prefix). The scan stops at the first match, so it is much faster than
+    parsing the file
+    Parameters
+    ----------
+    @param file_path: path of the candidate ontology
+    @param chunk_size: bytes read at once
+
+    Returns
+    -------
+    @return: False if the file cannot be an ontology
+    """
+    token = b"Ontology"
+    try:
+        with open(file_path, "rb") as candidate:
+            previous = b""
+            chunk = candidate.read(chunk_size)
+            if chunk.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+                # the token is not encoded as in UTF-8, so the file is parsed
+                return True
+            while chunk:
+                # the end of the previous chunk is kept, in case the token is split between chunks
+                if token in previous + chunk:
+                    return True
+                previous = chunk[-(len(token) - 1):]
+                chunk = candidate.read(chunk_size)
+    except OSError:
+        return False
+    return False
+
+
+def parse_ontology(file_path):
+    """
+    Parses a file and returns the URI of the ontology it declares. Unlike is_file_ontology, the file is parsed
+    without checking first if it may declare an ontology (see may_be_ontology)
     Parameters
     ----------
     @param file_path: path of the candidate ontology
@@ -14,21 +86,111 @@ def is_file_ontology(file_path):
     -------
     @return: The URI of the target ontology (if there is one)
     """
-    # load in rdf lib
     try:
-        g = Graph()
-        g.parse(file_path)
-        q1 = prepareQuery('''
-          SELECT ?onto
-          WHERE { 
-            ?onto a <http://www.w3.org/2002/07/owl#Ontology>. 
-          }
-          ''')
+        # the triples are checked as they are parsed, stopping at the ontology declaration
+        sink = OntologySink()
+        sink.parse(file_path)
+        # some parsers (e.g., JSON-LD) add the triples to the store of the graph directly
+        for onto in sink.subjects(RDF.type, OWL.Ontology):
+            return onto
+    except OntologyFound as found:
         # TO DO: extract title, preferred ns.
         # there should be only one ontology per file
-        for r in g.query(q1):
-            # print("Found that %s is an ontology" % file_path)
-            return r.onto
+        return found.uri
     except Exception:
         # If the candidate file could not be read, pass
         pass
+    return None
+
+
+def is_file_ontology(file_path):
+    """
+    Method that, given a file, returns its URI.
+    This method is in a separate file in case we want to extract additional metadata if required
+    Parameters
+    ----------
+    @param file_path: path of the candidate ontology
+
+    Returns
+    -------
+    @return: The URI of the target ontology (if there is one)
+    """
+    if not may_be_ontology(file_path):
+        return None
+    return parse_ontology(file_path)
+
+
+def get_ontology_pool():
+    """Returns the process pool where ontologies are parsed, creating it the first time"""
+    global ontology_pool
+    with ontology_pool_lock:
+        if ontology_pool is None:
+            # processes are spawned, as forking a process with threads (e.g., describe_many, serve) is not safe
+            ontology_pool = ProcessPoolExecutor(max_workers=constants.ONTOLOGY_WORKERS,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return ontology_pool
+
+
+def reset_ontology_pool():
+    """Discards the process pool (e.g., after a process died parsing a file), so a new one is created"""
+    global ontology_pool
+    with ontology_pool_lock:
+        if ontology_pool is not None:
+            ontology_pool.shutdown(wait=False, cancel_futures=True)
+        ontology_pool = None
+
+
+def detect_ontologies(file_paths, max_size=constants.ONTOLOGY_MAX_FILE_SIZE,
+                      min_pool_files=constants.ONTOLOGY_POOL_MIN_FILES):
+    """
+    Checks which files are ontologies (see is_file_ontology). The files that may declare an ontology (see
+    may_be_ontology) are checked once, and then parsed (see parse_ontology). If there are many, they are parsed at once
+    in a process pool
+    Parameters
+    ----------
+    @param file_paths: paths of the candidate ontologies
+    @param max_size: files bigger than this (in bytes) are not parsed, and are not considered ontologies (no limit if
+    None)
+    @param min_pool_files: minimum number of files to parse them in the process pool. Fewer files are parsed in this
+    process, as starting the pool takes longer than parsing them
+
+    Returns
+    -------
+    @return: list with the URI of the ontology of each file (None if the file is not an ontology)
+    """
+    uris = [None] * len(file_paths)
+    candidates = []
+    for index, file_path in enumerate(file_paths):
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            continue
+        if max_size is not None and size > max_size:
+            logging.info(f"Skipping {file_path} ({size} bytes): it is bigger than the maximum size of an ontology")
+        elif may_be_ontology(file_path):
+            # only the files that may declare an ontology are parsed
+            candidates.append(index)
+    if len(candidates) < min_pool_files:
+        for index in candidates:
+            uris[index] = parse_ontology(file_paths[index])
+        return uris
+    pending = set(candidates)
+    try:
+        pool = get_ontology_pool()
+        futures = {index: pool.submit(parse_ontology, file_paths[index]) for index in candidates}
+        for index, future in futures.items():
+            try:
+                uris[index] = future.result()
+                pending.discard(index)
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                logging.error("Error while parsing " + file_paths[index] + " in the process pool: " + str(e))
+    except BrokenProcessPool:
+        logging.error("The processes parsing ontologies stopped, the remaining files are parsed in this process")
+        reset_ontology_pool()
+    # the files without a result are parsed again, so they are not taken as files without an ontology (e.g., when
+    # their results are cached)
+    for index in sorted(pending):
+        uris[index] = parse_ontology(file_paths[index])
+    return uris
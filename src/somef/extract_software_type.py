@@ -5,18 +5,22 @@ from chardet import detect
 import re
 from .extract_workflows import is_file_workflow
 from .process_results import Result
-from .utils import constants
-from .extract_ontologies import is_file_ontology
+from .utils import constants, regexp
+from .extract_ontologies import detect_ontologies
+from .analysis_cache import check_file, check_files
+from .repository_walk import walk_repository
 import pdb
 
 
 
 
-def check_repository_type(path_repo,title,metadata_result:Result):
+def check_repository_type(path_repo,title,metadata_result:Result,cache=None,walk_options=None):
     """ Function that adds the metadata result in the JSON 
-        output depending on the software type or if the repository is not considered software"""
+        output depending on the software type or if the repository is not considered software.
+        The cache (AnalysisCache) keeps the ontology and workflow checks of each file, and walk_options
+        (WalkOptions) are the folders skipped and the budget of the walks of the repository"""
     
-    if check_static_websites(path_repo,metadata_result):
+    if check_static_websites(path_repo,metadata_result,walk_options):
         metadata_result.add_result(constants.CAT_TYPE,
                                     {
                                         constants.PROP_VALUE: 'static-website',
@@ -24,7 +28,7 @@ def check_repository_type(path_repo,title,metadata_result:Result):
                                     },
                                     1,
                                     constants.TECHNIQUE_HEURISTICS)
-    elif check_ontologies(path_repo):
+    elif check_ontologies(path_repo,cache,walk_options):
         metadata_result.add_result(constants.CAT_TYPE,
                                     {
                                         constants.PROP_VALUE: 'ontology',
@@ -32,7 +36,7 @@ def check_repository_type(path_repo,title,metadata_result:Result):
                                     },
                                     1,
                                     constants.TECHNIQUE_HEURISTICS)
-    elif check_notebooks(path_repo):
+    elif check_notebooks(path_repo,walk_options):
         metadata_result.add_result(constants.CAT_TYPE,
                                     {
                                         constants.PROP_VALUE: 'notebook-application',
@@ -40,7 +44,7 @@ def check_repository_type(path_repo,title,metadata_result:Result):
                                     },
                                     1,
                                     constants.TECHNIQUE_HEURISTICS)
-    elif check_workflow(path_repo,title):
+    elif check_workflow(path_repo,title,cache,walk_options):
         metadata_result.add_result(constants.CAT_TYPE,
                                     {
                                         constants.PROP_VALUE: 'workflow',
@@ -48,7 +52,7 @@ def check_repository_type(path_repo,title,metadata_result:Result):
                                     },
                                     1,
                                     constants.TECHNIQUE_HEURISTICS)
-    elif check_command_line(path_repo):
+    elif check_command_line(path_repo,walk_options):
         """The 0.82 confidence result is from running the analysis on 300 repos and showing the precision 
             of the heuristic"""
         metadata_result.add_result(constants.CAT_TYPE,
@@ -59,7 +63,7 @@ def check_repository_type(path_repo,title,metadata_result:Result):
                                     0.82,
                                     constants.TECHNIQUE_HEURISTICS)
 
-    elif check_extras(path_repo):
+    elif check_extras(path_repo,walk_options):
         metadata_result.add_result(constants.CAT_TYPE,
                                     {
                                         constants.PROP_VALUE: 'non-software',
@@ -70,7 +74,7 @@ def check_repository_type(path_repo,title,metadata_result:Result):
     return metadata_result
 
 
-def check_notebooks(path_repo):
+def check_notebooks(path_repo,walk_options=None):
     """Function which checks if the specified repository is a Notebook Application
        depending on the extensions present and number of notebooks which contain code
 
@@ -80,7 +84,7 @@ def check_notebooks(path_repo):
     total_files=0
 
     bad_extensions=False
-    for root, dirs, files in os.walk(path_repo):
+    for root, dirs, files in walk_repository(path_repo,walk_options):
         for file in files:
             if file.endswith((".ipynb", ".rmd",'.Rmd')):
                 notebook_path = os.path.join(root, file)
@@ -100,29 +104,32 @@ def check_notebooks(path_repo):
         return (not bad_extensions)
 
 
-def check_ontologies(path_repo):
+def check_ontologies(path_repo,cache=None,walk_options=None):
     """Function which detects if repository is an Ontology based on files present
        and the non-existence of code files"""
-    ontology=False
-    for root, dirs, files in os.walk(path_repo):
+    candidates=[]
+    for root, dirs, files in walk_repository(path_repo,walk_options):
         repo_relative_path = os.path.relpath(root, path_repo)
         for file in files:
             file_path = os.path.join(repo_relative_path, file)
-            #print(os.path.join(repo_relative_path,file_path))
             if file.endswith(constants.code_extensions):
                 return False
             elif file.endswith(constants.ontology_extensions):
-                if not ontology:
-                    ontology=is_file_ontology(os.path.join(path_repo,file_path))
-    return ontology
+                candidates.append(file_path)
+    if candidates==[]:
+        return False
+    # candidates are parsed in batches (in parallel), stopping at the batch with the first ontology
+    for start in range(0,len(candidates),constants.ONTOLOGY_BATCH_SIZE):
+        batch=candidates[start:start+constants.ONTOLOGY_BATCH_SIZE]
+        for uri in check_files(cache,constants.CACHE_ONTOLOGY,path_repo,batch,detect_ontologies):
+            if uri is not None:
+                return uri
+    return None
 
-def check_command_line(path_repo):
+def check_command_line(path_repo,walk_options=None):
     """Function which detects if repository is a Commandline Application
        based on README analysis of commandline arguments and implementations"""
-    pattern_commandline= r"(?i)command[-\s]?line"
-    pattern_cmd_arg = r"(?i)(explanation\s+of\s+)?arguments\b"
-    pattern_cmd_arg2 = r"(?i)-\w+:"
-    for dir_path, dir_names, filenames in os.walk(path_repo):
+    for dir_path, dir_names, filenames in walk_repository(path_repo,walk_options):
         repo_relative_path = os.path.relpath(dir_path, path_repo)
         for filename in filenames:
             file_path = os.path.join(repo_relative_path, filename)
@@ -134,9 +141,9 @@ def check_command_line(path_repo):
                         with open(os.path.join(dir_path, filename), "r", encoding="utf-8") as data_file:
                             data_file_text = data_file.read()
                             try:
-                                cmd_match2=re.search(pattern_commandline,data_file_text)
-                                cmd_match3=re.search(pattern_cmd_arg,data_file_text)
-                                cmd_match4=re.search(pattern_cmd_arg2,data_file_text)
+                                cmd_match2=regexp.REGEXP_COMMAND_LINE.search(data_file_text)
+                                cmd_match3=regexp.REGEXP_COMMAND_LINE_ARGUMENTS.search(data_file_text)
+                                cmd_match4=regexp.REGEXP_COMMAND_LINE_FLAG.search(data_file_text)
                                 if cmd_match2 or (cmd_match3 and cmd_match4):
                                     return True
                             except:
@@ -148,10 +155,10 @@ def check_command_line(path_repo):
 
 
 
-def check_extras(path_repo):
+def check_extras(path_repo,walk_options=None):
     """Function which detects if a repository is non-software by checking against
        software related files"""
-    for root, dirs, files in os.walk(path_repo):
+    for root, dirs, files in walk_repository(path_repo,walk_options):
         for file in files:
             notebook_path = os.path.join(root, file)
             if file.endswith(constants.code_extensions) or file.endswith(constants.ontology_extensions):
@@ -165,7 +172,7 @@ def check_extras(path_repo):
     return True
 
 
-def check_static_websites(path_repo,repo_metadata:Result):
+def check_static_websites(path_repo,repo_metadata:Result,walk_options=None):
     """Function that analyzes byte size of js,css,html languages and checks if 
        repository contains files not associated with static websites
 
@@ -180,7 +187,7 @@ def check_static_websites(path_repo,repo_metadata:Result):
     js_size=0
     css_size=0
     html_file=0
-    for root, dirs, files in os.walk(path_repo):
+    for root, dirs, files in walk_repository(path_repo,walk_options):
         for file in files:
             file_path = os.path.join(root, file)
             if file.endswith(constants.code_extensions) or file.endswith(constants.ontology_extensions) or file.lower() in (('bower.json','package.json')):
@@ -222,18 +229,20 @@ def check_static_websites(path_repo,repo_metadata:Result):
 
 
 
-def check_workflow(repo_path,title):
+def check_workflow(repo_path,title,cache=None,walk_options=None):
     """Function which checks inside text for presence of repository being a workflow and analysis of the 
        files inside to check if they are correct workflow files. Also checks for repositories with no information
        the name of the files which might point to it being a workflow.
        PARAMETERS:
        @repo_path(path to the repository directory)
        @title(title of the repository)
+       @cache(AnalysisCache with the workflow checks of previous analyses)
+       @walk_options(WalkOptions with the folders skipped and the budget of the walk)
      """
     list=[]
     total_workflows=0
     good_workflows=0
-    for root, dirs, files in os.walk(repo_path):
+    for root, dirs, files in walk_repository(repo_path,walk_options):
         repo_relative_path = os.path.relpath(root, repo_path)
         for file in files:
             file_path = os.path.join(repo_relative_path, file)
@@ -249,15 +258,13 @@ def check_workflow(repo_path,title):
 
                             pattern = r'([^.?!]*(?:\b|\W){}(?:\b|\W)[^.?!]*[.?!])'.format('|'.join(map(re.escape, title_words)))
                             sentences = re.findall(pattern, readme_contents, flags=re.IGNORECASE)
+                            title_pattern = re.compile(rf'\b{title}\b', flags=re.IGNORECASE)
                             for sentence in sentences:
-                                if re.search(rf'\b{title}\b', sentence, flags=re.IGNORECASE) and re.search(r'\b(pipeline|workflow)\b', sentence, flags=re.IGNORECASE):
+                                if title_pattern.search(sentence) and regexp.REGEXP_PIPELINE_WORKFLOW.search(sentence):
                                     return True
 
-                            pattern_md=r'##.*\b(workflow|pipeline)\b'
-                            pattern_rst=r'^([^=\n]+(?:\n(?![-=]).*)*\b(workflow|pipeline)\b(?:\n(?![-=]).*)*)\n=+'
-                            
-                            match_md=re.findall(pattern_md,readme_contents,re.IGNORECASE)
-                            match_rst=re.findall(pattern_rst,readme_contents, re.MULTILINE | re.IGNORECASE)
+                            match_md=regexp.REGEXP_WORKFLOW_HEADER_MD.findall(readme_contents)
+                            match_rst=regexp.REGEXP_WORKFLOW_HEADER_RST.findall(readme_contents)
                             
                             if match_md or match_rst:
                                 return True
@@ -267,8 +274,8 @@ def check_workflow(repo_path,title):
 
             if file.endswith(constants.workflow_extensions) or file =="Snakefile":
                 total_workflows+=1
-                file_path = os.path.join(root, file)
-                if is_file_workflow(file_path):
+                if check_file(cache,constants.CACHE_WORKFLOW,repo_path,os.path.join(repo_relative_path,file),is_file_workflow):
+                    file_path = os.path.join(root, file)
                     list.append(file_path)
                     good_workflows+=1
                 else:
@@ -282,8 +289,8 @@ def check_workflow(repo_path,title):
 
 def check_name(filename):
     """Assisting function for check_workflow to look for specific named files"""
-    pattern1 = re.compile(r"pipeline", re.IGNORECASE)
-    pattern2=re.compile(r"(model|example)",re.IGNORECASE)
+    pattern1 = regexp.REGEXP_PIPELINE_NAME
+    pattern2 = regexp.REGEXP_MODEL_EXAMPLE_NAME
     programming_language_extensions = (".py", ".java", ".cpp", ".c", ".php", ".rb", ".js", ".html", ".css", ".go", ".swift", ".scala", ".pl",".ipynb")
     if pattern1.search(filename) and pattern2.search(filename):
         if filename.endswith(programming_language_extensions):
@@ -1,19 +1,14 @@
-import re
-Galaxy_pattern = r"(?i)a[_\s-]?galaxy[_\s-]?workflow"
-CWL_pattern = r"\bclass:\s*[Ww]orkflow\b"
-Workflow_content_pattern = r"in:\s*[^}]*\s*out:\s*(?:\[.*?\]|.*?(?=\n\s*\S+:|$))"
-workflow_pattern=r'\bworkflow\b'
-Nextflow_pattern= r"(?i)nextflow[\s\S]*?(workflow\s*\{[\s\S]*?\})"
+from .utils import regexp
 
 def is_file_workflow(file_path):
     with open(file_path, 'r') as file:
         content = file.read()
         try:
-            Galaxy_match=re.search(Galaxy_pattern,content)
-            CWL_match=re.search(CWL_pattern,content)
-            Workflow_match=re.search(Workflow_content_pattern,content)
-            Workflow_match_2=re.search(workflow_pattern,content,re.IGNORECASE)
-            Nextflow_match=re.search(Nextflow_pattern,content)
+            Galaxy_match=regexp.REGEXP_GALAXY_WORKFLOW.search(content)
+            CWL_match=regexp.REGEXP_CWL_WORKFLOW.search(content)
+            Workflow_match=regexp.REGEXP_WORKFLOW_CONTENT.search(content)
+            Workflow_match_2=regexp.REGEXP_WORKFLOW.search(content)
+            Nextflow_match=regexp.REGEXP_NEXTFLOW_WORKFLOW.search(content)
             if Galaxy_match or CWL_match or Workflow_match or Workflow_match_2 or Nextflow_match:
                 return True
             else:
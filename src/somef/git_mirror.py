@@ -0,0 +1,143 @@
+import logging
+import os
+import shutil
+import subprocess
+import tarfile
+from urllib.parse import urlparse
+
+from .utils import constants
+
+
+def git(*args, timeout=constants.MIRROR_GIT_TIMEOUT):
+    """
+    Runs a git command
+    Parameters
+    ----------
+    @param args: arguments of the command
+    @param timeout: seconds to wait for the command
+
+    Returns
+    -------
+    @return: True if the command succeeded
+    """
+    try:
+        process = subprocess.run(["git"] + list(args), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                 timeout=timeout, env=dict(os.environ, GIT_TERMINAL_PROMPT="0"))
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logging.error("Error while running git " + args[0] + ": " + str(e))
+        return False
+    if process.returncode != 0:
+        logging.error("Error while running git " + args[0] + ": " + process.stderr.decode("utf-8", "replace").strip())
+        return False
+    return True
+
+
+def get_mirror_path(clone_url, mirror_dir):
+    """
+    Returns the path of the mirror of a repository: <mirror_dir>/<host>/<owner>/<repo>.git
+    Parameters
+    ----------
+    @param clone_url: URL (or path, for local repositories) of the repository
+    @param mirror_dir: folder where the mirrors are kept
+
+    Returns
+    -------
+    @return: path of the bare mirror of the repository
+    """
+    url = urlparse(clone_url)
+    parts = [url.netloc or "local"] + [part for part in url.path.split("/") if part not in ["", ".", ".."]]
+    if not parts[-1].endswith(".git"):
+        parts[-1] += ".git"
+    return os.path.join(os.path.expanduser(mirror_dir), *parts)
+
+
+def update_mirror(clone_url, mirror_path):
+    """
+    Creates the bare mirror of a repository, or fetches the changes since it was last updated
+    Parameters
+    ----------
+    @param clone_url: URL (or path) of the repository
+    @param mirror_path: path of the mirror
+
+    Returns
+    -------
+    @return: True if the mirror is up to date
+    """
+    if os.path.isdir(mirror_path):
+        logging.info(f"Fetching {clone_url} into {mirror_path}")
+        return git("--git-dir", mirror_path, "remote", "update", "--prune")
+    logging.info(f"Cloning {clone_url} into {mirror_path}")
+    os.makedirs(os.path.dirname(mirror_path), exist_ok=True)
+    if git("clone", "--mirror", "--quiet", clone_url, mirror_path):
+        return True
+    # a failed clone must not be taken as a mirror next time
+    shutil.rmtree(mirror_path, ignore_errors=True)
+    return False
+
+
+def materialize(mirror_path, ref, target_dir):
+    """
+    Writes the files of a ref of a mirror in a folder (as in the archive of the repository, without the .git folder).
+    The mirror is only read, so several refs can be materialized at once
+    Parameters
+    ----------
+    @param mirror_path: path of the mirror
+    @param ref: branch, tag or commit. If it does not exist, the default branch (HEAD) is used
+    @param target_dir: folder where the files are written
+
+    Returns
+    -------
+    @return: True if the files have been written
+    """
+    if not git("--git-dir", mirror_path, "rev-parse", "--verify", "--quiet", ref + "^{tree}"):
+        logging.warning(f"Ref {ref} not found in {mirror_path}, using the default branch")
+        ref = "HEAD"
+    os.makedirs(target_dir, exist_ok=True)
+    # git archive streams a tar, extracted as it is read
+    process = subprocess.Popen(["git", "--git-dir", mirror_path, "archive", "--format=tar", ref],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        with tarfile.open(fileobj=process.stdout, mode="r|") as tar_ref:
+            for member in tar_ref:
+                if member.isfile() or member.isdir():
+                    tar_ref.extract(member, target_dir)
+    except tarfile.TarError as e:
+        logging.error("Error while extracting " + ref + " from " + mirror_path + ": " + str(e))
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+    if process.wait() != 0:
+        logging.error("Error while running git archive: " + stderr.decode("utf-8", "replace").strip())
+        return False
+    return True
+
+
+def download_mirror_files(clone_url, ref, target_dir, mirror_dir=constants.MIRROR_DEFAULT_DIR):
+    """
+    Obtains the files of a repository from its local bare mirror, which is created the first time and then updated
+    fetching only the changes (with the git binary)
+    Parameters
+    ----------
+    @param clone_url: URL of the repository (or path, for local repositories)
+    @param ref: branch, tag or commit to analyze
+    @param target_dir: directory where the files are written
+    @param mirror_dir: folder where the mirrors are kept
+
+    Returns
+    -------
+    @return: path of the folder with the files of the repository, or None if git failed
+    """
+    if shutil.which("git") is None:
+        logging.error("git is not installed")
+        return None
+    mirror_path = get_mirror_path(clone_url, mirror_dir)
+    if not update_mirror(clone_url, mirror_path):
+        if not os.path.isdir(mirror_path):
+            return None
+        logging.warning("Could not update the mirror, using the files of the last update")
+    repo_dir = os.path.join(target_dir, os.path.basename(mirror_path)[:-len(".git")])
+    if not materialize(mirror_path, ref, repo_dir):
+        shutil.rmtree(repo_dir, ignore_errors=True)
+        return None
+    return repo_dir
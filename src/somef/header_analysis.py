@@ -1,14 +1,12 @@
 import logging
-import re
 import string
 
-import numpy as np
 import pandas as pd
 from textblob import Word
 
 from .process_results import Result
 from .parser import mardown_parser
-from .utils import constants
+from .utils import constants, regexp
 
 pd.options.mode.chained_assignment = None  # default='warn'
 
@@ -93,21 +91,34 @@ def extract_bash_code(text):
     return output
 
 
-def extract_header_content(text):
-    """Function designed to extract headers and contents of text and place it in a dataframe"""
-    header = []
+def extract_header_rows(text):
+    """
+    Function designed to extract headers, contents and parent headers of a text as plain lists
+    Parameters
+    ----------
+    @param text: markdown text to analyze
+
+    Returns
+    -------
+    @return the lists of headers, contents and parent headers (only for headers with content) and the text that
+    does not belong to any header
+    """
     headers = mardown_parser.extract_headers(text)
-    for key in headers.keys():
-        if headers[key]:
-            header.append(key)
+    header = [key for key, has_content in headers.items() if has_content]
     content, none_header_content = mardown_parser.extract_content_per_header(text, headers)
     parent_headers = mardown_parser.extract_headers_parents(text)
-    # into dataframe
-    df = pd.DataFrame(columns=['Header', 'Content', 'ParentHeader'])
-    for i, j in zip(header, content):
-        df = df.append({'Header': i, 'Content': j, 'ParentHeader': parent_headers[i]}, ignore_index=True)
-    df['Content'].replace('', np.nan, inplace=True)
-    df.dropna(subset=['Content'], inplace=True)
+    rows = [(h, c, parent_headers[h]) for h, c in zip(header, content) if c != '']
+    header = [row[0] for row in rows]
+    content = [row[1] for row in rows]
+    parents = [row[2] for row in rows]
+    return header, content, parents, none_header_content
+
+
+def extract_header_content(text):
+    """Function designed to extract headers and contents of text and place it in a dataframe"""
+    header, content, parents, none_header_content = extract_header_rows(text)
+    df = pd.DataFrame({'Header': header, 'Content': content, 'ParentHeader': parents},
+                      columns=['Header', 'Content', 'ParentHeader'])
     return df, none_header_content
 
 
@@ -185,8 +196,7 @@ def label_parent_headers(parentHeaders):
 
 def clean_html(text):
     """Cleaner function"""
-    cleanr = re.compile('<.*?>')
-    cleantext = re.sub(cleanr, '', text)
+    cleantext = regexp.REGEXP_HTML_TAGS.sub('', text)
     return cleantext
 
 
@@ -206,55 +216,38 @@ def extract_categories(repo_data, repository_metadata: Result):
     if repo_data is None or repo_data == "" or len(repo_data) == 0:
         return repository_metadata, []
     try:
-        data, none_header_content = extract_header_content(repo_data)
+        headers, contents, parents, none_header_content = extract_header_rows(repo_data)
         logging.info('Labeling headers.')
-        if data.empty:
+        if len(headers) == 0:
             logging.warning("File to analyze has no headers")
             return repository_metadata, [repo_data]
-        data['Group'] = data['Header'].apply(lambda row: label_header(row))
-        data['GroupParent'] = data['ParentHeader'].apply(lambda row: label_parent_headers(row))
-        for i in data.index:
-            if len(data['Group'][i]) == 0 and len(data['GroupParent'][i]) > 0:
-                data.at[i, 'Group'] = data['GroupParent'][i]
-        data = data.drop(columns=['GroupParent'])
-        if len(data['Group'].iloc[0]) == 0:
-            data['Group'].iloc[0] = ['unknown']
-        groups = data.apply(lambda x: pd.Series(x['Group']), axis=1).stack().reset_index(level=1, drop=True)
-
-        groups.name = 'Group'
-        data = data.drop('Group', axis=1).join(groups)
-        if data['Group'].iloc[0] == 'unknown':
-            data['Group'].iloc[0] = np.NaN
-
-        # to json
-        group = data.loc[(data['Group'] != 'None') & pd.notna(data['Group'])]
-        group.rename(columns={'Content': constants.PROP_VALUE}, inplace=True)
-        group.rename(columns={'Header': constants.PROP_ORIGINAL_HEADER}, inplace=True)
-        group.rename(columns={'ParentHeader': constants.PROP_PARENT_HEADER}, inplace=True)
-        for index, row in group.iterrows():
-            source = ""
-            if constants.CAT_README_URL in repository_metadata.results.keys():
-                source = repository_metadata.results[constants.CAT_README_URL][0]
-                source = source[constants.PROP_RESULT][constants.PROP_VALUE]
-            parent_header = ""
-            if row[constants.PROP_PARENT_HEADER] != "":
-                parent_header = row.loc[constants.PROP_PARENT_HEADER]
-            result = {
-                constants.PROP_VALUE: row.loc[constants.PROP_VALUE],
-                constants.PROP_TYPE: constants.TEXT_EXCERPT,
-                constants.PROP_ORIGINAL_HEADER: row.loc[constants.PROP_ORIGINAL_HEADER]
-            }
-            if parent_header != "" and len(parent_header) > 0:
-                result[constants.PROP_PARENT_HEADER] = parent_header
-            if source != "":
-                repository_metadata.add_result(row.Group, result, 1, constants.TECHNIQUE_HEADER_ANALYSIS, source)
-            else:
-                repository_metadata.add_result(row.Group, result, 1, constants.TECHNIQUE_HEADER_ANALYSIS)
-
+        source = ""
+        if constants.CAT_README_URL in repository_metadata.results.keys():
+            source = repository_metadata.results[constants.CAT_README_URL][0]
+            source = source[constants.PROP_RESULT][constants.PROP_VALUE]
         # strings without tag (they will be classified)
-        string_list = data.loc[data['Group'].isna(), ['Content']].values.squeeze().tolist()
-        if type(string_list) != list:
-            string_list = [string_list]
+        string_list = []
+        for header, content, parent_header in zip(headers, contents, parents):
+            # if a header cannot be labeled, the labels of its parent headers are used instead
+            groups = label_header(header)
+            if len(groups) == 0:
+                groups = label_parent_headers(parent_header)
+            if len(groups) == 0:
+                string_list.append(content)
+                continue
+            for category in groups:
+                result = {
+                    constants.PROP_VALUE: content,
+                    constants.PROP_TYPE: constants.TEXT_EXCERPT,
+                    constants.PROP_ORIGINAL_HEADER: header
+                }
+                if parent_header != "" and len(parent_header) > 0:
+                    result[constants.PROP_PARENT_HEADER] = parent_header
+                if source != "":
+                    repository_metadata.add_result(category, result, 1, constants.TECHNIQUE_HEADER_ANALYSIS, source)
+                else:
+                    repository_metadata.add_result(category, result, 1, constants.TECHNIQUE_HEADER_ANALYSIS)
+
         if none_header_content is not None and none_header_content != "":
             string_list.append(none_header_content.strip())
         logging.info("Header information extracted.")
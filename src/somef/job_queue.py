@@ -0,0 +1,248 @@
+import abc
+import logging
+import os
+import re
+import socket
+import sqlite3
+import time
+import uuid
+
+from .utils import constants
+
+REGEXP_URL_SCHEME = re.compile(constants.REGEXP_URL_SCHEME)
+REGEXP_FILE_NAME_UNSAFE = re.compile(constants.REGEXP_FILE_NAME_UNSAFE)
+
+
+class Job:
+    """Repository taken from a JobQueue. The lease identifies who took it, so an expired lease cannot be acked"""
+
+    def __init__(self, url, attempts, lease):
+        self.url = url
+        self.attempts = attempts
+        self.lease = lease
+
+
+class JobQueue(abc.ABC):
+    """
+    Queue of repositories to analyze, shared by several workers (see run_worker). A job taken by a worker is hidden
+    from the other workers for a visibility timeout: if it is not acked (or failed) before, it is given to another
+    worker, up to max_attempts times. New backends implement these methods and are added to QUEUE_BACKENDS.
+    """
+
+    @abc.abstractmethod
+    def put(self, urls):
+        """Adds repository URLs to the queue (URLs already in the queue are ignored). Returns the number added"""
+
+    @abc.abstractmethod
+    def get(self, visibility_timeout=constants.QUEUE_VISIBILITY_TIMEOUT):
+        """Takes the next repository to analyze, hiding it from other workers. Returns a Job, or None if empty"""
+
+    @abc.abstractmethod
+    def ack(self, job):
+        """Marks a job as done. Returns False if the lease of the job had expired and it was taken by another worker"""
+
+    @abc.abstractmethod
+    def fail(self, job, error, retry_delay=0):
+        """Returns a job to the queue after an error, or marks it as failed if it has no attempts left"""
+
+    @abc.abstractmethod
+    def stats(self):
+        """Returns the number of jobs in each status (pending, running, done, failed)"""
+
+    def close(self):
+        pass
+
+
+class SqliteQueue(JobQueue):
+    """
+    JobQueue stored in a SQLite database, which can be shared by the workers of one machine (or of several machines
+    through a shared file system that supports locks)
+    """
+
+    def __init__(self, path, max_attempts=constants.QUEUE_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self.worker = socket.gethostname() + ":" + str(os.getpid())
+        # autocommit mode: transactions are opened explicitly
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            url TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            visible_at REAL NOT NULL DEFAULT 0,
+            lease TEXT,
+            worker TEXT,
+            error TEXT,
+            updated_at REAL)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, visible_at)")
+
+    def put(self, urls):
+        now = time.time()
+        # a single transaction for all the URLs
+        self.connection.execute("BEGIN")
+        try:
+            cursor = self.connection.executemany(
+                "INSERT OR IGNORE INTO jobs (url, status, updated_at) VALUES (?, ?, ?)",
+                [(url, constants.JOB_PENDING, now) for url in urls])
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def get(self, visibility_timeout=constants.QUEUE_VISIBILITY_TIMEOUT):
+        now = time.time()
+        # the write lock is taken before reading, so two workers cannot take the same job
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = self.connection.execute(
+                    "SELECT url, attempts FROM jobs WHERE status IN (?, ?) AND visible_at <= ? "
+                    "ORDER BY visible_at, rowid LIMIT 1",
+                    (constants.JOB_PENDING, constants.JOB_RUNNING, now)).fetchone()
+                if row is None:
+                    self.connection.execute("COMMIT")
+                    return None
+                url, attempts = row
+                if attempts < self.max_attempts:
+                    break
+                # the lease of the last attempt expired (e.g., the worker was killed)
+                self.connection.execute("UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE url = ?",
+                                        (constants.JOB_FAILED, "Visibility timeout expired", now, url))
+            lease = uuid.uuid4().hex
+            self.connection.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, visible_at = ?, lease = ?, worker = ?, updated_at = ? "
+                "WHERE url = ?",
+                (constants.JOB_RUNNING, attempts + 1, now + visibility_timeout, lease, self.worker, now, url))
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+        return Job(url, attempts + 1, lease)
+
+    def ack(self, job):
+        cursor = self.connection.execute(
+            "UPDATE jobs SET status = ?, error = NULL, updated_at = ? WHERE url = ? AND lease = ?",
+            (constants.JOB_DONE, time.time(), job.url, job.lease))
+        return cursor.rowcount == 1
+
+    def fail(self, job, error, retry_delay=0):
+        now = time.time()
+        status = constants.JOB_FAILED if job.attempts >= self.max_attempts else constants.JOB_PENDING
+        cursor = self.connection.execute(
+            "UPDATE jobs SET status = ?, visible_at = ?, error = ?, updated_at = ? WHERE url = ? AND lease = ?",
+            (status, now + retry_delay, str(error), now, job.url, job.lease))
+        return cursor.rowcount == 1
+
+    def stats(self):
+        counts = {status: 0 for status in [constants.JOB_PENDING, constants.JOB_RUNNING, constants.JOB_DONE,
+                                           constants.JOB_FAILED]}
+        for status, count in self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def close(self):
+        self.connection.close()
+
+
+# queue backends, by URI scheme (a path without scheme is a SQLite database)
+QUEUE_BACKENDS = {
+    "sqlite": SqliteQueue
+}
+
+
+def open_queue(uri, max_attempts=constants.QUEUE_MAX_ATTEMPTS):
+    """
+    Opens a queue of repositories
+    Parameters
+    ----------
+    @param uri: location of the queue, as <backend>://<location> (e.g., sqlite:///tmp/crawl.db) or the path of a
+    SQLite database
+    @param max_attempts: attempts before giving up on a repository
+
+    Returns
+    -------
+    @return: the JobQueue
+    """
+    scheme, separator, location = uri.partition("://")
+    if not separator:
+        scheme, location = "sqlite", uri
+    if scheme not in QUEUE_BACKENDS:
+        raise ValueError("Unknown queue backend: " + scheme + ". Use one of " + ", ".join(QUEUE_BACKENDS))
+    return QUEUE_BACKENDS[scheme](location, max_attempts=max_attempts)
+
+
+def url_to_file_name(url):
+    """
+    Turns a repository URL into a file name: https://github.com/owner/repo -> github.com_owner_repo. The host is kept,
+    so repositories with the same path in different hosts (e.g., GitHub and GitLab) get different names
+    """
+    return REGEXP_FILE_NAME_UNSAFE.sub("_", REGEXP_URL_SCHEME.sub("", url)).strip("_.")
+
+
+def result_file_name(url):
+    """Name of the file with the results of a repository (see url_to_file_name)"""
+    return url_to_file_name(url)
+
+
+def run_worker(job_queue, output_dir, threshold=0.8, ignore_classifiers=False, codemeta=False, pretty=False,
+               offline=False, visibility_timeout=constants.QUEUE_VISIBILITY_TIMEOUT, wait=False, max_jobs=None,
+               cache=None):
+    """
+    Analyzes the repositories of a queue until it is empty, saving the results of each one in the output folder
+    (<host>_<owner>_<repo>.json, and <host>_<owner>_<repo>.codemeta.json). Several workers can drain the same queue.
+    Parameters
+    ----------
+    @param job_queue: JobQueue with the repositories to analyze
+    @param output_dir: folder where the results are saved
+    @param threshold: threshold to filter annotations
+    @param ignore_classifiers: flag to indicate if the output from the classifiers should be ignored
+    @param codemeta: flag to also save the results as Codemeta
+    @param pretty: flag to pretty print the JSON files
+    @param offline: flag to skip the URL checks of the regular expression extractors
+    @param visibility_timeout: seconds a repository is hidden from other workers (it should be longer than the
+    analysis of a repository)
+    @param wait: flag to wait for new repositories when the queue is empty, instead of returning
+    @param max_jobs: maximum number of repositories to analyze (no limit if None)
+    @param cache: path of the analysis cache (SQLite database), to only run the extractors whose input files changed
+    since the previous analysis of each repository
+
+    Returns
+    -------
+    @return: number of repositories analyzed
+    """
+    from . import somef_cli
+    from .analysis_cache import AnalysisCache
+    from .export import json_export
+    os.makedirs(output_dir, exist_ok=True)
+    analysis_results = AnalysisCache(cache) if cache is not None else None
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = job_queue.get(visibility_timeout)
+        if job is None:
+            if not wait:
+                break
+            time.sleep(constants.QUEUE_POLL_INTERVAL)
+            continue
+        logging.info(f"Analyzing {job.url} (attempt {job.attempts})")
+        try:
+            repository_metadata = somef_cli.cli_get_data(threshold, ignore_classifiers, repo_url=job.url,
+                                                         offline=offline, cache=analysis_results)
+            # the results of a failed analysis are partial, so they are not saved and the repository is retried
+            if repository_metadata.error is not None:
+                raise RuntimeError(repository_metadata.error)
+            output_path = os.path.join(output_dir, result_file_name(job.url))
+            json_export.save_json_output(repository_metadata.results, output_path + ".json", None, pretty=pretty)
+            if codemeta:
+                json_export.save_codemeta_output(repository_metadata.results, output_path + ".codemeta.json",
+                                                 pretty=pretty)
+        # the analysis may call sys.exit (e.g., if a classifier file is missing), which would stop the worker
+        except (Exception, SystemExit) as e:
+            logging.error("Error processing repository " + job.url + ": " + str(e))
+            job_queue.fail(job, e)
+        else:
+            if not job_queue.ack(job):
+                logging.warning("The visibility timeout of " + job.url + " expired before it was analyzed")
+        processed += 1
+    if analysis_results is not None:
+        analysis_results.close()
+    return processed
@@ -1,15 +1,22 @@
 import logging
 import os
+import posixpath
 import re
 import urllib
 from .utils import constants, markdown_utils
-from . import extract_ontologies,extract_workflows
+from . import analysis_cache, extract_ontologies, extract_workflows
+from .repository_walk import walk_repository
 from .process_results import Result
 from chardet import detect
 
+# extensions of the files whose content is analyzed, besides the README and key files: ontologies, workflows and
+# notebooks (see file_needs_content)
+CONTENT_EXTENSIONS = (".ttl", ".owl", ".nt", ".xml", ".ipynb", ".rmd", ".Rmd") + constants.ontology_extensions + \
+                     constants.workflow_extensions
+
 
 def process_repository_files(repo_dir, metadata_result: Result, repo_type, owner="", repo_name="",
-                             repo_default_branch=""):
+                             repo_default_branch="", cache=None, walk_options=None):
     """
     Method that given a folder, it recognizes whether there are notebooks, dockerfiles, docs, script files or
     ontologies.
@@ -21,14 +28,19 @@ def process_repository_files(repo_dir, metadata_result: Result, repo_type, owner
     @param owner: owner of the repo (only for github/gitlab repos)
     @param repo_name: repository name (only for github/gitlab repos)
     @param repo_default_branch: branch (only for github/gitlab repos)
+    @param cache: AnalysisCache with the results of previous analyses, so only changed ontologies and workflows are
+    analyzed again
+    @param walk_options: WalkOptions with the folders skipped and the budget of the walk (see walk_repository)
 
     Returns
     -------
     @return: text of the main readme and a JSON dictionary (filtered_resp) with the findings in files
     """
     text = ""
+    # candidate ontologies are parsed once the repository has been walked (see detect_ontologies)
+    ontology_files = []
     try:
-        for dir_path, dir_names, filenames in os.walk(repo_dir):
+        for dir_path, dir_names, filenames in walk_repository(repo_dir, walk_options):
             repo_relative_path = os.path.relpath(dir_path, repo_dir)
             for filename in filenames:
                 file_path = os.path.join(repo_relative_path, filename)
@@ -140,18 +152,10 @@ def process_repository_files(repo_dir, metadata_result: Result, repo_type, owner
                                                )
                 if filename.endswith(".ttl") or filename.endswith(".owl") or filename.endswith(".nt") or filename. \
                         endswith(".xml"):
-                    uri = extract_ontologies.is_file_ontology(os.path.join(repo_dir, file_path))
-                    if uri is not None:
-                        onto_url = get_file_link(repo_type, file_path, owner, repo_name, repo_default_branch, repo_dir,
-                                                 repo_relative_path, filename)
-                        metadata_result.add_result(constants.CAT_ONTOLOGIES,
-                                                   {
-                                                       constants.PROP_VALUE: onto_url,
-                                                       constants.PROP_TYPE: constants.URL
-                                                   }, 1, constants.TECHNIQUE_FILE_EXPLORATION
-                                                   )
+                    ontology_files.append((file_path, repo_relative_path, filename))
                 if filename.endswith(".ga") or filename.endswith(".cwl") or filename.endswith(".nf") or (filename.endswith(".snake") or filename.endswith(".smk")  or "Snakefile"==filename_no_ext) or filename.endswith(".knwf") or filename.endswith(".t2flow") or filename.endswith(".dag") or filename.endswith(".kar") or filename.endswith(".wdl"):
-                    analysis = extract_workflows.is_file_workflow(os.path.join(repo_dir, file_path))
+                    analysis = analysis_cache.check_file(cache, constants.CACHE_WORKFLOW, repo_dir, file_path,
+                                                         extract_workflows.is_file_workflow)
                     if analysis == True:
                         Workflow_url=get_file_link(repo_type,file_path,owner,repo_name,repo_default_branch,repo_dir,repo_relative_path,filename) 
                         metadata_result.add_result(constants.CAT_WORKFLOWS,
@@ -188,12 +192,61 @@ def process_repository_files(repo_dir, metadata_result: Result, repo_type, owner
                                                        }, 1, constants.TECHNIQUE_FILE_EXPLORATION
                                                        )
                             break
+        uris = analysis_cache.check_files(cache, constants.CACHE_ONTOLOGY, repo_dir,
+                                          [file_path for file_path, _, _ in ontology_files],
+                                          extract_ontologies.detect_ontologies)
+        for (file_path, repo_relative_path, filename), uri in zip(ontology_files, uris):
+            if uri is not None:
+                onto_url = get_file_link(repo_type, file_path, owner, repo_name, repo_default_branch, repo_dir,
+                                         repo_relative_path, filename)
+                metadata_result.add_result(constants.CAT_ONTOLOGIES,
+                                           {
+                                               constants.PROP_VALUE: onto_url,
+                                               constants.PROP_TYPE: constants.URL
+                                           }, 1, constants.TECHNIQUE_FILE_EXPLORATION
+                                           )
         return text, metadata_result
     except TypeError:
         logging.error("Error when opening the repository files")
         return None, None
 
 
+def is_key_file(filename):
+    """
+    Checks if the content of a file is added to the results by process_repository_files (license, citation,
+    contributing guidelines, installation instructions, etc.), besides the README
+    Parameters
+    ----------
+    @param filename: name of the file
+
+    Returns
+    -------
+    @return: True if the content of the file is part of the results
+    """
+    name = filename.upper()
+    return name in constants.KEY_FILES or "ACKNOWLEDGMENT" in name or "ACKNOWLEDGEMENT" in name or \
+        ("INSTALL" in name and name.endswith("MD"))
+
+
+def file_needs_content(file_path):
+    """
+    Checks if the content of a file is analyzed by process_repository_files or check_repository_type. Other files
+    are only analyzed by their names (e.g., Dockerfile, scripts, code files, documentation)
+    Parameters
+    ----------
+    @param file_path: path of the file in the repository, with "/" as separator
+
+    Returns
+    -------
+    @return: True if the content of the file is analyzed
+    """
+    directory, filename = posixpath.split(file_path)
+    filename_no_ext = os.path.splitext(filename)[0]
+    if directory == "" and filename_no_ext.upper() == "README":
+        return True
+    return is_key_file(filename) or filename.endswith(CONTENT_EXTENSIONS) or filename_no_ext == "Snakefile"
+
+
 def get_file_link(repo_type, file_path, owner, repo_name, repo_default_branch, repo_dir, repo_relative_path,
                   filename):
     """
@@ -4,11 +4,12 @@ import os
 import zipfile
 import time
 import requests
-import sys
+import shutil
 from datetime import datetime
-from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlparse
 from .utils import constants
-from . import configuration
+from . import configuration, git_mirror, process_files
 from .process_results import Result
 
 
@@ -248,10 +249,149 @@ def download_gitlab_files(directory, owner, repo_name, repo_branch, repo_ref):
         return None
 
 
+def github_api_header():
+    """Headers of the requests to the GitHub API, with the token of the configuration file (if any)"""
+    # Read from the config file the right token information
+    header = {}
+    file_paths = configuration.get_configuration_file()
+    if constants.CONF_AUTHORIZATION in file_paths.keys():
+        header[constants.CONF_AUTHORIZATION] = file_paths[constants.CONF_AUTHORIZATION]
+    header['accept'] = constants.GITHUB_ACCEPT_HEADER
+    return header
+
+
+def get_github_readme(owner, repo_name, ref):
+    """
+    Downloads the README of a GitHub repository with the readme endpoint of the API, which finds it whatever its
+    name and format (README.md, readme.rst, README, etc.) in a single request
+    Parameters
+    ----------
+    @param owner: owner of the repository
+    @param repo_name: name of the repository
+    @param ref: branch, tag or commit
+
+    Returns
+    -------
+    @return: name and content (bytes) of the README, or (None, None) if the repository has no README
+    """
+    readme, date = rate_limit_get(f"{constants.GITHUB_API}/{owner}/{repo_name}/readme", headers=github_api_header(),
+                                  params={"ref": ref})
+    if "content" not in readme:
+        logging.warning("README not found by the GitHub API: " + str(readme.get("message")))
+        return None, None
+    return readme["name"], base64.b64decode(readme["content"])
+
+
+def download_key_files(owner, repo_name, ref, target_dir):
+    """
+    Downloads the README and the key files at the root of a GitHub repository (license, citation, contributing
+    guidelines, etc., see process_files.is_key_file), instead of the archive of the whole repository. The files at
+    the root are listed with the contents API, and the key files are downloaded from raw.githubusercontent.com
+    Parameters
+    ----------
+    @param owner: owner of the repository
+    @param repo_name: name of the repository
+    @param ref: branch, tag or commit
+    @param target_dir: directory where to download files
+
+    Returns
+    -------
+    @return: path of the folder where the files have been downloaded
+    """
+    repo_dir = os.path.join(target_dir, owner + "_" + repo_name)
+    os.makedirs(repo_dir, exist_ok=True)
+    root_files, date = rate_limit_get(f"{constants.GITHUB_API}/{owner}/{repo_name}/contents/",
+                                      headers=github_api_header(), params={"ref": ref})
+    if isinstance(root_files, dict):
+        logging.error("Error while listing the files of the repository: " + str(root_files.get("message")))
+        root_files = []
+    for entry in root_files:
+        if entry["type"] == "file" and process_files.is_key_file(entry["name"]):
+            logging.info(f"Downloading {entry['download_url']}")
+            file_download = requests.get(entry["download_url"])
+            if file_download.status_code != 200:
+                logging.error(f"Error: File request failed with HTTP {file_download.status_code}")
+                continue
+            with open(os.path.join(repo_dir, entry["name"]), "wb") as f:
+                f.write(file_download.content)
+    readme_name, readme = get_github_readme(owner, repo_name, ref)
+    if readme is not None:
+        # the README is saved at the root, where process_files looks for it
+        with open(os.path.join(repo_dir, readme_name), "wb") as f:
+            f.write(readme)
+    return repo_dir
+
+
+def download_tree_files(owner, repo_name, ref, target_dir, max_files=constants.TREE_MAX_FILES,
+                        max_bytes=constants.TREE_MAX_BYTES):
+    """
+    Downloads the files of a GitHub repository whose content is analyzed (README, key files, ontologies, workflows and
+    notebooks, see process_files.file_needs_content), instead of the archive of the whole repository. The files are
+    listed with the recursive git trees API, and the rest of files are created empty, as only their names are
+    analyzed.
+    Parameters
+    ----------
+    @param owner: owner of the repository
+    @param repo_name: name of the repository
+    @param ref: branch, tag or commit
+    @param target_dir: directory where to download files
+    @param max_files: maximum number of files to download. If more files are needed, None is returned
+    @param max_bytes: maximum size of the files to download. If the files are bigger, None is returned
+
+    Returns
+    -------
+    @return: path of the folder with the files of the repository, or None if the tree could not be listed or
+    downloading the archive is preferable
+    """
+    tree, date = rate_limit_get(f"{constants.GITHUB_API}/{owner}/{repo_name}/git/trees/{quote(ref, safe='')}",
+                                headers=github_api_header(), params={"recursive": "1"})
+    if "tree" not in tree:
+        logging.error("Error while listing the files of the repository: " + str(tree.get("message")))
+        return None
+    if tree.get("truncated"):
+        logging.info("The repository has too many files to list them with the GitHub API")
+        return None
+    to_download = [entry for entry in tree["tree"] if entry["type"] == "blob" and
+                   process_files.file_needs_content(entry["path"])]
+    if len(to_download) > max_files or sum(entry.get("size", 0) for entry in to_download) > max_bytes:
+        logging.info(f"Too many files to download ({len(to_download)}), downloading the archive instead")
+        return None
+    repo_dir = os.path.join(target_dir, owner + "_" + repo_name)
+    for entry in tree["tree"]:
+        if entry["path"].startswith("/") or ".." in entry["path"].split("/"):
+            continue
+        local_path = os.path.join(repo_dir, *entry["path"].split("/"))
+        if entry["type"] == "tree":
+            os.makedirs(local_path, exist_ok=True)
+        elif entry["type"] == "blob":
+            # files that are not downloaded are created empty
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            open(local_path, "wb").close()
+
+    def download(entry):
+        file_url = process_files.convert_to_raw_user_content_github(entry["path"], owner, repo_name, ref)
+        file_download = requests.get(file_url)
+        if file_download.status_code != 200:
+            logging.error(f"Error: File request failed with HTTP {file_download.status_code}: {file_url}")
+            return False
+        with open(os.path.join(repo_dir, *entry["path"].split("/")), "wb") as f:
+            f.write(file_download.content)
+        return True
+
+    logging.info(f"Downloading {len(to_download)} files of {owner}/{repo_name}")
+    with ThreadPoolExecutor(max_workers=constants.TREE_FETCH_WORKERS) as executor:
+        downloaded = list(executor.map(download, to_download))
+    if not all(downloaded):
+        # the archive is downloaded to the same folder
+        shutil.rmtree(repo_dir)
+        return None
+    return repo_dir
+
+
 def download_readme(owner, repo_name, default_branch, repo_type):
     """
     Method that given a repository owner, name and default branch, it downloads the readme content only.
-    The readme is assumed to be README.md
+    In GitHub, the readme is found with the API (see get_github_readme). Otherwise, it is assumed to be README.md
     Parameters
     ----------
     @param owner: owner of the repository
@@ -272,6 +412,10 @@ def download_readme(owner, repo_name, default_branch, repo_type):
     else:
         logging.error("Repository type not supported")
         return None
+    if repo_type is constants.RepositoryType.GITHUB:
+        readme_name, readme = get_github_readme(owner, repo_name, default_branch)
+        if readme is not None:
+            return readme.decode('utf-8')
     logging.info(f"Downloading {primary_url}")
     repo_download = requests.get(primary_url)
     if repo_download.status_code == 404:
@@ -309,12 +453,7 @@ def load_online_repository_metadata(repository_metadata: Result, repository_url,
         return None
 
     logging.info(f"Loading Repository {repository_url} Information....")
-    # Read from the config file the right token information
-    header = {}
-    file_paths = configuration.get_configuration_file()
-    if constants.CONF_AUTHORIZATION in file_paths.keys():
-        header[constants.CONF_AUTHORIZATION] = file_paths[constants.CONF_AUTHORIZATION]
-    header['accept'] = constants.GITHUB_ACCEPT_HEADER
+    header = github_api_header()
 
     # load general response of the repository
     if repository_url[-1] == '/':
@@ -476,7 +615,8 @@ def do_crosswalk(data, crosswalk_table):
     return output
 
 
-def download_repository_files(owner, repo_name, default_branch, repo_type, target_dir, repo_ref=None):
+def download_repository_files(owner, repo_name, default_branch, repo_type, target_dir, repo_ref=None,
+                              fetch_mode=constants.FETCH_MODE_ARCHIVE, mirror_dir=constants.MIRROR_DEFAULT_DIR):
     """
     Given a repository, this method will download its files and return the readme text
     Parameters
@@ -487,6 +627,9 @@ def download_repository_files(owner, repo_name, default_branch, repo_type, targe
     @param owner: owner of the repo
     @param target_dir: directory where to download files
     @param repo_ref: URL of the target repository (needed in some specific repos)
+    @param fetch_mode: how the files are obtained (see constants.FETCH_MODES). Only GitHub repositories can be
+    fetched with the key_files and tree modes, and GitHub and GitLab repositories with the mirror mode
+    @param mirror_dir: folder where the git mirrors are kept in mirror mode
 
     Returns
     -------
@@ -494,7 +637,25 @@ def download_repository_files(owner, repo_name, default_branch, repo_type, targe
 
     """
 
+    if fetch_mode == constants.FETCH_MODE_MIRROR and repo_type != constants.RepositoryType.LOCAL:
+        if repo_type == constants.RepositoryType.GITHUB:
+            clone_url = f"https://{constants.GITHUB_DOMAIN}/{owner}/{repo_name}.git"
+        elif repo_ref is not None:
+            # GitLab repositories may be in subgroups, so their URL is used
+            clone_url = repo_ref.rstrip("/") + ".git"
+        else:
+            clone_url = f"https://gitlab.com/{owner}/{repo_name}.git"
+        repo_dir = git_mirror.download_mirror_files(clone_url, default_branch, target_dir, mirror_dir)
+        if repo_dir is not None:
+            return repo_dir
+        logging.warning("Could not use the git mirror, downloading the archive of the repository")
     if repo_type == constants.RepositoryType.GITHUB:
+        if fetch_mode == constants.FETCH_MODE_KEY_FILES:
+            return download_key_files(owner, repo_name, default_branch, target_dir)
+        if fetch_mode == constants.FETCH_MODE_TREE:
+            repo_dir = download_tree_files(owner, repo_name, default_branch, target_dir)
+            if repo_dir is not None:
+                return repo_dir
         return download_github_files(target_dir, owner, repo_name, default_branch)
     elif repo_type == constants.RepositoryType.GITLAB:
         return download_gitlab_files(target_dir, owner, repo_name, default_branch, repo_ref)
@@ -528,7 +689,8 @@ def download_github_files(directory, owner, repo_name, repo_ref):
         repo_download = requests.get(repo_archive_url)
 
     if repo_download.status_code != 200:
-        sys.exit(f"Error: Archive request failed with HTTP {repo_download.status_code}")
+        logging.error(f"Error: Archive request failed with HTTP {repo_download.status_code}")
+        raise GithubUrlError
     repo_zip = repo_download.content
 
     repo_name_full = owner + "_" + repo_name
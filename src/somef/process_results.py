@@ -23,6 +23,8 @@ class Result:
                 constants.PROP_DATE: datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             },
         }
+        # message of the error that stopped the analysis (the results are partial), or None
+        self.error = None
 
     def add_result(self, category, result, confidence, technique, source=""):
         """
@@ -2,13 +2,83 @@ import logging
 import os
 import re
 import markdown
-import requests
 import validators
-from .utils import constants
+from .utils import constants, regexp
+from . import url_resolution
 from .process_results import Result
+from .url_resolution import ResolutionQueue
 from urllib.parse import urlparse
 
 
+def find_readme_anchors(readme_text):
+    """
+    Scans the text of a README once and returns the anchors found in it (see constants.REGEXP_README_ANCHORS).
+    An extractor cannot find any result in a README that does not contain its anchor.
+    Parameters
+    ----------
+    @param readme_text: raw text of the readme file
+
+    Returns
+    -------
+    @return set with the names of the anchors found (bibtex, doi, binder, readthedocs, status, wiki, support, pypi,
+    images, arxiv)
+    """
+    anchors = set()
+    for match in regexp.REGEXP_README_ANCHORS.finditer(readme_text):
+        anchors.add(match.lastgroup)
+    return anchors
+
+
+def extract_readme_metadata(unfiltered_text, repo_url, local_repo, repository_metadata: Result, readme_source,
+                            def_branch, resolution_queue: ResolutionQueue = None) -> Result:
+    """
+    Function that runs all the regular expression extractors on a README.
+    The README is scanned once for the anchors of all extractors, and only the extractors whose anchors appear in the
+    text are run. Results are added in the same order as running each extractor on the full text.
+    Parameters
+    ----------
+    @param unfiltered_text: Text of the readme
+    @param repo_url: Repository URL (may be None)
+    @param local_repo: Local repo path (may be None)
+    @param repository_metadata: Result with all the processed results so far
+    @param readme_source: source to the readme file used
+    @param def_branch: default branch of the repo
+    @param resolution_queue: queue where URL checks (repository wiki, package links) are deferred to. If None, URLs
+    are checked while extracting
+
+    Returns
+    -------
+    @return Result with all the findings of the regular expression extractors
+    """
+    anchors = find_readme_anchors(unfiltered_text)
+    if "bibtex" in anchors:
+        repository_metadata = extract_bibtex(unfiltered_text, repository_metadata, readme_source)
+    if "doi" in anchors:
+        repository_metadata = extract_doi_badges(unfiltered_text, repository_metadata, readme_source)
+    repository_metadata = extract_title(unfiltered_text, repository_metadata, readme_source)
+    if "binder" in anchors:
+        repository_metadata = extract_binder_links(unfiltered_text, repository_metadata, readme_source)
+    if "readthedocs" in anchors:
+        repository_metadata = extract_readthedocs(unfiltered_text, repository_metadata, readme_source)
+    if "status" in anchors:
+        repository_metadata = extract_repo_status(unfiltered_text, repository_metadata, readme_source)
+    # the wiki of the repository is checked even if the README does not mention it
+    wiki_text = unfiltered_text if "wiki" in anchors else ""
+    repository_metadata = extract_wiki_links(wiki_text, repo_url, repository_metadata, readme_source,
+                                             resolution_queue)
+    if "support" in anchors:
+        repository_metadata = extract_support_channels(unfiltered_text, repository_metadata, readme_source)
+    if "pypi" in anchors:
+        repository_metadata = extract_package_distributions(unfiltered_text, repository_metadata, readme_source,
+                                                            resolution_queue)
+    if "images" in anchors:
+        repository_metadata = extract_images(unfiltered_text, repo_url, local_repo, repository_metadata,
+                                             readme_source, def_branch)
+    if "arxiv" in anchors:
+        repository_metadata = extract_arxiv_links(unfiltered_text, repository_metadata, readme_source)
+    return repository_metadata
+
+
 def extract_title(unfiltered_text, repository_metadata: Result, readme_source) -> Result:
     """
     Regexp to extract title (first header) from a repository
@@ -28,12 +98,11 @@ def extract_title(unfiltered_text, repository_metadata: Result, readme_source) -
     index = 0
     limit = len(splitted)
     output = ""
-    regex = r'<[^<>]+>'
     while index < limit:
         line = splitted[index]
         if line.startswith("<h"):
             if line.startswith("<h1>"):
-                output = re.sub(regex, '', line)
+                output = regexp.REGEXP_HEADER_TAGS.sub('', line)
             break
         index += 1
     repository_metadata.add_result(constants.CAT_FULL_TITLE,
@@ -85,7 +154,7 @@ def extract_readthedocs(readme_text, repository_metadata: Result, readme_source)
     -------
     @return Result including links to the readthedocs documentation
     """
-    readthedocs_links = re.findall(constants.REGEXP_READTHEDOCS, readme_text)
+    readthedocs_links = regexp.REGEXP_READTHEDOCS.findall(readme_text)
     name = ""
     try:
         name = repository_metadata.results[constants.CAT_NAME][0]
@@ -100,7 +169,7 @@ def extract_readthedocs(readme_text, repository_metadata: Result, readme_source)
         }
         try:
             # if name of the repo is known then compare against the readthedocs one. Only add it if it's similar/same
-            name_in_link = re.findall('https://([^.]+)\.readthedocs\.io', link)
+            name_in_link = regexp.REGEXP_READTHEDOCS_NAME.findall(link)
             name_in_link = name_in_link[0]
             if name == "" or name_in_link.lower() == name.lower():
                 repository_metadata.add_result(constants.CAT_DOCUMENTATION, result, 1,
@@ -200,8 +269,8 @@ def extract_arxiv_links(unfiltered_text,repository_metadata: Result, readme_sour
     -------
     @returns a Result including the arxiv url 
     """
-    result_links = [m.start() for m in re.finditer('https://arxiv.org/', unfiltered_text)]
-    result_refs = [m.start() for m in re.finditer('arXiv:', unfiltered_text)]
+    result_links = [m.start() for m in regexp.REGEXP_ARXIV_LINKS.finditer(unfiltered_text)]
+    result_refs = [m.start() for m in regexp.REGEXP_ARXIV_REFS.finditer(unfiltered_text)]
     results = []
     for position in result_links:
         end = unfiltered_text.find(')',position)
@@ -225,7 +294,8 @@ def extract_arxiv_links(unfiltered_text,repository_metadata: Result, readme_sour
     return repository_metadata
 
 
-def extract_wiki_links(unfiltered_text, repo_url, repository_metadata: Result, readme_source) -> Result:
+def extract_wiki_links(unfiltered_text, repo_url, repository_metadata: Result, readme_source,
+                       resolution_queue: ResolutionQueue = None) -> Result:
     """
 
     Parameters
@@ -234,13 +304,15 @@ def extract_wiki_links(unfiltered_text, repo_url, repository_metadata: Result, r
     @param repo_url: repository URL
     @param repository_metadata: results found in the repository so far
     @param readme_source: readme URL/path
+    @param resolution_queue: queue where the check of the repository wiki is deferred to. If None, the wiki is
+    checked immediately
 
     Returns
     -------
     @return a Result with the wiki documentation links found in the README
     """
     """Extracts wiki links from a given text"""
-    links = re.findall(r"\[[^\]]*\]\((.*?)?\)", unfiltered_text)
+    links = regexp.REGEXP_WIKI_LINKS.findall(unfiltered_text)
     output = []
     ends = 0
     for link in links:
@@ -257,27 +329,37 @@ def extract_wiki_links(unfiltered_text, repo_url, repository_metadata: Result, r
                             output.append(link)
             unfiltered_text = unfiltered_text[ends + len(link):]
 
+    def add_wiki_links(links):
+        for wiki_link in links:
+            repository_metadata.add_result(constants.CAT_DOCUMENTATION,
+                                           {
+                                               constants.PROP_TYPE: constants.URL,
+                                               constants.PROP_VALUE: wiki_link,
+                                               constants.PROP_FORMAT: constants.FORMAT_WIKI
+                                           },
+                                           1, constants.TECHNIQUE_REGULAR_EXPRESSION, readme_source)
+
     # to check if a wiki url is available in the repository
     if repo_url != "" and repo_url is not None and validators.url(repo_url):
         if repo_url.endswith("/"):
             repo_url = repo_url + "wiki"
         else:
             repo_url = repo_url + "/wiki"
-        wiki = requests.get(repo_url, allow_redirects=False)
-        if wiki.status_code == 200:
-            # sometimes the repo starts with caps
-            links_in_list = [x.lower() for x in output]
-            if repo_url.lower() not in links_in_list:
-                output.append(repo_url)
-
-    for link in output:
-        repository_metadata.add_result(constants.CAT_DOCUMENTATION,
-                                       {
-                                           constants.PROP_TYPE: constants.URL,
-                                           constants.PROP_VALUE: link,
-                                           constants.PROP_FORMAT: constants.FORMAT_WIKI
-                                       },
-                                       1, constants.TECHNIQUE_REGULAR_EXPRESSION, readme_source)
+
+        def add_repository_wiki(wiki):
+            if wiki is not None and wiki.status_code == 200:
+                # sometimes the repo starts with caps
+                links_in_list = [x.lower() for x in output]
+                if repo_url.lower() not in links_in_list:
+                    add_wiki_links([repo_url])
+
+        if resolution_queue is None:
+            add_wiki_links(output)
+            add_repository_wiki(url_resolution.check_url(repo_url, allow_redirects=False))
+            return repository_metadata
+        resolution_queue.add(repo_url, add_repository_wiki, allow_redirects=False)
+
+    add_wiki_links(output)
     return repository_metadata
 
 
@@ -307,7 +389,7 @@ def extract_images(unfiltered_text, repo_url, local_repo, repository_metadata: R
         repo_name = path_components[2]
 
     html_text = markdown.markdown(unfiltered_text)
-    img_md = re.findall(constants.REGEXP_IMAGES, html_text)
+    img_md = regexp.REGEXP_IMAGES.findall(html_text)
     img_html = [_.start() for _ in re.finditer("<img ", html_text)]
     for img in img_md:
         img = img[1]  # the 0 position is the name used in the link
@@ -371,7 +453,8 @@ def extract_images(unfiltered_text, repo_url, local_repo, repository_metadata: R
     return repository_metadata
 
 
-def extract_package_distributions(unfiltered_text, repository_metadata: Result, readme_source) -> Result:
+def extract_package_distributions(unfiltered_text, repository_metadata: Result, readme_source,
+                                  resolution_queue: ResolutionQueue = None) -> Result:
     """
     Function that takes readme text as input (cleaned from markdown notation) and runs a regex expression on top of it.
     Extracts package distributions from a given text
@@ -381,6 +464,8 @@ def extract_package_distributions(unfiltered_text, repository_metadata: Result,
     @param unfiltered_text: Text of the readme
     @param repository_metadata: Result with all the processed results so far
     @param readme_source: source to the readme file used
+    @param resolution_queue: queue where the resolution of the package link is deferred to. If None, the link is
+    resolved immediately
 
     Returns
     -------
@@ -395,12 +480,23 @@ def extract_package_distributions(unfiltered_text, repository_metadata: Result,
         init = unfiltered_text.find(")](", index_package_distribution)
         end = unfiltered_text.find(")", init + 3)
         package_distribution = unfiltered_text[init + 3:end]
-        output = requests.get(package_distribution).url
-        repository_metadata.add_result(constants.CAT_PACKAGE_DISTRIBUTION,
-                                       {
-                                           constants.PROP_TYPE: constants.URL,
-                                           constants.PROP_VALUE: output
-                                       }, 1, constants.TECHNIQUE_REGULAR_EXPRESSION, readme_source)
+
+        def add_package_distribution(output):
+            repository_metadata.add_result(constants.CAT_PACKAGE_DISTRIBUTION,
+                                           {
+                                               constants.PROP_TYPE: constants.URL,
+                                               constants.PROP_VALUE: output
+                                           }, 1, constants.TECHNIQUE_REGULAR_EXPRESSION, readme_source)
+
+        def add_resolved_package_distribution(response):
+            # the link is kept as written in the README if it cannot be resolved
+            add_package_distribution(package_distribution if response is None else response.url)
+
+        if resolution_queue is None:
+            add_resolved_package_distribution(url_resolution.check_url(package_distribution))
+        else:
+            resolution_queue.add(package_distribution, add_resolved_package_distribution,
+                                 lambda: add_package_distribution(package_distribution))
 
     return repository_metadata
 
@@ -417,7 +513,7 @@ def extract_colab_links(text):
     A list of colab links found in the text passed as a parameter.
     """
     output = []
-    links = re.findall(constants.REGEXP_LINKS, text)
+    links = regexp.REGEXP_LINKS.findall(text)
     for link in links:
         link_url = link[1]
         if link_url.startswith(constants.REGEXP_COLAB):
@@ -426,39 +522,40 @@ def extract_colab_links(text):
 
 
 def remove_html_tags(text):
-    regex = re.compile('<.*?>')
-    clean_text = re.sub(regex, '', text)
+    clean_text = regexp.REGEXP_HTML_TAGS.sub('', text)
     return clean_text
 
 
 def remove_links_images(text):
-    """Removes links from images in a given text"""
-    # process images
-    images = re.findall(constants.REGEXP_IMAGES, text)
-    for image in images:
-        link_text = image[1]
-        pos = text.find(link_text)
-        if pos != -1:
-            init = text[:pos].rindex("![")
-            end = text[pos:].index(")")
-            image_text = text[init:pos + end + 1]
-            text = text.replace(image_text, "")
-
-    # process links
-    links = re.findall(constants.REGEXP_LINKS, text)
-    for link in links:
-        link_text = link[1]
-        pos = text.find("(" + link_text + ")")
-        if pos != -1:
-            init = text[:pos].rindex("[")
-            end = text[pos:].index(")")
-            link_text = text[init:pos + end + 1]
-            text = text.replace(link_text, "")
+    """
+    Removes images and links from a given text.
+    Images are removed first, so badges wrapped in links (e.g., [![badge](img)](link)) disappear completely.
+    Each markdown element is removed from its innermost opening bracket, so any text before a nested bracket is kept.
+    The text is scanned once per element type, which keeps link-heavy READMEs (e.g., awesome lists) linear.
+    Parameters
+    ----------
+    @param text: markdown text to clean
 
+    Returns
+    -------
+    @return the text without images and links, stripped of surrounding blank spaces
+    """
+    text = regexp.REGEXP_IMAGES.sub(lambda m: _keep_before_bracket(m, "!["), text)
+    text = regexp.REGEXP_LINKS.sub(lambda m: _keep_before_bracket(m, "["), text)
     # remove blank spaces and \n
     return text.strip()
 
 
+def _keep_before_bracket(match, bracket):
+    """Returns the part of a link/image match that precedes its innermost opening bracket"""
+    start = match.start()
+    url_start = match.start(2)
+    if url_start < 0:
+        url_start = match.end()
+    init = match.string.rfind(bracket, start, url_start)
+    return match.string[start:init]
+
+
 def extract_bibtex(readme_text, repository_metadata: Result, readme_source) -> Result:
     """
     Function takes readme text as input (cleaned from markdown notation) and runs a regex expression on top of it.
@@ -474,7 +571,7 @@ def extract_bibtex(readme_text, repository_metadata: Result, readme_source) -> R
     -------
     @returns Result object with the bibtex associated with this software component
     """
-    citations = re.findall(constants.REGEXP_BIBTEX, readme_text)
+    citations = regexp.REGEXP_BIBTEX.findall(readme_text)
     for c in citations:
         # try to detect the doi with a regular expression. We should improve this to load an existing library
         result = {
@@ -516,7 +613,7 @@ def extract_doi_badges(readme_text, repository_metadata: Result, source) -> Resu
     """
     # regex = r'\[\!\[DOI\]([^\]]+)\]\(([^)]+)\)'
     # regex = r'\[\!\[DOI\]\(.+\)\]\(([^)]+)\)'
-    doi_badges = re.findall(constants.REGEXP_DOI, readme_text)
+    doi_badges = regexp.REGEXP_DOI.findall(readme_text)
     # The identifier is in position 1. Position 0 is the badge id, which we don't want to export
     for doi in doi_badges:
         repository_metadata.add_result(constants.CAT_IDENTIFIER,
@@ -540,7 +637,7 @@ def extract_binder_links(readme_text, repository_metadata: Result, source) -> Re
     -------
     Links with binder notebooks/scripts that are ready to be executed.
     """
-    links = re.findall(constants.REGEXP_BINDER, readme_text, re.IGNORECASE)
+    links = regexp.REGEXP_BINDER.findall(readme_text)
     binder_links = [result[1] for result in links]
     # extract binder links and remove duplicates
     binder_links += extract_colab_links(readme_text)
@@ -0,0 +1,174 @@
+import logging
+import os
+import re
+
+from .utils import constants
+
+
+class WalkOptions:
+    """
+    Options of the walks of the files of a repository (see walk_repository): folders that are skipped (e.g.,
+    dependencies and build outputs), whether the .gitignore files are applied, and the budget of each walk (number of
+    files and bytes, no limit if None)
+    """
+
+    def __init__(self, pruned_dirs=constants.WALK_PRUNED_DIRS, gitignore=False, max_files=constants.WALK_MAX_FILES,
+                 max_bytes=constants.WALK_MAX_BYTES):
+        self.pruned_dirs = frozenset(pruned_dirs)
+        self.gitignore = gitignore
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+
+
+def walk_repository(repo_dir, options=None):
+    """
+    Walks the folders of a repository top-down, as os.walk, skipping the pruned folders and the files ignored by the
+    .gitignore files of the repository (if options.gitignore), and stopping when the budget of files or bytes of the
+    walk is exhausted
+    Parameters
+    ----------
+    @param repo_dir: folder of the repository
+    @param options: WalkOptions. If None, the default folders are pruned (see constants.WALK_PRUNED_DIRS)
+
+    Returns
+    -------
+    @return: generator of (dir_path, dir_names, filenames), as os.walk
+    """
+    if options is None:
+        options = WalkOptions()
+    # .gitignore rules, by folder (relative to repo_dir)
+    ignore_rules = {}
+    files = 0
+    total_bytes = 0
+    for dir_path, dir_names, filenames in os.walk(repo_dir):
+        relative_path = os.path.relpath(dir_path, repo_dir).replace(os.sep, "/")
+        if relative_path == ".":
+            relative_path = ""
+        if options.gitignore and ".gitignore" in filenames:
+            ignore_rules[relative_path] = read_gitignore(os.path.join(dir_path, ".gitignore"))
+        dir_names[:] = [name for name in dir_names if name not in options.pruned_dirs and
+                        not is_ignored(posix_join(relative_path, name), True, ignore_rules)]
+        if ignore_rules:
+            filenames = [name for name in filenames if not is_ignored(posix_join(relative_path, name), False,
+                                                                      ignore_rules)]
+        exhausted = False
+        if options.max_files is not None and files + len(filenames) > options.max_files:
+            filenames = filenames[:options.max_files - files]
+            exhausted = True
+        if options.max_bytes is not None:
+            for index, name in enumerate(filenames):
+                try:
+                    size = os.path.getsize(os.path.join(dir_path, name))
+                except OSError:
+                    continue
+                if total_bytes + size > options.max_bytes:
+                    filenames = filenames[:index]
+                    exhausted = True
+                    break
+                total_bytes += size
+        files += len(filenames)
+        if exhausted:
+            logging.warning(f"Stopped walking {repo_dir} after {files} files ({total_bytes} bytes): the rest of the "
+                            f"files of the repository are not analyzed")
+            dir_names[:] = []
+            yield dir_path, dir_names, filenames
+            return
+        yield dir_path, dir_names, filenames
+
+
+def posix_join(relative_path, name):
+    return relative_path + "/" + name if relative_path else name
+
+
+def read_gitignore(file_path):
+    """
+    Reads the patterns of a .gitignore file
+    Parameters
+    ----------
+    @param file_path: path of the .gitignore file
+
+    Returns
+    -------
+    @return: list of (regular expression, negated, directory_only), in the order of the file
+    """
+    rules = []
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as gitignore_file:
+            lines = gitignore_file.read().splitlines()
+    except OSError as e:
+        logging.error("Error while reading " + file_path + ": " + str(e))
+        return rules
+    for line in lines:
+        line = line.rstrip()
+        if line == "" or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated or line.startswith("\\"):
+            line = line[1:]
+        directory_only = line.endswith("/")
+        line = line.rstrip("/")
+        # patterns with a "/" are relative to the folder of the .gitignore, and the rest match names at any level
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if line == "":
+            continue
+        expression = translate_pattern(line)
+        if not anchored:
+            expression = "(?:.*/)?" + expression
+        rules.append((re.compile(expression + "$"), negated, directory_only))
+    return rules
+
+
+def translate_pattern(pattern):
+    """Translates a .gitignore pattern into a regular expression (* and ? do not match /, and ** matches folders)"""
+    expression = ""
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            expression += "(?:.*/)?"
+            index += 3
+        elif pattern.startswith("**", index):
+            expression += ".*"
+            index += 2
+        elif pattern[index] == "*":
+            expression += "[^/]*"
+            index += 1
+        elif pattern[index] == "?":
+            expression += "[^/]"
+            index += 1
+        elif pattern[index] == "[" and "]" in pattern[index + 2:]:
+            end = pattern.index("]", index + 2)
+            expression += "[" + pattern[index + 1:end].replace("!", "^", 1).replace("\\", "\\\\") + "]"
+            index = end + 1
+        else:
+            expression += re.escape(pattern[index])
+            index += 1
+    return expression
+
+
+def is_ignored(relative_path, is_dir, ignore_rules):
+    """
+    Checks if a file or folder is ignored by the .gitignore files read so far (the last matching pattern wins, and the
+    patterns of a folder override those of its parents)
+    Parameters
+    ----------
+    @param relative_path: path of the file or folder in the repository, with "/" as separator
+    @param is_dir: True if the path is a folder
+    @param ignore_rules: .gitignore rules by folder, as returned by read_gitignore
+
+    Returns
+    -------
+    @return: True if the path is ignored
+    """
+    if not ignore_rules:
+        return False
+    ignored = False
+    parts = relative_path.split("/")
+    for depth in range(len(parts)):
+        base = "/".join(parts[:depth])
+        for expression, negated, directory_only in ignore_rules.get(base, []):
+            if directory_only and not is_dir:
+                continue
+            if expression.match("/".join(parts[depth:])):
+                ignored = not negated
+    return ignored
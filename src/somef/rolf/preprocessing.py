@@ -12,6 +12,7 @@ from bs4 import BeautifulSoup
 import re, string, unicodedata
 from nltk.stem import LancasterStemmer, WordNetLemmatizer
 from nltk import word_tokenize
+from ..utils import regexp
 
 
 TEXT = 'Text'
@@ -38,10 +39,10 @@ class Preprocessor:
 		return [word for word in text if word not in stop_words]
 		
 	def remove_codeblocks(self, text):
-		return re.sub('```.*?```', ' ', text)
+		return regexp.REGEXP_CODE_BLOCKS.sub(' ', text)
 
 	def remove_punctuation(self, text):
-		res = re.sub(r'[^\w\s]|\_', ' ', text)
+		res = regexp.REGEXP_PUNCTUATION.sub(' ', text)
 		return res
 
 	def remove_non_ascii(self, words):
@@ -114,8 +115,7 @@ class Preprocessor:
 		return res
 
 	def remove_links(self, text):
-		regex = r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»“”‘’]))"
-		return (re.sub(regex, '', text))
+		return regexp.REGEXP_URLS.sub('', text)
 
 	def remove_links2(self, text):
 		return ' '.join([token for token in text.split(' ') if 'http' not in token])
@@ -0,0 +1,312 @@
+import io
+import json
+import logging
+import os
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import validators
+
+from . import configuration, somef_cli, supervised_classification
+from .export import json_export
+from .export.reconciliation import ReconciledResults
+from .export.turtle_export import DataGraph
+from .utils import constants
+
+# archives that can be uploaded to the service (content type -> archive format)
+ARCHIVE_TYPES = {
+    "application/zip": "zip",
+    "application/x-zip-compressed": "zip",
+    "application/x-tar": "tar",
+    "application/gzip": "tar",
+    "application/x-gzip": "tar",
+    "application/x-gtar": "tar"
+}
+# content type of each output format
+CONTENT_TYPES = {
+    constants.SERVER_FORMAT_JSON: "application/json",
+    constants.SERVER_FORMAT_CODEMETA: "application/ld+json",
+    constants.SERVER_FORMAT_TURTLE: "text/turtle"
+}
+
+
+class RequestError(Exception):
+    """Error in a request to the service, answered with an HTTP status (400 by default) and a JSON message"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class SomefServer(ThreadingHTTPServer):
+    """
+    HTTP server running SOMEF (see serve). Requests are received in separate threads, and the analyses are run in a
+    pool of workers, so at most `workers` repositories are analyzed at once. Since the server is a long-running
+    process, the classifiers and WordNet groups are only loaded once.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, workers=constants.SERVER_DEFAULT_WORKERS,
+                 max_upload_mb=constants.SERVER_MAX_UPLOAD_MB):
+        super().__init__(address, SomefRequestHandler)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="somef-worker")
+        self.max_upload = max_upload_mb * 2 ** 20
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+class SomefRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles the requests to the service:
+        GET /health: status of the service
+        POST /describe: analyzes a repository URL or a README text (JSON body), or an uploaded archive of a
+        repository (zip or tar body, with the options in the query string). See describe for the options.
+    """
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/describe":
+            self.send_json(404, {"error": "Not found"})
+            return
+        try:
+            options, archive = self.read_request()
+            content_type, body = self.server.executor.submit(describe, options, archive).result()
+            self.send(200, content_type, body)
+        except RequestError as e:
+            self.send_json(e.status, {"error": str(e)})
+        # the analysis may call sys.exit (e.g., if a classifier file is missing), which would stop the handler
+        # without answering the request
+        except (Exception, SystemExit) as e:
+            logging.error("Error while processing request: " + str(e))
+            self.send_json(500, {"error": "Error while processing the request: " + str(e)})
+
+    def read_request(self):
+        """
+        Reads the options of a request (query string and JSON body) and the uploaded archive, if any
+        Returns
+        -------
+        @return: dictionary with the options, and a pair (archive format, archive content) or None
+        """
+        options = {key: values[-1] for key, values in parse_qs(urlparse(self.path).query).items()}
+        length = self.headers.get("Content-Length")
+        if length is None:
+            raise RequestError("Content-Length required", 411)
+        try:
+            length = int(length)
+        except ValueError:
+            raise RequestError("Invalid Content-Length")
+        # a negative length would read the connection until the client closes it
+        if length < 0:
+            raise RequestError("Invalid Content-Length")
+        if length > self.server.max_upload:
+            raise RequestError("Request too large", 413)
+        body = self.rfile.read(length)
+        content_type = self.headers.get_content_type()
+        if content_type in ARCHIVE_TYPES:
+            return options, (ARCHIVE_TYPES[content_type], body)
+        if content_type != "application/json" and len(body) > 0:
+            raise RequestError("Unsupported content type: " + content_type, 415)
+        if len(body) > 0:
+            try:
+                body_options = json.loads(body)
+            except ValueError:
+                raise RequestError("Invalid JSON body")
+            if not isinstance(body_options, dict):
+                raise RequestError("The JSON body must be an object")
+            options.update(body_options)
+        return options, None
+
+    def send(self, status, content_type, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type + "; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status, data):
+        self.send(status, "application/json", json.dumps(data))
+
+    def log_message(self, format, *args):
+        logging.info("%s - " + format, self.address_string(), *args)
+
+
+def parse_flag(value):
+    """Reads a boolean option, given in JSON (true/false) or in the query string (true/false, 1/0, yes/no)"""
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ["true", "1", "yes"]
+
+
+def describe(options, archive=None):
+    """
+    Runs SOMEF with the options of a request
+    Parameters
+    ----------
+    @param options: dictionary with the options of the request:
+        repo_url: URL of the repository to analyze
+        readme: text of the README to analyze (if no repo_url is given)
+        format: output format (json, codemeta or turtle). json by default
+        threshold: threshold to filter annotations. 0.8 by default
+        ignore_classifiers, ignore_github_metadata, readme_only, offline: flags, as in somef describe
+    @param archive: pair (archive format, content) with the uploaded repository, if any
+
+    Returns
+    -------
+    @return: content type and text of the results
+    """
+    output_format = options.get("format", constants.SERVER_FORMAT_JSON)
+    if output_format not in CONTENT_TYPES:
+        raise RequestError("Unknown format: " + str(output_format) + ". Use one of " + ", ".join(CONTENT_TYPES))
+    try:
+        threshold = float(options.get("threshold", 0.8))
+    except (TypeError, ValueError):
+        raise RequestError("Invalid threshold: " + str(options.get("threshold")))
+    ignore_classifiers = parse_flag(options.get("ignore_classifiers", False))
+    offline = parse_flag(options.get("offline", False))
+    repo_url = options.get("repo_url")
+    readme = options.get("readme")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if archive is not None:
+            local_repo = extract_archive(archive[0], archive[1], temp_dir)
+            repository_metadata = somef_cli.cli_get_data(threshold, ignore_classifiers, local_repo=local_repo,
+                                                         offline=offline)
+        elif repo_url is not None:
+            if not validators.url(repo_url):
+                raise RequestError("Not a valid repository url: " + str(repo_url))
+            repository_metadata = somef_cli.cli_get_data(
+                threshold, ignore_classifiers, repo_url=repo_url,
+                ignore_github_metadata=parse_flag(options.get("ignore_github_metadata", False)),
+                readme_only=parse_flag(options.get("readme_only", False)), offline=offline)
+        elif readme is not None:
+            doc_src = os.path.join(temp_dir, "README.md")
+            with open(doc_src, "w", encoding="UTF-8") as doc_fh:
+                doc_fh.write(str(readme))
+            repository_metadata = somef_cli.cli_get_data(threshold, ignore_classifiers, doc_src=doc_src,
+                                                         offline=offline)
+        else:
+            raise RequestError("One of repo_url, readme or an archive of the repository is required")
+    return CONTENT_TYPES[output_format], export_results(repository_metadata.results, output_format)
+
+
+def export_results(results, output_format):
+    """
+    Serializes the results of a repository in one of the output formats of the service
+    Parameters
+    ----------
+    @param results: results of the repository (Result.results)
+    @param output_format: json, codemeta or turtle
+
+    Returns
+    -------
+    @return: the serialized results
+    """
+    if output_format == constants.SERVER_FORMAT_JSON:
+        return json_export.serialize_json(results)
+    reconciled_results = ReconciledResults(results)
+    if output_format == constants.SERVER_FORMAT_CODEMETA:
+        return json_export.serialize_json(reconciled_results.codemeta)
+    data_graph = DataGraph()
+    data_graph.somef_data_to_graph(reconciled_results)
+    return data_graph.g.serialize(format="turtle")
+
+
+def extract_archive(archive_format, content, directory, max_size_mb=constants.SERVER_MAX_EXTRACTED_MB,
+                    max_entries=constants.SERVER_MAX_ARCHIVE_ENTRIES):
+    """
+    Extracts an uploaded archive of a repository. Entries outside the directory (absolute paths, "..") are rejected,
+    and so are archives whose files are too big once extracted (e.g., zip bombs)
+    Parameters
+    ----------
+    @param archive_format: zip or tar (tar archives may be compressed)
+    @param content: bytes of the archive
+    @param directory: directory where the archive is extracted
+    @param max_size_mb: maximum total size of the extracted files (MB)
+    @param max_entries: maximum number of entries of the archive
+
+    Returns
+    -------
+    @return: path of the repository: the only folder of the archive, or the directory if there are several entries
+    """
+    extract_dir = os.path.join(directory, "repo")
+    try:
+        if archive_format == "zip":
+            with zipfile.ZipFile(io.BytesIO(content), "r") as zip_ref:
+                members = zip_ref.infolist()
+                check_archive_size([member.file_size for member in members], max_size_mb, max_entries)
+                # zipfile removes absolute paths and ".." from the names of the entries
+                zip_ref.extractall(extract_dir)
+        else:
+            with tarfile.open(fileobj=io.BytesIO(content), mode="r:*") as tar_ref:
+                members = [member for member in tar_ref.getmembers() if member.isfile() or member.isdir()]
+                check_archive_size([member.size for member in members], max_size_mb, max_entries)
+                for member in members:
+                    member_path = os.path.realpath(os.path.join(extract_dir, member.name))
+                    if not member_path.startswith(os.path.realpath(extract_dir) + os.sep):
+                        raise RequestError("Invalid path in archive: " + member.name)
+                tar_ref.extractall(extract_dir, members=members)
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+        raise RequestError("Invalid archive: " + str(e))
+    if not os.path.isdir(extract_dir):
+        raise RequestError("Empty archive")
+    entries = os.listdir(extract_dir)
+    if len(entries) == 1 and os.path.isdir(os.path.join(extract_dir, entries[0])):
+        return os.path.join(extract_dir, entries[0])
+    return extract_dir
+
+
+def check_archive_size(sizes, max_size_mb, max_entries):
+    """Rejects an archive with more entries than max_entries, or whose files add up to more than max_size_mb"""
+    if len(sizes) > max_entries:
+        raise RequestError(f"The archive has more than {max_entries} entries", 413)
+    if sum(sizes) > max_size_mb * 2 ** 20:
+        raise RequestError(f"The archive is bigger than {max_size_mb} MB once extracted", 413)
+
+
+def warm_up():
+    """Loads the classifiers, so the first requests do not have to (the WordNet groups are loaded on import)"""
+    try:
+        file_paths = configuration.get_configuration_file()
+        for category in constants.supervised_categories:
+            if category in file_paths.keys() and os.path.exists(file_paths[category]):
+                supervised_classification.load_model(file_paths[category])
+        supervised_classification.load_category_models()
+    except Exception as e:
+        logging.warning("Could not load the classifiers: " + str(e))
+
+
+def serve(host=constants.SERVER_DEFAULT_HOST, port=constants.SERVER_DEFAULT_PORT,
+          workers=constants.SERVER_DEFAULT_WORKERS, max_upload_mb=constants.SERVER_MAX_UPLOAD_MB):
+    """
+    Runs SOMEF as an HTTP service until interrupted
+    Parameters
+    ----------
+    @param host: address where the service listens
+    @param port: port where the service listens
+    @param workers: number of repositories analyzed at once
+    @param max_upload_mb: maximum size of the requests (e.g., uploaded archives), in MB
+
+    Returns
+    -------
+    @return: Does not return a value
+    """
+    warm_up()
+    server = SomefServer((host, port), workers, max_upload_mb)
+    logging.info(f"SOMEF service listening on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,22 +1,32 @@
+import contextlib
+import itertools
 import sys
 import validators
 import logging
 import os
 import tempfile
+import tracemalloc
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from os import path
 from . import header_analysis, regular_expressions, process_repository, configuration, process_files, \
-    supervised_classification
+    supervised_classification, url_resolution, analysis_cache
 from .process_results import Result
 from .utils import constants, markdown_utils
 from .parser import mardown_parser, create_excerpts
-from .export.turtle_export import DataGraph
+from .export.turtle_export import DataGraph, STREAMING_FORMATS
+from .export.reconciliation import ReconciledResults
 from .export import json_export
+from .timing import Profiler, StageTimer, peak_rss_mb, profile_path
 from .extract_software_type import check_repository_type
+from .repository_walk import WalkOptions
 
 
 def cli_get_data(threshold, ignore_classifiers, repo_url=None, doc_src=None, local_repo=None,
-                 ignore_github_metadata=False, readme_only=False, keep_tmp=None) -> Result:
+                 ignore_github_metadata=False, readme_only=False, keep_tmp=None, offline=False,
+                 timing=False, timer=None, fetch_mode=constants.FETCH_MODE_ARCHIVE,
+                 mirror_dir=constants.MIRROR_DEFAULT_DIR, cache=None, walk_options=None) -> Result:
     """
     Main function to get the data through the command line
     Parameters
@@ -29,11 +39,24 @@ def cli_get_data(threshold, ignore_classifiers, repo_url=None, doc_src=None, loc
     @param ignore_github_metadata: flag used to avoid doing extra requests to the GitHub API
     @param readme_only: flag to indicate that only the readme should be analyzed
     @param keep_tmp: path where to store TMP files in case SOMEF is instructed to keep them
+    @param offline: flag to skip the URL checks of the regular expression extractors (wiki and package links)
+    @param timing: flag to measure the time spent in each stage, added to the provenance of the results
+    @param timer: StageTimer measuring the stages (e.g., to profile their memory). If None, one is created
+    @param fetch_mode: how the files of a repository are obtained (see constants.FETCH_MODES): its archive, or only
+    the README and key files (GitHub repositories)
+    @param mirror_dir: folder where the git mirrors of the repositories are kept, with the mirror fetch mode
+    @param cache: AnalysisCache with the results of previous analyses. Only the extractors whose input files (README,
+    ontologies, workflows) changed are run, and the cached results are used for the rest
+    @param walk_options: WalkOptions with the folders skipped and the budget of the walks of the repository files. If
+    None, the default folders (see constants.WALK_PRUNED_DIRS) are skipped
 
     Returns
     -------
-    @return: Dictionary with the results found by SOMEF, formatted as a Result object.
+    @return: Dictionary with the results found by SOMEF, formatted as a Result object. If the analysis failed, the
+    results are partial and the error of the Result is set
     """
+    if timer is None:
+        timer = StageTimer(timing)
     file_paths = configuration.get_configuration_file()
     repo_type = constants.RepositoryType.GITHUB
     repository_metadata = Result()
@@ -42,51 +65,57 @@ def cli_get_data(threshold, ignore_classifiers, repo_url=None, doc_src=None, loc
         try:
             if repo_url.rfind("gitlab.com") > 0:
                 repo_type = constants.RepositoryType.GITLAB
-            repository_metadata, owner, repo_name, def_branch = process_repository.load_online_repository_metadata(
-                repository_metadata,
-                repo_url,
-                ignore_github_metadata,
-                repo_type)
+            with timer.stage(constants.STAGE_GITHUB_API):
+                repository_metadata, owner, repo_name, def_branch = \
+                    process_repository.load_online_repository_metadata(repository_metadata, repo_url,
+                                                                       ignore_github_metadata, repo_type)
             # download files and obtain path to download folder
             if readme_only:
                 # download readme only with the information above
-                readme_text = process_repository.download_readme(owner, repo_name, def_branch, repo_type)
-
-            elif keep_tmp is not None:  # save downloaded files locally
-                os.makedirs(keep_tmp, exist_ok=True)
-                local_folder = process_repository.download_repository_files(owner, repo_name, def_branch, repo_type,
-                                                                            keep_tmp, repo_url)
-                readme_text, full_repository_metadata = process_files.process_repository_files(local_folder,
-                                                                                               repository_metadata,
-                                                                                               repo_type, owner,
-                                                                                               repo_name,
-                                                                                               def_branch)
-                repository_metadata = check_repository_type(local_folder,repo_name,full_repository_metadata) 
-            else:  # Use a temp directory
+                with timer.stage(constants.STAGE_DOWNLOAD):
+                    readme_text = process_repository.download_readme(owner, repo_name, def_branch, repo_type)
+            else:
                 with tempfile.TemporaryDirectory() as temp_dir:
-                    local_folder = process_repository.download_repository_files(owner, repo_name, def_branch, repo_type,
-                                                                                temp_dir, repo_url)
-                    readme_text, full_repository_metadata = process_files.process_repository_files(local_folder,
-                                                                                                   repository_metadata,
-                                                                                                   repo_type, owner,
-                                                                                                   repo_name,
-                                                                                                   def_branch)
-                    repository_metadata = check_repository_type(local_folder,repo_name,full_repository_metadata) 
+                    target_dir = temp_dir
+                    if keep_tmp is not None:  # save downloaded files locally
+                        os.makedirs(keep_tmp, exist_ok=True)
+                        target_dir = keep_tmp
+                    with timer.stage(constants.STAGE_DOWNLOAD):
+                        local_folder = process_repository.download_repository_files(owner, repo_name, def_branch,
+                                                                                    repo_type, target_dir, repo_url,
+                                                                                    fetch_mode, mirror_dir)
+                    with timer.stage(constants.STAGE_PROCESS_FILES):
+                        readme_text, full_repository_metadata = process_files.process_repository_files(
+                            local_folder, repository_metadata, repo_type, owner, repo_name, def_branch, cache,
+                            walk_options)
+                    if fetch_mode == constants.FETCH_MODE_KEY_FILES and repo_type == constants.RepositoryType.GITHUB:
+                        # only the README and the key files are downloaded, so the repository type is not checked
+                        repository_metadata = full_repository_metadata
+                    else:
+                        with timer.stage(constants.STAGE_REPOSITORY_TYPE):
+                            repository_metadata = check_repository_type(local_folder, repo_name,
+                                                                        full_repository_metadata, cache,
+                                                                        walk_options)
             if readme_text == "":
                 logging.warning("README document does not exist in the target repository")
         except process_repository.GithubUrlError:
             logging.error("Error processing the target repository")
-            return repository_metadata
+            repository_metadata.error = "Error processing the target repository"
+            return timer.report(repository_metadata, repo_url)
     elif local_repo is not None:
         try:
-            readme_text, full_repository_metadata = process_files.process_repository_files(local_repo,
-                                                                                           repository_metadata,
-                                                                                           repo_type)
+            with timer.stage(constants.STAGE_PROCESS_FILES):
+                readme_text, full_repository_metadata = process_files.process_repository_files(local_repo,
+                                                                                               repository_metadata,
+                                                                                               repo_type,
+                                                                                               cache=cache,
+                                                                                               walk_options=walk_options)
             if readme_text == "":
                 logging.warning("Warning: README document does not exist in the local repository")
         except process_repository.GithubUrlError:
             logging.error("Error processing the input repository")
-            return repository_metadata
+            repository_metadata.error = "Error processing the input repository"
+            return timer.report(repository_metadata, local_repo)
     else:
         if doc_src is None or not path.exists(doc_src):
             logging.error("Error processing the input repository")
@@ -95,51 +124,146 @@ def cli_get_data(threshold, ignore_classifiers, repo_url=None, doc_src=None, loc
             readme_text = doc_fh.read()
     try:
         unfiltered_text = readme_text
-        repository_metadata, string_list = header_analysis.extract_categories(unfiltered_text, repository_metadata)
+        readme_options = None
+        if cache is not None and readme_text != "":
+            # the results of the README extractors are reused if the README and their options did not change
+            readme_options = analysis_cache.readme_options(repository_metadata, threshold=threshold,
+                                                           ignore_classifiers=ignore_classifiers, repo_url=repo_url,
+                                                           local_repo=local_repo, branch=def_branch, offline=offline)
+            readme_blob = analysis_cache.text_hash(readme_text)
+            readme_results = cache.get(constants.CACHE_README, "README", readme_blob, readme_options)
+            if readme_results is not analysis_cache.MISSING:
+                logging.info("The README did not change, using the results of the previous analysis")
+                analysis_cache.merge_results(repository_metadata, readme_results)
+                return timer.report(repository_metadata, repo_url or local_repo or doc_src)
+            result_counts = analysis_cache.count_results(repository_metadata)
+        with timer.stage(constants.STAGE_HEADER_ANALYSIS):
+            repository_metadata, string_list = header_analysis.extract_categories(unfiltered_text,
+                                                                                  repository_metadata)
         readme_text = markdown_utils.unmark(readme_text)
         if not ignore_classifiers and unfiltered_text != '':
-            repository_metadata = supervised_classification.run_category_classification(unfiltered_text, threshold,
-                                                                                        repository_metadata)
-            excerpts = create_excerpts.create_excerpts(string_list)
-            excerpts_headers = mardown_parser.extract_text_excerpts_header(unfiltered_text)
-            header_parents = mardown_parser.extract_headers_parents(unfiltered_text)
-            score_dict = supervised_classification.run_classifiers(excerpts, file_paths)
-            repository_metadata = supervised_classification.classify(score_dict, threshold, excerpts_headers,
-                                                                     header_parents, repository_metadata)
+            with timer.stage(constants.STAGE_CLASSIFIERS):
+                repository_metadata = supervised_classification.run_category_classification(unfiltered_text,
+                                                                                            threshold,
+                                                                                            repository_metadata)
+                excerpts = create_excerpts.create_excerpts(string_list)
+                excerpts_headers = mardown_parser.extract_text_excerpts_header(unfiltered_text)
+                header_parents = mardown_parser.extract_headers_parents(unfiltered_text)
+                score_dict = supervised_classification.run_classifiers(excerpts, file_paths)
+                repository_metadata = supervised_classification.classify(score_dict, threshold, excerpts_headers,
+                                                                         header_parents, repository_metadata)
         if readme_text != "":
             try:
                 readme_source = repository_metadata.results[constants.CAT_README_URL][0]
                 readme_source = readme_source[constants.PROP_RESULT][constants.PROP_VALUE]
             except:
                 readme_source = "README.md"
-            repository_metadata = regular_expressions.extract_bibtex(unfiltered_text, repository_metadata, readme_source)
-            repository_metadata = regular_expressions.extract_doi_badges(unfiltered_text, repository_metadata,
-                                                                         readme_source)
-            repository_metadata = regular_expressions.extract_title(unfiltered_text, repository_metadata, readme_source)
-            repository_metadata = regular_expressions.extract_binder_links(unfiltered_text, repository_metadata,
-                                                                           readme_source)
-            repository_metadata = regular_expressions.extract_readthedocs(unfiltered_text, repository_metadata,
-                                                                          readme_source)
-            repository_metadata = regular_expressions.extract_repo_status(unfiltered_text, repository_metadata,
-                                                                          readme_source)
-            repository_metadata = regular_expressions.extract_wiki_links(unfiltered_text, repo_url, repository_metadata,
-                                                                         readme_source)
-            repository_metadata = regular_expressions.extract_support_channels(unfiltered_text, repository_metadata,
-                                                                               readme_source)
-            repository_metadata = regular_expressions.extract_package_distributions(unfiltered_text,
-                                                                                    repository_metadata,
-                                                                                    readme_source)
-            repository_metadata = regular_expressions.extract_images(unfiltered_text, repo_url, local_repo,
-                                                                     repository_metadata, readme_source, def_branch)
-            repository_metadata = regular_expressions.extract_arxiv_links(unfiltered_text,repository_metadata,readme_source)
+            resolution_queue = url_resolution.ResolutionQueue()
+            with timer.stage(constants.STAGE_REGULAR_EXPRESSIONS):
+                repository_metadata = regular_expressions.extract_readme_metadata(unfiltered_text, repo_url,
+                                                                                  local_repo, repository_metadata,
+                                                                                  readme_source, def_branch,
+                                                                                  resolution_queue)
+            # URL checks are done once all the README has been analyzed
+            with timer.stage(constants.STAGE_URL_RESOLUTION):
+                if offline:
+                    resolution_queue.skip()
+                else:
+                    resolution_queue.resolve()
             logging.info("Completed extracting regular expressions")
 
-        return repository_metadata
+        if readme_options is not None:
+            cache.put(constants.CACHE_README, "README", readme_blob,
+                      analysis_cache.new_results(repository_metadata, result_counts), readme_options)
+        return timer.report(repository_metadata, repo_url or local_repo or doc_src)
 
 
     except Exception as e:
         logging.error("Error processing repository " + str(e))
-        return repository_metadata
+        repository_metadata.error = "Error processing repository " + str(e)
+        return timer.report(repository_metadata, repo_url or local_repo or doc_src)
+
+
+def describe_many(repositories, threshold=0.8, ignore_classifiers=False, ignore_github_metadata=False,
+                  readme_only=False, offline=False, timing=False, workers=1, ordered=True,
+                  fetch_mode=constants.FETCH_MODE_ARCHIVE, mirror_dir=constants.MIRROR_DEFAULT_DIR, cache=None,
+                  walk_options=None):
+    """
+    Analyzes several repositories, yielding the results of each one as soon as it is available, so they can be
+    processed (e.g., stored) without waiting for all of them or writing them to files
+    Parameters
+    ----------
+    @param repositories: iterable with the URLs of the repositories (or paths of local repositories) to analyze.
+    It is consumed as the repositories are analyzed, so it can be a generator. Invalid URLs are skipped
+    @param threshold: threshold to filter annotations. 0.8 by default
+    @param ignore_classifiers: flag to indicate if the output from the classifiers should be ignored
+    @param ignore_github_metadata: flag used to avoid doing extra requests to the GitHub API
+    @param readme_only: flag to indicate that only the readme should be analyzed
+    @param offline: flag to skip the URL checks of the regular expression extractors (wiki and package links)
+    @param timing: flag to measure the time spent in each stage, added to the provenance of the results
+    @param workers: number of repositories analyzed at once (in threads)
+    @param ordered: flag to yield the results in the order of the repositories. If False, results are yielded as
+    soon as each repository is analyzed
+    @param fetch_mode: how the files of a repository are obtained (see constants.FETCH_MODES)
+    @param mirror_dir: folder where the git mirrors of the repositories are kept, with the mirror fetch mode
+    @param cache: path of the analysis cache (SQLite database), to only run the extractors whose input files changed
+    since the previous analysis of each repository
+    @param walk_options: WalkOptions with the folders skipped and the budget of the walks of the repository files
+
+    Returns
+    -------
+    @return: generator of pairs (repository, Result). The Result is None if the analysis failed
+    """
+    workers = max(1, workers)
+
+    def describe(repository):
+        if os.path.isdir(repository):
+            return cli_get_data(threshold, ignore_classifiers, local_repo=repository, offline=offline,
+                                timing=timing, cache=analysis_results, walk_options=walk_options)
+        return cli_get_data(threshold, ignore_classifiers, repo_url=repository,
+                            ignore_github_metadata=ignore_github_metadata, readme_only=readme_only, offline=offline,
+                            timing=timing, fetch_mode=fetch_mode, mirror_dir=mirror_dir, cache=analysis_results,
+                            walk_options=walk_options)
+
+    def result(future, repository):
+        try:
+            return future.result()
+        # the analysis may call sys.exit (e.g., if a classifier file is missing), which would stop the iteration of
+        # the caller
+        except (Exception, SystemExit) as e:
+            logging.error("Error processing repository " + repository + ": " + str(e))
+            return None
+
+    def valid(repositories):
+        for repository in repositories:
+            if validators.url(repository) or os.path.isdir(repository):
+                yield repository
+            else:
+                logging.error("Not a valid repository url. Please check the url provided: " + repository)
+
+    valid_repositories = valid(repositories)
+    analysis_results = analysis_cache.AnalysisCache(cache) if cache is not None else None
+    # the cache is closed once the running analyses have finished
+    with analysis_results or contextlib.nullcontext(), ThreadPoolExecutor(max_workers=workers) as executor:
+        # a few repositories are queued for each worker, so the input is not consumed all at once
+        pending = {executor.submit(describe, repository): repository for repository in
+                   itertools.islice(valid_repositories, 2 * workers)}
+        try:
+            while len(pending) > 0:
+                if ordered:
+                    # dictionaries keep the insertion order
+                    future = next(iter(pending))
+                    wait([future])
+                else:
+                    future = next(iter(wait(pending, return_when=FIRST_COMPLETED).done))
+                repository = pending.pop(future)
+                for next_repository in itertools.islice(valid_repositories, 1):
+                    pending[executor.submit(describe, next_repository)] = next_repository
+                yield repository, result(future, repository)
+        finally:
+            # the caller stopped iterating: repositories that have not started are not analyzed
+            for future in pending:
+                future.cancel()
 
 
 def run_cli_document(doc_src, threshold, output):
@@ -162,7 +286,19 @@ def run_cli(*,
             codemeta_out=None,
             pretty=False,
             missing=False,
-            keep_tmp=None
+            keep_tmp=None,
+            offline=False,
+            timing=False,
+            profile_memory=False,
+            profile=None,
+            profile_per_repository=False,
+            fetch_mode=constants.FETCH_MODE_ARCHIVE,
+            mirror_dir=constants.MIRROR_DEFAULT_DIR,
+            cache=None,
+            prune_dirs=None,
+            gitignore=False,
+            max_walk_files=constants.WALK_MAX_FILES,
+            max_walk_mb=None
             ):
     """Function to run all the required components of the cli for a repository"""
     # check if it is a valid url
@@ -171,53 +307,140 @@ def run_cli(*,
             logging.error("Not a valid repository url. Please check the url provided")
             return None
     multiple_repos = in_file is not None
-    if multiple_repos:
-        with open(in_file, "r") as in_handle:
-            # get the line (with the final newline omitted) if the line is not empty
-            repo_list = [line[:-1] for line in in_handle if len(line) > 1]
-
-        # convert to a set to ensure uniqueness (we don't want to get the same data multiple times)
-        repo_set = set(repo_list)
-        # check if the urls in repo_set if are valid
-        remove_urls = []
-        for repo_elem in repo_set:
-            if not validators.url(repo_elem):
-                logging.error("Not a valid repository url. Please check the url provided: " + repo_elem)
-                remove_urls.append(repo_elem)
-        # remove non valid urls in repo_set
-        for remove_url in remove_urls:
-            repo_set.remove(remove_url)
-        if len(repo_set) > 0:
-            repo_data = [cli_get_data(threshold=threshold, ignore_classifiers=ignore_classifiers, repo_url=repo_url,
-                                      keep_tmp=keep_tmp) for repo_url in repo_set]
-        else:
-            return None
+    # with profile_per_repository, each repository of the input file (and the export) is profiled separately
+    per_repository = profile_per_repository and multiple_repos
+    profiler = Profiler(None if per_repository else profile)
+    # memory used in each stage of each repository (and of the export), if profile_memory is set
+    memory_reports = []
+    # tracing started before (e.g., python -X tracemalloc) is left running
+    trace_memory = profile_memory and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
+    profiler.start()
+    try:
+        analysis_results = analysis_cache.AnalysisCache(cache) if cache is not None else None
+        # folders skipped (comma separated names) and budget of the walks of the files of each repository
+        walk_options = WalkOptions(constants.WALK_PRUNED_DIRS if prune_dirs is None else
+                                   [name.strip() for name in prune_dirs.split(",") if name.strip() != ""],
+                                   gitignore, max_walk_files, None if max_walk_mb is None else max_walk_mb * 2 ** 20)
+        if multiple_repos:
+            with open(in_file, "r") as in_handle:
+                # get the line (with the final newline omitted) if the line is not empty
+                repo_list = [line[:-1] for line in in_handle if len(line) > 1]
+
+            # convert to a set to ensure uniqueness (we don't want to get the same data multiple times)
+            repo_set = set(repo_list)
+            # check if the urls in repo_set if are valid
+            remove_urls = []
+            for repo_elem in repo_set:
+                if not validators.url(repo_elem):
+                    logging.error("Not a valid repository url. Please check the url provided: " + repo_elem)
+                    remove_urls.append(repo_elem)
+            # remove non valid urls in repo_set
+            for remove_url in remove_urls:
+                repo_set.remove(remove_url)
+            if len(repo_set) > 0:
+                repo_data = []
+                for repo_elem in repo_set:
+                    timer = StageTimer(timing, profile_memory)
+                    with Profiler(profile_path(profile, repo_elem) if per_repository else None):
+                        repo_data.append(cli_get_data(threshold=threshold, ignore_classifiers=ignore_classifiers,
+                                                      repo_url=repo_elem, keep_tmp=keep_tmp, offline=offline,
+                                                      timer=timer, fetch_mode=fetch_mode, mirror_dir=mirror_dir,
+                                                      cache=analysis_results, walk_options=walk_options))
+                    memory_reports.append(timer.memory_report(repo_elem))
+            else:
+                if analysis_results is not None:
+                    analysis_results.close()
+                return None
 
-    else:
-        if repo_url:
-            repo_data = cli_get_data(threshold=threshold, ignore_classifiers=ignore_classifiers, repo_url=repo_url,
-                                     ignore_github_metadata=ignore_github_metadata, readme_only=readme_only,
-                                     keep_tmp=keep_tmp)
-        elif local_repo:
-            repo_data = cli_get_data(threshold=threshold, ignore_classifiers=ignore_classifiers,
-                                     local_repo=local_repo, keep_tmp=keep_tmp)
         else:
-            repo_data = cli_get_data(threshold=threshold, ignore_classifiers=ignore_classifiers,
-                                     doc_src=doc_src, keep_tmp=keep_tmp)
+            timer = StageTimer(timing, profile_memory)
+            if repo_url:
+                repo_data = cli_get_data(threshold=threshold, ignore_classifiers=ignore_classifiers, repo_url=repo_url,
+                                         ignore_github_metadata=ignore_github_metadata, readme_only=readme_only,
+                                         keep_tmp=keep_tmp, offline=offline, timer=timer, fetch_mode=fetch_mode,
+                                         mirror_dir=mirror_dir, cache=analysis_results, walk_options=walk_options)
+            elif local_repo:
+                repo_data = cli_get_data(threshold=threshold, ignore_classifiers=ignore_classifiers,
+                                         local_repo=local_repo, keep_tmp=keep_tmp, offline=offline, timer=timer,
+                                         cache=analysis_results, walk_options=walk_options)
+            else:
+                repo_data = cli_get_data(threshold=threshold, ignore_classifiers=ignore_classifiers,
+                                         doc_src=doc_src, keep_tmp=keep_tmp, offline=offline, timer=timer,
+                                         cache=analysis_results)
+            memory_reports.append(timer.memory_report(repo_url or local_repo or doc_src))
+        if analysis_results is not None:
+            analysis_results.close()
 
-    if output is not None:
-        json_export.save_json_output(repo_data.results, output, missing, pretty=pretty)
+        # time spent exporting the results (the time spent in each repository is reported by cli_get_data)
+        timer = StageTimer(timing, profile_memory)
+        if per_repository:
+            profiler = Profiler(profile_path(profile, "export"))
+            profiler.start()
+        if output is not None:
+            with timer.stage(constants.STAGE_JSON_EXPORT):
+                json_export.save_json_output(repo_data.results, output, missing, pretty=pretty)
 
-    if graph_out is not None:
-        logging.info("Generating triples...")
-        data_graph = DataGraph()
-        if multiple_repos:
-            for repo in repo_data:
-                data_graph.somef_data_to_graph(repo.results)
-        else:
-            data_graph.somef_data_to_graph(repo_data.results)
+        reconciled_data = None
+        if graph_out is not None or codemeta_out is not None:
+            # the results are reconciled once for all the exporters (the JSON output keeps the full results)
+            with timer.stage(constants.STAGE_RECONCILIATION):
+                if multiple_repos:
+                    reconciled_data = [ReconciledResults(repo.results) for repo in repo_data]
+                else:
+                    reconciled_data = ReconciledResults(repo_data.results)
 
-        data_graph.export_to_file(graph_out, graph_format)
+        if graph_out is not None:
+            logging.info("Generating triples...")
+            with timer.stage(constants.STAGE_GRAPH_EXPORT):
+                if graph_format in STREAMING_FORMATS:
+                    # triples are written to graph_out repository by repository, instead of keeping the graph in memory
+                    data_graph = DataGraph(stream_path=graph_out, stream_format=graph_format)
+                else:
+                    data_graph = DataGraph()
+                # the stream is closed even if the export fails
+                with data_graph:
+                    if multiple_repos:
+                        data_graph.somef_data_list_to_graph(reconciled_data)
+                    else:
+                        data_graph.somef_data_to_graph(reconciled_data)
 
-    if codemeta_out is not None:
-        json_export.save_codemeta_output(repo_data.results, codemeta_out, pretty=pretty)
+                    data_graph.export_to_file(graph_out, graph_format)
+
+        if codemeta_out is not None:
+            with timer.stage(constants.STAGE_CODEMETA_EXPORT):
+                json_export.save_codemeta_output(reconciled_data, codemeta_out, pretty=pretty)
+        timer.log(in_file or repo_url or local_repo or doc_src, scope="export")
+        if profile_memory:
+            memory_reports.append(timer.memory_report("export"))
+            save_memory_report(memory_reports, output or codemeta_out or graph_out)
+    finally:
+        # profiling and tracing are also stopped when the analysis fails (e.g., sys.exit): the profile is saved, and
+        # tracing would slow down the rest of the process (e.g., describe_many or the server)
+        profiler.stop()
+        if trace_memory:
+            tracemalloc.stop()
+
+
+def save_memory_report(memory_reports, output_path):
+    """
+    Saves the memory used in each stage (see --profile_memory) next to the output of SOMEF
+    Parameters
+    ----------
+    @param memory_reports: list with the memory report of each repository and of the export
+    @param output_path: path of the output file. The report is saved in the same path, ending with .memory.json.
+    If None, the report is logged
+
+    Returns
+    -------
+    @return: Does not return a value
+    """
+    report = json_export.serialize_json({"peak_rss_mb": peak_rss_mb(), "reports": memory_reports}, pretty=True)
+    if output_path is None:
+        logging.info("Memory report:\n" + report)
+        return
+    report_path = output_path + constants.MEMORY_REPORT_EXTENSION
+    with open(report_path, "w") as report_file:
+        report_file.write(report)
+    logging.info("Memory report saved to " + report_path)
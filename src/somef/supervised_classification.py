@@ -1,3 +1,4 @@
+import functools
 import logging
 import sys
 import pickle
@@ -9,6 +10,28 @@ from .rolf import preprocessing
 from .process_results import Result
 
 
+@functools.lru_cache(maxsize=None)
+def load_model(file_name):
+    """
+    Loads a pickled classifier. Models are kept in memory once loaded, so they are not loaded again for each README
+    (e.g., when analyzing many repositories or running SOMEF as a service)
+    Parameters
+    ----------
+    @param file_name: path of the pickle file of the classifier
+
+    Returns
+    -------
+    @return: the classifier
+    """
+    with open(file_name, 'rb') as f:
+        return pickle.load(f)
+
+
+def load_category_models():
+    """Loads the classifiers of the application domain of the repository (see run_category_classification)"""
+    return [load_model(str(model_file)) for model_file in sorted((Path(__file__).parent / 'rolf/models').iterdir())]
+
+
 def run_category_classification(readme_text: str, threshold: float, results: Result):
     """
     Function which returns the categories, confidence and technique of the given repo
@@ -25,17 +48,15 @@ def run_category_classification(readme_text: str, threshold: float, results: Res
     preprocessing.Preprocessor(df).run()
     text = [df['Text'][0]]
     try:
-        for model_file in (Path(__file__).parent / 'rolf/models').iterdir():
-            with open(model_file, 'rb') as f:
-                model = pickle.load(f)
-                cat = model.predict(text).tolist()[0]
-                prob = max(model.predict_proba(text).tolist()[0])
-                if cat != 'Other' and prob > threshold:
-                    results.add_result(constants.CAT_APPLICATION_DOMAIN,
-                                       {
-                                           constants.PROP_TYPE: constants.STRING,
-                                           constants.PROP_VALUE: cat
-                                       }, prob, constants.TECHNIQUE_SUPERVISED_CLASSIFICATION)
+        for model in load_category_models():
+            cat = model.predict(text).tolist()[0]
+            prob = max(model.predict_proba(text).tolist()[0])
+            if cat != 'Other' and prob > threshold:
+                results.add_result(constants.CAT_APPLICATION_DOMAIN,
+                                   {
+                                       constants.PROP_TYPE: constants.STRING,
+                                       constants.PROP_VALUE: cat
+                                   }, prob, constants.TECHNIQUE_SUPERVISED_CLASSIFICATION)
     except Exception as e:
         logging.error("Error when applying supervised classification " + str(e))
     return results
@@ -148,7 +169,7 @@ def run_classifiers(excerpts, file_paths):
                 if not path.exists(file_name):
                     sys.exit(f"Error: File or Directory {file_name} does not exist")
                 logging.info("Classifying excerpts for the category " + category)
-                classifier = pickle.load(open(file_name, 'rb'))
+                classifier = load_model(file_name)
                 scores = classifier.predict_proba(text_to_classifier)
                 score_dict[category] = {'excerpt': text_to_results, 'confidence': scores[:, 1]}
                 # logging.info("Excerpt classification successful category"+ category)
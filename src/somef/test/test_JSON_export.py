@@ -3,6 +3,7 @@ import os
 import unittest
 from pathlib import Path
 from .. import somef_cli
+from ..export import json_export
 from ..utils import constants
 
 test_data_path = str(Path(__file__).parent / "test_data") + os.path.sep
@@ -97,6 +98,30 @@ class TestJSONExport(unittest.TestCase):
         assert data.find(constants.CAT_MISSING) > 0
         os.remove(test_data_path + "test-281.json")
 
+    @staticmethod
+    def serializer_documents():
+        """Documents with the values that the serializers may write differently from the standard library"""
+        with open(test_data_path + "export_test.json", "r") as data_file:
+            data = json.load(data_file)
+        return [data, {"b": "Garijo \u00e9 \u2028 \U0001F600 \\x41 \x7f \"", "a": [{}, [], 0.82, None, True]},
+                {"a": [1e16, 1e-05, 0.0001], "b": {"d": "1e16", "c": 1}},
+                {"a": [float("nan"), None], "b": {"c": float("inf"), "d": float("-inf")}}]
+
+    def test_json_serializers(self):
+        """Checks that the standard JSON serializer is used by default when orjson is not selected"""
+        for document in self.serializer_documents():
+            for pretty in [False, True]:
+                expected = json.dumps(document, sort_keys=True, indent=2) if pretty else json.dumps(document)
+                assert json_export.serialize_json(document, pretty, constants.JSON_SERIALIZER_STDLIB) == expected
+
+    @unittest.skipUnless(json_export.orjson is not None, "orjson is not installed (pip install somef[fast-json])")
+    def test_json_serializer_orjson(self):
+        """Checks that orjson produces the same text as the standard library (including NaN and infinite floats)"""
+        for document in self.serializer_documents():
+            for pretty in [False, True]:
+                expected = json.dumps(document, sort_keys=True, indent=2) if pretty else json.dumps(document)
+                assert json_export.serialize_json(document, pretty, constants.JSON_SERIALIZER_ORJSON) == expected
+
 
 if __name__ == '__main__':
     unittest.main()
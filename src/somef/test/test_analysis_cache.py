@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..analysis_cache import AnalysisCache, blob_hash, check_file, count_results, merge_results, new_results, \
+    text_hash
+from ..extract_software_type import check_ontologies
+from ..process_files import process_repository_files
+from ..process_results import Result
+from ..utils import constants
+
+test_data_repositories = str(Path(__file__).parent / "test_data" / "repositories") + os.path.sep
+
+
+class TestAnalysisCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = AnalysisCache(os.path.join(self.temp_dir.name, "cache.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_blob_hash(self):
+        """Checks that files are identified by their git blob hash (see git hash-object)"""
+        file_path = os.path.join(self.temp_dir.name, "README.md")
+        with open(file_path, "w") as file:
+            file.write("hello world\n")
+        assert blob_hash(file_path) == "3b18e512dba79e4c8300dd08aeb37f8e728b8dad"
+        assert text_hash("hello world\n") == "3b18e512dba79e4c8300dd08aeb37f8e728b8dad"
+
+    def test_check_file(self):
+        """Checks that an extractor is only run again on a file when its content changes"""
+        file_path = os.path.join(self.temp_dir.name, "workflow.cwl")
+        calls = []
+
+        def extractor(path):
+            calls.append(path)
+            return None
+
+        with open(file_path, "w") as file:
+            file.write("class: Workflow")
+        assert check_file(self.cache, constants.CACHE_WORKFLOW, self.temp_dir.name, "workflow.cwl", extractor) is None
+        assert check_file(self.cache, constants.CACHE_WORKFLOW, self.temp_dir.name, "workflow.cwl", extractor) is None
+        assert len(calls) == 1
+        with open(file_path, "w") as file:
+            file.write("class: CommandLineTool")
+        check_file(self.cache, constants.CACHE_WORKFLOW, self.temp_dir.name, "workflow.cwl", extractor)
+        assert len(calls) == 2
+
+    def test_new_results(self):
+        """Checks that the results added by the README extractors can be stored and merged into another Result"""
+        result = Result()
+        result.add_result(constants.CAT_NAME, {constants.PROP_VALUE: "somef", constants.PROP_TYPE: constants.STRING},
+                          1, constants.TECHNIQUE_GITHUB_API)
+        counts = count_results(result)
+        result.add_result(constants.CAT_NAME, {constants.PROP_VALUE: "SOMEF", constants.PROP_TYPE: constants.STRING},
+                          1, constants.TECHNIQUE_HEADER_ANALYSIS)
+        result.add_result(constants.CAT_DESCRIPTION, {constants.PROP_VALUE: "Software metadata extraction",
+                                                      constants.PROP_TYPE: constants.STRING},
+                          1, constants.TECHNIQUE_HEADER_ANALYSIS)
+        readme_results = json.loads(json.dumps(new_results(result, counts)))
+        assert len(readme_results[constants.CAT_NAME]) == 1 and len(readme_results[constants.CAT_DESCRIPTION]) == 1
+        cached_result = Result()
+        cached_result.add_result(constants.CAT_NAME, {constants.PROP_VALUE: "somef",
+                                                      constants.PROP_TYPE: constants.STRING},
+                                 1, constants.TECHNIQUE_GITHUB_API)
+        merge_results(cached_result, readme_results)
+        assert cached_result.results[constants.CAT_NAME] == result.results[constants.CAT_NAME]
+        assert cached_result.results[constants.CAT_DESCRIPTION] == result.results[constants.CAT_DESCRIPTION]
+
+    def test_process_repository_files(self):
+        """Checks that the results of a repository analyzed again with the cache are the same"""
+        path = test_data_repositories + "JAFFA-master"
+        text, metadata = process_repository_files(path, Result(), constants.RepositoryType.LOCAL)
+        cached_text, cached_metadata = process_repository_files(path, Result(), constants.RepositoryType.LOCAL,
+                                                                cache=self.cache)
+        assert self.cache.hits == 0
+        cached_text, cached_metadata = process_repository_files(path, Result(), constants.RepositoryType.LOCAL,
+                                                                cache=self.cache)
+        assert self.cache.hits == self.cache.misses > 0
+        assert cached_text == text
+        assert cached_metadata.results[constants.CAT_WORKFLOWS] == metadata.results[constants.CAT_WORKFLOWS]
+
+    def test_check_ontologies(self):
+        path = test_data_repositories + "auroral-ontology-core"
+        assert check_ontologies(path, self.cache)
+        assert check_ontologies(path, self.cache)
+        assert self.cache.hits == 1
@@ -3,6 +3,7 @@ import os
 import unittest
 import validators
 from pathlib import Path
+from unittest import mock
 from .. import somef_cli
 from ..utils import constants
 
@@ -897,3 +898,21 @@ class TestCli(unittest.TestCase):
         print(repo_type)
         assert repo_type == "static-website"
         os.remove(test_data_path + "repositories/repos_oeg/test-category.json")
+
+    def test_describe_many(self):
+        """Checks that the results of each repository are yielded, in order or as they are analyzed"""
+        repositories = [test_data_repositories + "Widoco", "not a repository", test_data_repositories + "ack"]
+        results = list(somef_cli.describe_many(repositories, ignore_classifiers=True, offline=True))
+        assert [repository for repository, _ in results] == [repositories[0], repositories[2]]
+        assert constants.CAT_CITATION in results[0][1].results
+        unordered = somef_cli.describe_many(iter(repositories), ignore_classifiers=True, offline=True, workers=2,
+                                            ordered=False)
+        assert sorted(repository for repository, _ in unordered) == sorted([repositories[0], repositories[2]])
+
+    def test_describe_many_exit(self):
+        """Checks that an analysis that calls sys.exit yields None instead of stopping the iteration, and that at
+        least one worker is used"""
+        repositories = [test_data_repositories + "Widoco", test_data_repositories + "ack"]
+        with mock.patch("somef.somef_cli.cli_get_data", side_effect=SystemExit("Error")):
+            results = list(somef_cli.describe_many(repositories, workers=0))
+        assert results == [(repositories[0], None), (repositories[1], None)]
@@ -1,6 +1,9 @@
 import unittest
 
 import os
+import tempfile
+from unittest import mock
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
 from .. import extract_ontologies
@@ -17,4 +20,67 @@ class TestOntologies(unittest.TestCase):
     def test_is_ontology_fake(self):
         """This test checks that a RDF file with no ontology is not detected, as it should not."""
         onto = extract_ontologies.is_file_ontology(test_data_repositories + "Widoco/example_onto/test.ttl")
-        assert(onto is None)
\ No newline at end of file
+        assert(onto is None)
+
+    def test_detect_ontologies(self):
+        """Checks that the ontologies found in the process pool are the same as those found one by one"""
+        file_paths = [test_data_repositories + "Widoco/example_onto/ontology.ttl",
+                      test_data_repositories + "Widoco/example_onto/test.ttl",
+                      test_data_repositories + "auroral-ontology-core/ontology.xml"]
+        uris = extract_ontologies.detect_ontologies(file_paths, min_pool_files=1)
+        assert uris == [extract_ontologies.is_file_ontology(file_path) for file_path in file_paths]
+        assert "https://w3id.org/example" in uris[0]
+
+    def test_detect_ontologies_prefilter_once(self):
+        """Checks that each file is scanned for an ontology declaration once, before parsing it"""
+        file_paths = [test_data_repositories + "Widoco/example_onto/ontology.ttl",
+                      test_data_repositories + "Widoco/example_onto/test.ttl"]
+        with mock.patch.object(extract_ontologies, "may_be_ontology",
+                               wraps=extract_ontologies.may_be_ontology) as may_be_ontology:
+            uris = extract_ontologies.detect_ontologies(file_paths)
+        assert may_be_ontology.call_count == len(file_paths)
+        assert "https://w3id.org/example" in uris[0] and uris[1] is None
+
+    def test_detect_ontologies_broken_pool(self):
+        """Checks that the files are parsed again if the process pool stops (e.g., a process was killed)"""
+        file_paths = [test_data_repositories + "Widoco/example_onto/ontology.ttl",
+                      test_data_repositories + "auroral-ontology-core/ontology.xml"]
+        expected = [extract_ontologies.is_file_ontology(file_path) for file_path in file_paths]
+        pool = extract_ontologies.get_ontology_pool()
+        with self.assertRaises(BrokenProcessPool):
+            pool.submit(os._exit, 1).result()
+        assert extract_ontologies.detect_ontologies(file_paths, min_pool_files=1) == expected
+        assert extract_ontologies.get_ontology_pool() is not pool
+        assert extract_ontologies.detect_ontologies(file_paths, min_pool_files=1) == expected
+
+    def test_detect_ontologies_max_size(self):
+        """Checks that files bigger than the maximum size are not parsed"""
+        uris = extract_ontologies.detect_ontologies([test_data_repositories + "Widoco/example_onto/ontology.ttl"],
+                                                    max_size=10)
+        assert uris == [None]
+
+    def test_may_be_ontology(self):
+        """Checks that files without an ontology declaration are not parsed, whatever the prefix of OWL"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pom_path = os.path.join(temp_dir, "pom.xml")
+            with open(pom_path, "w") as pom_file:
+                pom_file.write("<project><modelVersion>4.0.0</modelVersion></project>")
+            onto_path = os.path.join(temp_dir, "onto.ttl")
+            with open(onto_path, "w") as onto_file:
+                onto_file.write("@prefix o: <http://www.w3.org/2002/07/owl#> .\n"
+                                "<https://example.org/onto> a o:Ontology .")
+            assert not extract_ontologies.may_be_ontology(pom_path)
+            assert extract_ontologies.may_be_ontology(onto_path)
+            # the token may be split between the chunks read
+            assert extract_ontologies.may_be_ontology(onto_path, chunk_size=7)
+            assert str(extract_ontologies.is_file_ontology(onto_path)) == "https://example.org/onto"
+
+    def test_is_ontology_nt(self):
+        """Checks that ontologies declared at the end of N-Triples files are found"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            onto_path = os.path.join(temp_dir, "onto.nt")
+            with open(onto_path, "w") as onto_file:
+                onto_file.write('<https://example.org/a> <https://example.org/p> "a" .\n'
+                                '<https://example.org/onto> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> '
+                                '<http://www.w3.org/2002/07/owl#Ontology> .\n')
+            assert str(extract_ontologies.is_file_ontology(onto_path)) == "https://example.org/onto"
@@ -0,0 +1,67 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from ..git_mirror import download_mirror_files, get_mirror_path
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class TestGitMirror(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.origin = os.path.join(self.temp_dir.name, "origin", "somef")
+        self.mirror_dir = os.path.join(self.temp_dir.name, "mirrors")
+        os.makedirs(self.origin)
+        self.git("init", "--quiet", "--initial-branch", "main")
+        self.commit("README.md", "# Test repository")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def git(self, *args):
+        subprocess.run(["git", "-C", self.origin, "-c", "user.name=somef", "-c", "user.email=somef@example.org"] +
+                       list(args), check=True, stdout=subprocess.DEVNULL)
+
+    def commit(self, file_name, text):
+        with open(os.path.join(self.origin, file_name), "w") as file:
+            file.write(text)
+        self.git("add", file_name)
+        self.git("commit", "--quiet", "-m", "Add " + file_name)
+
+    def download(self, ref):
+        target_dir = tempfile.mkdtemp(dir=self.temp_dir.name)
+        return download_mirror_files(self.origin, ref, target_dir, self.mirror_dir)
+
+    def test_mirror(self):
+        """Checks that the files of a repository are obtained from its mirror, and that new commits are fetched"""
+        repo_dir = self.download("main")
+        assert os.listdir(repo_dir) == ["README.md"]
+        assert os.path.isdir(os.path.join(get_mirror_path(self.origin, self.mirror_dir), "objects"))
+        self.commit("LICENSE", "MIT License")
+        repo_dir = self.download("main")
+        assert sorted(os.listdir(repo_dir)) == ["LICENSE", "README.md"]
+
+    def test_missing_ref(self):
+        """Checks that the default branch is used if the ref is not in the repository"""
+        repo_dir = self.download("master")
+        assert os.listdir(repo_dir) == ["README.md"]
+
+    def test_tag(self):
+        self.git("tag", "v1.0")
+        self.commit("LICENSE", "MIT License")
+        repo_dir = self.download("v1.0")
+        assert os.listdir(repo_dir) == ["README.md"]
+
+    def test_missing_repository(self):
+        shutil.rmtree(self.origin)
+        assert self.download("main") is None
+        assert not os.path.exists(get_mirror_path(self.origin, self.mirror_dir))
+
+    def test_mirror_path(self):
+        assert get_mirror_path("https://github.com/KnowledgeCaptureAndDiscovery/somef.git", "/mirrors") == \
+               "/mirrors/github.com/KnowledgeCaptureAndDiscovery/somef.git"
+        assert get_mirror_path("https://gitlab.com/group/subgroup/project", "/mirrors") == \
+               "/mirrors/gitlab.com/group/subgroup/project.git"
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ..job_queue import JobQueue, open_queue, result_file_name, run_worker
+from ..process_results import Result
+from ..utils import constants
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.queue_path = os.path.join(self.temp_dir.name, "crawl.db")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_put_get_ack(self):
+        """Checks that each repository is given to one worker, and that repeated URLs are ignored"""
+        queue = open_queue(self.queue_path)
+        assert queue.put(["https://github.com/a/b", "https://github.com/c/d"]) == 2
+        assert queue.put(["https://github.com/a/b"]) == 0
+        other_worker = open_queue("sqlite://" + self.queue_path)
+        job = queue.get()
+        other_job = other_worker.get()
+        assert job.url == "https://github.com/a/b" and other_job.url == "https://github.com/c/d"
+        assert queue.get() is None
+        assert queue.ack(job) and other_worker.ack(other_job)
+        assert queue.stats()[constants.JOB_DONE] == 2
+        other_worker.close()
+        queue.close()
+
+    def test_visibility_timeout(self):
+        """Checks that a repository is given to another worker if the lease expires, and that the old lease is
+        rejected"""
+        queue = open_queue(self.queue_path)
+        queue.put(["https://github.com/a/b"])
+        job = queue.get(visibility_timeout=0)
+        retried_job = queue.get()
+        assert retried_job.url == job.url and retried_job.attempts == 2
+        assert not queue.ack(job)
+        assert queue.ack(retried_job)
+        queue.close()
+
+    def test_retries(self):
+        """Checks that failed repositories are retried up to max_attempts times"""
+        queue = open_queue(self.queue_path, max_attempts=2)
+        queue.put(["https://github.com/a/b"])
+        queue.fail(queue.get(), "error")
+        assert queue.stats()[constants.JOB_PENDING] == 1
+        queue.fail(queue.get(), "error")
+        assert queue.get() is None
+        assert queue.stats()[constants.JOB_FAILED] == 1
+        queue.close()
+
+    def test_worker_failed_analysis(self):
+        """Checks that a repository whose analysis failed (partial results) is retried and not saved as done"""
+        queue = open_queue(self.queue_path, max_attempts=2)
+        queue.put(["https://github.com/a/b"])
+        failed_result = Result()
+        failed_result.error = "Error processing the target repository"
+        output_dir = os.path.join(self.temp_dir.name, "output")
+        with mock.patch("somef.somef_cli.cli_get_data", return_value=failed_result) as cli_get_data:
+            assert run_worker(queue, output_dir) == 2
+        assert cli_get_data.call_count == 2
+        assert queue.stats()[constants.JOB_FAILED] == 1 and queue.stats()[constants.JOB_DONE] == 0
+        assert os.listdir(output_dir) == []
+        queue.close()
+
+    def test_worker_exit(self):
+        """Checks that a repository whose analysis calls sys.exit is failed instead of stopping the worker"""
+        queue = open_queue(self.queue_path, max_attempts=1)
+        queue.put(["https://github.com/a/b", "https://github.com/c/d"])
+        output_dir = os.path.join(self.temp_dir.name, "output")
+        with mock.patch("somef.somef_cli.cli_get_data", side_effect=SystemExit("Error: Archive request failed")):
+            assert run_worker(queue, output_dir) == 2
+        assert queue.stats()[constants.JOB_FAILED] == 2
+        queue.close()
+
+    def test_abstract_queue(self):
+        """Checks that a queue backend must implement all the operations of a JobQueue"""
+        class IncompleteQueue(JobQueue):
+            def put(self, urls):
+                return 0
+
+        with self.assertRaises(TypeError):
+            IncompleteQueue()
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            open_queue("redis://localhost")
+
+    def test_result_file_name(self):
+        assert result_file_name("https://github.com/KnowledgeCaptureAndDiscovery/somef/") == \
+               "github.com_KnowledgeCaptureAndDiscovery_somef"
+        # repositories with the same path in different hosts do not overwrite each other
+        assert result_file_name("https://github.com/owner/repo") != result_file_name("https://gitlab.com/owner/repo")
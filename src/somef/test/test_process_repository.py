@@ -173,4 +173,42 @@ class TestProcessRepository(unittest.TestCase):
         github_data = Result()
         text, github_data = process_files.process_repository_files(test_data_repositories + "corpuser", github_data,
                                                                    constants.RepositoryType.LOCAL)
-        assert len(text) > 0
\ No newline at end of file
+        assert len(text) > 0
+
+    def test_is_key_file(self):
+        """Checks the files downloaded with the key_files fetch mode"""
+        assert process_files.is_key_file("LICENSE") and process_files.is_key_file("citation.cff")
+        assert process_files.is_key_file("INSTALL.md") and process_files.is_key_file("ACKNOWLEDGEMENTS.md")
+        assert not process_files.is_key_file("setup.py") and not process_files.is_key_file("README.md")
+
+    def test_download_readme_rst(self):
+        """Checks that READMEs not named README.md are found with the GitHub API"""
+        text = process_repository.download_readme("craffel", "mir_eval", "main", constants.RepositoryType.GITHUB)
+        assert text is not None and len(text) > 0
+
+    def test_fetch_key_files(self):
+        """Checks that the README and key files are analyzed without downloading the archive of the repository"""
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            github_data = somef_cli.cli_get_data(0.8, ignore_classifiers=True,
+                                                 repo_url="https://github.com/KnowledgeCaptureAndDiscovery/somef",
+                                                 keep_tmp=tmp_folder, offline=True,
+                                                 fetch_mode=constants.FETCH_MODE_KEY_FILES)
+            assert not os.path.isfile(tmp_folder + "/KnowledgeCaptureAndDiscovery_somef.zip")
+        assert constants.CAT_LICENSE in github_data.results and constants.CAT_README_URL in github_data.results
+
+    def test_file_needs_content(self):
+        """Checks the files downloaded with the tree fetch mode (the rest are only analyzed by their names)"""
+        assert process_files.file_needs_content("README.rst") and not process_files.file_needs_content("docs/README.md")
+        assert process_files.file_needs_content("src/LICENSE") and process_files.file_needs_content("onto/onto.ttl")
+        assert process_files.file_needs_content("workflows/Snakefile") and process_files.file_needs_content("a.ipynb")
+        assert not process_files.file_needs_content("Dockerfile") and not process_files.file_needs_content("run.sh")
+
+    def test_fetch_tree(self):
+        """Checks that the files of a repository are analyzed without downloading its archive"""
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            github_data = somef_cli.cli_get_data(0.8, ignore_classifiers=True,
+                                                 repo_url="https://github.com/KnowledgeCaptureAndDiscovery/OBA_sparql/",
+                                                 keep_tmp=tmp_folder, offline=True,
+                                                 fetch_mode=constants.FETCH_MODE_TREE)
+            assert not os.path.isfile(tmp_folder + "/KnowledgeCaptureAndDiscovery_OBA_sparql.zip")
+        assert constants.CAT_LICENSE in github_data.results and constants.CAT_README_URL in github_data.results
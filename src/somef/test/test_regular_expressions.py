@@ -4,7 +4,8 @@ from pathlib import Path
 
 from .. import regular_expressions
 from ..process_results import Result
-from ..utils import constants
+from ..utils import constants, regexp
+from ..url_resolution import ResolutionQueue
 
 test_data_path = str(Path(__file__).parent / "test_data") + os.path.sep
 test_data_repositories = str(Path(__file__).parent / "test_data" / "repositories") + os.path.sep
@@ -261,6 +262,32 @@ The web UI works in recent desktop versions of Chrome, Firefox, Safari and Inter
         text = regular_expressions.remove_links_images(text)
         assert text.find("[www.mapshaper.org](http://www.mapshaper.org)") == -1
 
+    def test_remove_links_images_badges(self):
+        """Test designed to check that badges (images wrapped in links) are removed completely"""
+        text = "[![Build](https://travis-ci.org/a/b.svg)](https://travis-ci.org/a/b) Some text ![logo](logo.png)\n" \
+               "See [the docs](https://a.readthedocs.io/) and ![]() for more"
+        text = regular_expressions.remove_links_images(text)
+        assert text == "Some text \nSee  and  for more"
+
+    def test_remove_links_images_nested_brackets(self):
+        """Test designed to check that text before a nested bracket of a link is kept"""
+        text = "This is [not a link [link](https://example.org) and more"
+        assert regular_expressions.remove_links_images(text) == "This is [not a link  and more"
+
+    def test_precompiled_patterns(self):
+        """Test designed to check that the precompiled patterns are the ones declared in constants"""
+        compiled = [name for name in dir(regexp) if name.startswith("REGEXP_")]
+        assert len(compiled) > 0
+        for name in compiled:
+            assert getattr(regexp, name).pattern == getattr(constants, name)
+
+    def test_remove_links_images_many_links(self):
+        """Test designed to check that link-heavy texts are fully cleaned"""
+        text = "\n".join(["- [project " + str(i) + "](https://github.com/a/p" + str(i) + ") description"
+                          for i in range(5000)])
+        text = regular_expressions.remove_links_images(text)
+        assert text.find("](") == -1 and text.count("description") == 5000
+
     def test_issue_427(self):
         with open(test_data_repositories + "Widoco" + os.path.sep + "README.md", "r") as data_file:
             test_text = data_file.read()
@@ -356,3 +383,58 @@ The web UI works in recent desktop versions of Chrome, Firefox, Safari and Inter
             result = repo_status.results[constants.CAT_PACKAGE_DISTRIBUTION]
             assert len(result) > 0 and "https://pypi.org/project/inspect4py" in result[0][constants.PROP_RESULT][
                 constants.PROP_VALUE]
+
+    def test_readme_anchors(self):
+        """Test designed to check that the single scan of a README finds the anchors of each extractor"""
+        with open(test_data_path + "README-widoco.md", "r") as data_file:
+            anchors = regular_expressions.find_readme_anchors(data_file.read())
+            assert "doi" in anchors and "images" in anchors and "pypi" not in anchors
+
+    def test_extract_readme_metadata(self):
+        """Test designed to check that running the extractors from the README anchors returns the same results as
+        running all the extractors on the README"""
+        with open(test_data_path + "README-widoco.md", "r") as data_file:
+            test_text = data_file.read()
+            source = test_data_path + "README-widoco.md"
+            expected = Result()
+            expected = regular_expressions.extract_bibtex(test_text, expected, source)
+            expected = regular_expressions.extract_doi_badges(test_text, expected, source)
+            expected = regular_expressions.extract_title(test_text, expected, source)
+            expected = regular_expressions.extract_binder_links(test_text, expected, source)
+            expected = regular_expressions.extract_readthedocs(test_text, expected, source)
+            expected = regular_expressions.extract_repo_status(test_text, expected, source)
+            expected = regular_expressions.extract_wiki_links(test_text, None, expected, source)
+            expected = regular_expressions.extract_support_channels(test_text, expected, source)
+            expected = regular_expressions.extract_package_distributions(test_text, expected, source)
+            expected = regular_expressions.extract_images(test_text, None, None, expected, source, "master")
+            expected = regular_expressions.extract_arxiv_links(test_text, expected, source)
+            result = regular_expressions.extract_readme_metadata(test_text, None, None, Result(), source, "master")
+            assert result.results == expected.results
+
+    def test_package_distribution_offline(self):
+        """Test designed to check that package links are kept as written in the README when URL checks are skipped"""
+        with open(test_data_path + "README-mapeathor.md", "r") as data_file:
+            test_text = data_file.read()
+            resolution_queue = ResolutionQueue()
+            repo_status = regular_expressions.extract_package_distributions(test_text, Result(),
+                                                                            test_data_path + "README-mapeathor.md",
+                                                                            resolution_queue)
+            assert constants.CAT_PACKAGE_DISTRIBUTION not in repo_status.results and len(resolution_queue) == 1
+            resolution_queue.skip()
+            result = repo_status.results[constants.CAT_PACKAGE_DISTRIBUTION]
+            assert len(resolution_queue) == 0 and result[0][constants.PROP_RESULT][
+                constants.PROP_VALUE] == "https://pypi.python.org/pypi/mapeathor"
+
+    def test_wiki_deferred(self):
+        """Test designed to check that the wiki links of the README are added before the repository wiki is checked,
+        and that an unreachable repository wiki is ignored"""
+        with open(test_data_path + "test_wiki.md", "r") as data_file:
+            test_text = data_file.read()
+            resolution_queue = ResolutionQueue()
+            repo_status = regular_expressions.extract_wiki_links(test_text, "http://127.0.0.1:1/oeg-upm/mapeathor",
+                                                                 Result(), test_data_path + "test_wiki.md",
+                                                                 resolution_queue)
+            readme_links = len(repo_status.results[constants.CAT_DOCUMENTATION])
+            assert readme_links > 0 and len(resolution_queue) == 1
+            resolution_queue.resolve(timeout=1)
+            assert len(repo_status.results[constants.CAT_DOCUMENTATION]) == readme_links
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from ..extract_software_type import check_extras
+from ..repository_walk import WalkOptions, walk_repository
+
+
+class TestRepositoryWalk(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repo_dir = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, file_path, text="text"):
+        full_path = os.path.join(self.repo_dir, file_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as file:
+            file.write(text)
+
+    def walk(self, options=None):
+        return sorted(os.path.relpath(os.path.join(dir_path, filename), self.repo_dir).replace(os.sep, "/")
+                      for dir_path, dir_names, filenames in walk_repository(self.repo_dir, options)
+                      for filename in filenames)
+
+    def test_pruned_dirs(self):
+        """Checks that dependencies and build folders are skipped by default, at any level"""
+        for file_path in ["README.md", "src/main.py", "node_modules/lib/README.md", "web/node_modules/LICENSE",
+                          ".git/config", "dist/main.js"]:
+            self.write(file_path)
+        assert self.walk() == ["README.md", "src/main.py"]
+        assert len(self.walk(WalkOptions(pruned_dirs=[]))) == 6
+
+    def test_gitignore(self):
+        """Checks the common patterns of .gitignore files: names, anchored paths, folders, ** and negations"""
+        for file_path in ["README.md", "app.log", "important.log", "logs/today.txt", "src/generated/code.py",
+                          "src/main.py", "data/raw.csv", "data/sample.csv", "lib/a/b/cache.tmp", "lib/keep.py",
+                          "lib/.gitignore"]:
+            self.write(file_path)
+        self.write(".gitignore", "# comment\n*.log\n!important.log\nlogs/\n/src/generated\ndata/*.csv\n"
+                                 "!data/sample.csv\n")
+        self.write("lib/.gitignore", "**/*.tmp\n")
+        assert self.walk(WalkOptions(gitignore=True)) == [".gitignore", "README.md", "data/sample.csv",
+                                                          "important.log", "lib/.gitignore", "lib/keep.py",
+                                                          "src/main.py"]
+        assert len(self.walk()) == 12
+
+    def test_budgets(self):
+        """Checks that a walk stops when its budget of files or bytes is exhausted"""
+        for index in range(5):
+            self.write(f"folder{index}/file.txt", "0123456789")
+        assert len(self.walk(WalkOptions(max_files=3))) == 3
+        assert len(self.walk(WalkOptions(max_bytes=25))) == 2
+
+    def test_check_extras(self):
+        """Checks that the code of the dependencies is not taken into account to find the type of the repository"""
+        self.write("README.md")
+        self.write("node_modules/lib/index.py")
+        assert check_extras(self.repo_dir)
+        assert not check_extras(self.repo_dir, WalkOptions(pruned_dirs=[]))
@@ -0,0 +1,125 @@
+import http.client
+import io
+import json
+import os
+import tarfile
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from .. import server
+from ..utils import constants
+
+test_data_path = str(Path(__file__).parent / "test_data") + os.path.sep
+test_data_repositories = str(Path(__file__).parent / "test_data" / "repositories") + os.path.sep
+
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = server.SomefServer(("127.0.0.1", 0), workers=2)
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def post(self, path, data, content_type="application/json"):
+        request = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": content_type})
+        with urllib.request.urlopen(request) as response:
+            return response.headers.get_content_type(), response.read().decode("utf-8")
+
+    def test_health(self):
+        with urllib.request.urlopen(self.url + "/health") as response:
+            assert json.loads(response.read()) == {"status": "ok"}
+
+    def test_describe_readme(self):
+        """Checks that a README sent in the request is analyzed, and exported in the requested formats"""
+        with open(test_data_path + "README-widoco.md", "r") as data_file:
+            readme = data_file.read()
+        options = {"readme": readme, "ignore_classifiers": True, "offline": True}
+        content_type, body = self.post("/describe", json.dumps(options).encode("utf-8"))
+        assert content_type == "application/json"
+        assert constants.CAT_CITATION in json.loads(body)
+        options["format"] = constants.SERVER_FORMAT_CODEMETA
+        content_type, body = self.post("/describe", json.dumps(options).encode("utf-8"))
+        assert content_type == "application/ld+json" and "citation" in json.loads(body)
+        options["format"] = constants.SERVER_FORMAT_TURTLE
+        content_type, body = self.post("/describe", json.dumps(options).encode("utf-8"))
+        assert content_type == "text/turtle" and "sd:" in body
+
+    def test_describe_archive(self):
+        """Checks that an uploaded archive of a repository is analyzed"""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_ref:
+            for root, _, files in os.walk(test_data_repositories + "Widoco"):
+                for file_name in files:
+                    file_path = os.path.join(root, file_name)
+                    zip_ref.write(file_path, os.path.relpath(file_path, test_data_repositories))
+        content_type, body = self.post("/describe?ignore_classifiers=true&offline=true", archive.getvalue(),
+                                       "application/zip")
+        results = json.loads(body)
+        assert constants.CAT_LICENSE in results and constants.CAT_CITATION in results
+
+    def test_bad_request(self):
+        """Checks that invalid requests are answered with an error message"""
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.post("/describe", json.dumps({"readme": "# Title", "format": "xml"}).encode("utf-8"))
+        assert context.exception.code == 400
+        assert "Unknown format" in json.loads(context.exception.read())["error"]
+
+    def test_content_length(self):
+        """Checks that requests without a valid Content-Length are rejected before reading their body"""
+        for length, status in [(None, 411), ("-1", 400), ("abc", 400)]:
+            connection = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=10)
+            connection.putrequest("POST", "/describe")
+            connection.putheader("Content-Type", "application/json")
+            if length is not None:
+                connection.putheader("Content-Length", length)
+            connection.endheaders()
+            response = connection.getresponse()
+            assert response.status == status and "Content-Length" in json.loads(response.read())["error"]
+            connection.close()
+
+    def test_describe_exit(self):
+        """Checks that an analysis that calls sys.exit is answered with an error instead of closing the connection"""
+        with mock.patch("somef.somef_cli.cli_get_data", side_effect=SystemExit("Error: Archive request failed")):
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                self.post("/describe", json.dumps({"readme": "# Title"}).encode("utf-8"))
+        assert context.exception.code == 500
+        assert "Archive request failed" in json.loads(context.exception.read())["error"]
+
+    def test_extract_archive_size(self):
+        """Checks that archives too big once extracted, or with too many entries, are rejected (e.g., zip bombs)"""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zip_ref:
+            zip_ref.writestr("repo/README.md", "# Title")
+            zip_ref.writestr("repo/data.txt", b"0" * 2 * 2 ** 20)
+        assert len(archive.getvalue()) < 2 ** 20
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with self.assertRaises(server.RequestError) as context:
+                server.extract_archive("zip", archive.getvalue(), temp_dir, max_size_mb=1)
+            assert context.exception.status == 413
+            with self.assertRaises(server.RequestError):
+                server.extract_archive("zip", archive.getvalue(), temp_dir, max_entries=1)
+            assert server.extract_archive("zip", archive.getvalue(), temp_dir).endswith("repo")
+
+    def test_extract_archive_outside(self):
+        """Checks that archives with entries outside the extraction folder are rejected"""
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as tar_ref:
+            info = tarfile.TarInfo("../outside.md")
+            info.size = 3
+            tar_ref.addfile(info, io.BytesIO(b"abc"))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with self.assertRaises(server.RequestError):
+                server.extract_archive("tar", archive.getvalue(), temp_dir)
@@ -0,0 +1,91 @@
+import os
+import pstats
+import tempfile
+import tracemalloc
+import unittest
+
+from ..process_results import Result
+from ..timing import Profiler, StageTimer, profile_path
+from ..utils import constants
+
+
+class TestTiming(unittest.TestCase):
+
+    def test_stage_times(self):
+        """Checks that the time of each stage is added to the provenance of the results"""
+        timer = StageTimer(True)
+        for _ in range(2):
+            with timer.stage(constants.STAGE_HEADER_ANALYSIS):
+                pass
+        with timer.stage(constants.STAGE_CLASSIFIERS):
+            pass
+        result = timer.report(Result(), "README.md")
+        times = result.results[constants.PROP_PROVENANCE][constants.PROP_STAGE_TIMES]
+        assert list(times.keys()) == [constants.STAGE_HEADER_ANALYSIS, constants.STAGE_CLASSIFIERS,
+                                      constants.STAGE_TOTAL]
+        assert times[constants.STAGE_TOTAL] >= times[constants.STAGE_HEADER_ANALYSIS]
+
+    def test_timing_disabled(self):
+        """Checks that no times are measured or reported when timing is disabled"""
+        timer = StageTimer()
+        with timer.stage(constants.STAGE_HEADER_ANALYSIS):
+            pass
+        result = timer.report(Result(), "README.md")
+        assert len(timer.times) == 0
+        assert constants.PROP_STAGE_TIMES not in result.results[constants.PROP_PROVENANCE]
+
+    def test_profile_memory(self):
+        """Checks that the memory allocated in each stage is recorded when profiling memory"""
+        timer = StageTimer(profile_memory=True)
+        tracemalloc.start()
+        try:
+            with timer.stage(constants.STAGE_HEADER_ANALYSIS):
+                data = [str(i) for i in range(100000)]
+        finally:
+            tracemalloc.stop()
+        stage = timer.memory_report("README.md")["stages"][constants.STAGE_HEADER_ANALYSIS]
+        assert len(data) > 0 and stage["peak_allocated_mb"] > 1
+        assert any(allocation["location"].startswith(__file__) for allocation in stage["top_allocations"])
+        # times are only reported if timing is enabled
+        result = timer.report(Result(), "README.md")
+        assert constants.PROP_STAGE_TIMES not in result.results[constants.PROP_PROVENANCE]
+
+    def test_profile_memory_exit(self):
+        """Checks that memory tracing is stopped when the analysis stops early (a README that does not exist)"""
+        from .. import somef_cli
+        with self.assertRaises(SystemExit):
+            somef_cli.run_cli(doc_src="missing-README.md", profile_memory=True)
+        assert not tracemalloc.is_tracing()
+        # tracing started before running SOMEF is not stopped
+        tracemalloc.start()
+        try:
+            with self.assertRaises(SystemExit):
+                somef_cli.run_cli(doc_src="missing-README.md", profile_memory=True)
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+    def test_profiler_exit(self):
+        """Checks that the profile is saved when the analysis stops early (a README that does not exist)"""
+        from .. import somef_cli
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "out.prof")
+            with self.assertRaises(SystemExit):
+                somef_cli.run_cli(doc_src="missing-README.md", profile=path)
+            assert len(pstats.Stats(path).stats) > 0
+
+    def test_profiler(self):
+        """Checks that the profile is saved in the pstats format"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "out.prof")
+            with Profiler(path):
+                sorted(str(i) for i in range(1000))
+            stats = pstats.Stats(path)
+            assert any(function[2] == "<genexpr>" for function in stats.stats.keys())
+
+    def test_profile_path(self):
+        """Checks the name of the profile of each repository"""
+        path = profile_path("out.prof", "https://github.com/KnowledgeCaptureAndDiscovery/somef/")
+        assert path == "out.github.com_KnowledgeCaptureAndDiscovery_somef.prof"
+        assert profile_path("out", "export") == "out.export"
+        assert profile_path(None, "export") is None
@@ -1,10 +1,16 @@
+import gzip
+import json
 import os
 import unittest
 from pathlib import Path
 from .. import somef_cli
-from rdflib import Graph
-from ..export import turtle_export
+from rdflib import Dataset, Graph, URIRef
+from rdflib.namespace import OWL
+from rdflib.compare import isomorphic
+from ..export import turtle_export, rdf_mapping
+from ..export.reconciliation import ReconciledResults
 from .. import process_results
+from ..utils import constants
 
 test_data_path = str(Path(__file__).parent / "test_data") + os.path.sep
 test_data_repositories = str(Path(__file__).parent / "test_data" / "repositories") + os.path.sep
@@ -53,3 +59,122 @@ class TestExportTTL(unittest.TestCase):
         # the transformed graph has more than 10 triples
         # TO DO: Test that checks the dependency between objects is there: Software, Version, License, SourceCode
         assert len(g) > 10
+
+    def test_native_mapping_export(self):
+        """Checks that applying the mapping directly to the data produces the same graph as morph-kgc"""
+        mapping_path = str(Path(__file__).parent.parent) + os.path.sep + "mapping" + os.path.sep + "rml.ttl"
+        data_path = str(Path(__file__).parent) + os.path.sep + "test_data" + os.path.sep + "export_test.json"
+        with open(data_path, "r") as data_file:
+            data = json.load(data_file)
+        g_rml = turtle_export.DataGraph.apply_mapping(mapping_path, data_path)
+        g = rdf_mapping.materialize(mapping_path, data)
+        assert len(g) > 10 and isomorphic(g, g_rml)
+
+    @staticmethod
+    def repositories_results():
+        """Results of two small repositories"""
+        repositories = []
+        for name in ["repo1", "repo2"]:
+            r = process_results.Result()
+            r.add_result(constants.CAT_NAME, {constants.PROP_TYPE: constants.STRING, constants.PROP_VALUE: name}, 1,
+                         constants.TECHNIQUE_GITHUB_API)
+            r.add_result(constants.CAT_OWNER, {constants.PROP_TYPE: "Person", constants.PROP_VALUE: "owner"}, 1,
+                         constants.TECHNIQUE_GITHUB_API)
+            repositories.append(r.results)
+        return repositories
+
+    def test_multiple_repositories(self):
+        """Checks that the graph of several repositories contains the triples of each of them"""
+        graphs = self.repositories_results()
+        g = turtle_export.DataGraph()
+        expected = Graph()
+        for repo in graphs:
+            g.somef_data_to_graph(repo)
+            repo_graph = turtle_export.DataGraph()
+            repo_graph.somef_data_to_graph(repo)
+            expected += repo_graph.g
+        assert len(g.g) > 0 and isomorphic(g.g, expected)
+
+    def test_stream_ntriples_gzip(self):
+        """Checks that streaming N-Triples to a gzipped file produces the same graph as exporting it in memory"""
+        test_path = test_data_path + "test-stream.nt.gz"
+        g = turtle_export.DataGraph()
+        stream = turtle_export.DataGraph(stream_path=test_path, stream_format="nt")
+        for repo in self.repositories_results():
+            g.somef_data_to_graph(repo)
+            stream.somef_data_to_graph(repo)
+        stream.export_to_file(test_path, "nt")
+        assert len(stream.g) == 0
+        with gzip.open(test_path, "rb") as stream_file:
+            streamed = Graph().parse(data=stream_file.read(), format="nt")
+        os.remove(test_path)
+        assert len(g.g) > 0 and isomorphic(g.g, streamed)
+
+    def test_stream_closed_on_error(self):
+        """Checks that the stream is closed (keeping the triples written) if the export fails"""
+        test_path = test_data_path + "test-stream-error.nt.gz"
+        with self.assertRaises(ValueError):
+            with turtle_export.DataGraph(stream_path=test_path, stream_format="nt") as stream:
+                stream.somef_data_to_graph(self.repositories_results()[0])
+                raise ValueError("export failed")
+        assert stream.stream is None
+        with gzip.open(test_path, "rb") as stream_file:
+            streamed = Graph().parse(data=stream_file.read(), format="nt")
+        os.remove(test_path)
+        assert len(streamed) > 0
+
+    def test_stream_nquads(self):
+        """Checks that streaming N-Quads creates one named graph per repository"""
+        test_path = test_data_path + "test-stream.nq"
+        stream = turtle_export.DataGraph(stream_path=test_path, stream_format="nquads")
+        for repo in self.repositories_results():
+            stream.somef_data_to_graph(repo)
+        stream.export_to_file(test_path, "nquads")
+        d = Dataset()
+        d.parse(test_path, format="nquads")
+        os.remove(test_path)
+        graph_names = {str(c.identifier) for c in d.contexts() if len(c) > 0}
+        assert graph_names == {"https://w3id.org/okn/i/Software/repo1", "https://w3id.org/okn/i/Software/repo2"}
+
+    def test_rml_engine(self):
+        """Checks that materializing several repositories with the RML engine produces the same graph"""
+        g = turtle_export.DataGraph()
+        g.somef_data_list_to_graph(self.repositories_results())
+        rml = turtle_export.DataGraph(use_rml_engine=True)
+        rml.somef_data_list_to_graph(self.repositories_results())
+        assert len(g.g) > 0 and isomorphic(g.g, rml.g)
+
+    def test_rml_engine_shapes(self):
+        """
+        Checks that repositories whose nested objects have different fields (a license with and without name and URL)
+        produce the same graph with the RML engine as with the compiled mapping
+        """
+        repositories = []
+        for name, license_fields in [("repo1", {constants.PROP_NAME: "Apache License 2.0",
+                                                constants.PROP_URL: "https://github.com/owner/repo1/LICENSE"}),
+                                     ("repo2", {})]:
+            r = process_results.Result()
+            r.add_result(constants.CAT_NAME, {constants.PROP_TYPE: constants.STRING, constants.PROP_VALUE: name}, 1,
+                         constants.TECHNIQUE_GITHUB_API)
+            license_fields.update({constants.PROP_TYPE: constants.LICENSE, constants.PROP_VALUE: "Apache",
+                                   constants.PROP_SPDX_ID: "Apache-2.0"})
+            r.add_result(constants.CAT_LICENSE, license_fields, 1, constants.TECHNIQUE_GITHUB_API)
+            repositories.append(r.results)
+        g = turtle_export.DataGraph()
+        g.somef_data_list_to_graph(repositories)
+        rml = turtle_export.DataGraph(use_rml_engine=True)
+        rml.somef_data_list_to_graph(repositories)
+        assert len(g.g) > 0 and isomorphic(rml.g, g.g)
+        assert (None, OWL.sameAs, URIRef("https://spdx.org/licenses/Apache-2.0")) in rml.g
+
+    def test_reconciled_results(self):
+        """Checks that the results reconciled once can be exported both to RDF and Codemeta"""
+        for repo in self.repositories_results():
+            reconciled = ReconciledResults(repo)
+            g = turtle_export.DataGraph()
+            g.somef_data_to_graph(reconciled)
+            expected = turtle_export.DataGraph()
+            expected.somef_data_to_graph(repo)
+            assert len(g.g) > 0 and isomorphic(g.g, expected.g)
+            assert reconciled.codemeta["name"] == reconciled.graph_data[constants.CAT_NAME]
+            assert reconciled.codemeta["author"] == [{"@type": "Person", "@id": "https://github.com/owner"}]
@@ -0,0 +1,234 @@
+import contextlib
+import cProfile
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+from .job_queue import url_to_file_name
+from .utils import constants
+
+# context manager returned when timing is disabled (it can be entered any number of times)
+NO_STAGE = contextlib.nullcontext()
+
+
+class StageTimer:
+    """
+    Measures the time spent in each stage of the analysis of a repository (e.g., GitHub API, header analysis).
+    Stages are measured with context managers:
+
+        with timer.stage(constants.STAGE_HEADER_ANALYSIS):
+            ...
+
+    When the timer is disabled, stage() returns a context manager that does nothing.
+    If profile_memory is set, the memory used in each stage is also recorded: peak memory allocated (tracemalloc,
+    which must be tracing), top allocations and RSS of the process at the end of the stage.
+    """
+
+    def __init__(self, enabled=False, profile_memory=False):
+        # times are reported if timing is enabled, but stages are also measured when profiling memory
+        self.timing = enabled
+        self.enabled = enabled or profile_memory
+        self.profile_memory = profile_memory
+        self.times = {}
+        self.memory = {}
+        self.start = time.perf_counter()
+
+    def stage(self, name):
+        """
+        Returns a context manager that measures the time spent in a stage. Stages with the same name are added up
+        Parameters
+        ----------
+        @param name: name of the stage
+
+        Returns
+        -------
+        @return: context manager measuring the stage
+        """
+        if not self.enabled:
+            return NO_STAGE
+        return _Stage(self, name)
+
+    def add_time(self, name, elapsed):
+        self.times[name] = self.times.get(name, 0) + elapsed
+
+    def add_memory(self, name, peak, snapshot_start, snapshot_end):
+        """
+        Records the memory used in a stage. If a stage is run several times, the run with the highest peak is kept
+        Parameters
+        ----------
+        @param name: name of the stage
+        @param peak: peak memory allocated during the stage (bytes)
+        @param snapshot_start: tracemalloc snapshot taken when the stage started
+        @param snapshot_end: tracemalloc snapshot taken when the stage ended
+        """
+        if name in self.memory and self.memory[name]["peak_allocated_mb"] >= peak / 2 ** 20:
+            return
+        top_allocations = []
+        for statistic in snapshot_end.compare_to(snapshot_start, "lineno"):
+            if len(top_allocations) == constants.MEMORY_TOP_ALLOCATIONS:
+                break
+            if statistic.size_diff > 0:
+                frame = statistic.traceback[0]
+                top_allocations.append({"location": f"{frame.filename}:{frame.lineno}",
+                                        "size_mb": round(statistic.size_diff / 2 ** 20, 3),
+                                        "count": statistic.count_diff})
+        self.memory[name] = {
+            "peak_allocated_mb": round(peak / 2 ** 20, 3),
+            "rss_mb": current_rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+            "top_allocations": top_allocations
+        }
+
+    def report(self, repository_metadata, target=""):
+        """
+        Adds the time spent in each stage (and in total, since the timer was created) to the provenance of the results
+        and logs it in a single line (see log)
+        Parameters
+        ----------
+        @param repository_metadata: Result where the times are added (if timing is enabled)
+        @param target: repository (URL or path) or README analyzed
+
+        Returns
+        -------
+        @return: the repository_metadata received
+        """
+        if not self.timing:
+            return repository_metadata
+        self.times[constants.STAGE_TOTAL] = time.perf_counter() - self.start
+        times = {name: round(elapsed, 4) for name, elapsed in self.times.items()}
+        provenance = repository_metadata.results.get(constants.PROP_PROVENANCE)
+        if provenance is not None:
+            provenance[constants.PROP_STAGE_TIMES] = times
+        self.log(target)
+        return repository_metadata
+
+    def log(self, target="", scope="repository"):
+        """
+        Logs the time spent in each stage in a single line, easy to parse:
+        somef_timing scope=<repository or export> target=<repository> <stage>=<seconds> ...
+        Parameters
+        ----------
+        @param target: repository (URL or path) or README analyzed
+        @param scope: what was measured (the analysis of a repository or the export of the results)
+        """
+        if self.timing:
+            logging.info("somef_timing scope=" + scope + " target=" + str(target) + "".join(
+                f" {name}={elapsed:.4f}" for name, elapsed in self.times.items()))
+
+    def memory_report(self, target=""):
+        """
+        Returns the memory used in each stage (if profile_memory is set)
+        Parameters
+        ----------
+        @param target: repository (URL or path) or README analyzed
+
+        Returns
+        -------
+        @return: dictionary with the target and the memory used in each stage
+        """
+        return {"target": target, "stages": self.memory}
+
+
+class _Stage:
+    """Context manager measuring the time (and, optionally, the memory) spent in a stage of a StageTimer"""
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.start = None
+        self.allocated = 0
+        self.snapshot = None
+
+    def __enter__(self):
+        if self.timer.profile_memory and tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot()
+            self.allocated = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timer.add_time(self.name, time.perf_counter() - self.start)
+        if self.snapshot is not None:
+            peak = tracemalloc.get_traced_memory()[1] - self.allocated
+            self.timer.add_memory(self.name, peak, self.snapshot, tracemalloc.take_snapshot())
+        return False
+
+
+class Profiler:
+    """
+    Profiles the code run between start() and stop() (or in a with block) with cProfile, saving the statistics in a
+    pstats file that can be loaded with pstats.Stats or snakeviz. If the path is None, nothing is profiled.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.profile = None
+
+    def start(self):
+        if self.path is not None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stop(self):
+        if self.profile is None:
+            return
+        self.profile.disable()
+        try:
+            self.profile.dump_stats(self.path)
+            logging.info("Profile saved to " + self.path)
+        except OSError as e:
+            logging.error("Could not save the profile to " + self.path + ": " + str(e))
+        self.profile = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+def profile_path(path, target):
+    """
+    Returns the path of the profile of a target (e.g., a repository in bulk mode), adding the target before the
+    extension of the path: out.prof -> out.github.com_owner_repo.prof
+    Parameters
+    ----------
+    @param path: path of the profile (--profile)
+    @param target: repository URL or name of what is profiled
+
+    Returns
+    -------
+    @return: the path of the profile of the target, or None if path is None
+    """
+    if path is None:
+        return None
+    name = url_to_file_name(target)
+    root, extension = os.path.splitext(path)
+    return root + "." + name + extension
+
+
+def current_rss_mb():
+    """Resident set size of the process (MB), if available (Linux)"""
+    try:
+        import resource
+        with open("/proc/self/statm", "r") as statm:
+            pages = int(statm.read().split()[1])
+    except (ImportError, OSError, ValueError, IndexError):
+        return None
+    return round(pages * resource.getpagesize() / 2 ** 20, 1)
+
+
+def peak_rss_mb():
+    """Peak resident set size of the process (MB), if available (Unix)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes in Linux, bytes in macOS
+    return round(peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10, 1)
@@ -0,0 +1,78 @@
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from .utils import constants
+
+
+def check_url(url, allow_redirects=True, timeout=constants.URL_RESOLUTION_TIMEOUT):
+    """
+    Function that requests a URL, returning None instead of raising an error if the host cannot be reached
+    Parameters
+    ----------
+    @param url: URL to request
+    @param allow_redirects: flag to indicate whether redirects should be followed
+    @param timeout: seconds to wait for the remote host
+
+    Returns
+    -------
+    @return the response obtained for the URL, or None if the request failed
+    """
+    try:
+        return requests.get(url, allow_redirects=allow_redirects, timeout=timeout)
+    except requests.RequestException as e:
+        logging.warning("Could not resolve " + url + ": " + str(e))
+        return None
+
+
+class ResolutionQueue:
+    """
+    Queue of the URL checks requested by the regular expression extractors (e.g., whether a repository has a wiki).
+    Extractors add the URL to check and a callback that adds the corresponding results, so README analysis does not
+    wait for remote hosts. Once extraction has finished, the queue is either resolved (all URLs are requested
+    concurrently, with a timeout) or skipped (offline mode).
+    """
+
+    def __init__(self):
+        self.pending = []
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, url, on_resolved, on_skipped=None, allow_redirects=True):
+        """
+        Adds a URL check to the queue
+        Parameters
+        ----------
+        @param url: URL to request
+        @param on_resolved: function called with the response of the URL (None if it could not be resolved)
+        @param on_skipped: function called if the queue is skipped (optional)
+        @param allow_redirects: flag to indicate whether redirects should be followed
+        """
+        self.pending.append((url, on_resolved, on_skipped, allow_redirects))
+
+    def resolve(self, timeout=constants.URL_RESOLUTION_TIMEOUT, max_workers=constants.URL_RESOLUTION_WORKERS):
+        """
+        Requests all pending URLs concurrently and calls their callbacks.
+        Callbacks are called in the order in which checks were added, so results are added deterministically.
+        Parameters
+        ----------
+        @param timeout: seconds to wait for each remote host
+        @param max_workers: maximum number of concurrent requests
+        """
+        pending, self.pending = self.pending, []
+        if len(pending) == 0:
+            return
+        logging.info(f"Resolving {len(pending)} URLs")
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            responses = list(executor.map(lambda check: check_url(check[0], check[3], timeout), pending))
+        for (url, on_resolved, on_skipped, allow_redirects), response in zip(pending, responses):
+            on_resolved(response)
+
+    def skip(self):
+        """Discards all pending URL checks, calling their on_skipped functions (if any)"""
+        pending, self.pending = self.pending, []
+        if len(pending) > 0:
+            logging.info(f"Offline mode: skipping {len(pending)} URL checks")
+        for url, on_resolved, on_skipped, allow_redirects in pending:
+            if on_skipped is not None:
+                on_skipped()
@@ -13,6 +13,56 @@ CONF_DEFAULT_BASE_URI = "https://w3id.org/okn/i/"
 
 __DEFAULT_SOMEF_CONFIGURATION_FILE__ = "~/.somef/config.json"
 
+# URL checks done by the regular expression extractors (seconds to wait for each host, concurrent requests)
+URL_RESOLUTION_TIMEOUT = 10
+URL_RESOLUTION_WORKERS = 8
+
+# stages of the analysis of a repository measured with --timing (see timing.StageTimer)
+STAGE_GITHUB_API = "github_api"
+STAGE_DOWNLOAD = "download"
+STAGE_PROCESS_FILES = "process_files"
+STAGE_REPOSITORY_TYPE = "repository_type"
+STAGE_HEADER_ANALYSIS = "header_analysis"
+STAGE_CLASSIFIERS = "classifiers"
+STAGE_REGULAR_EXPRESSIONS = "regular_expressions"
+STAGE_URL_RESOLUTION = "url_resolution"
+STAGE_RECONCILIATION = "reconciliation"
+STAGE_JSON_EXPORT = "json_export"
+STAGE_GRAPH_EXPORT = "graph_export"
+STAGE_CODEMETA_EXPORT = "codemeta_export"
+STAGE_TOTAL = "total"
+# allocations reported for each stage with --profile_memory, and extension of the memory report
+MEMORY_TOP_ALLOCATIONS = 10
+MEMORY_REPORT_EXTENSION = ".memory.json"
+
+# somef serve: default address, number of analyses run at once and maximum size of uploaded archives (MB)
+SERVER_DEFAULT_HOST = "127.0.0.1"
+SERVER_DEFAULT_PORT = 8000
+SERVER_DEFAULT_WORKERS = 4
+SERVER_MAX_UPLOAD_MB = 100
+# limits of the uploaded archives once extracted (total size of the files, and number of entries)
+SERVER_MAX_EXTRACTED_MB = 1000
+SERVER_MAX_ARCHIVE_ENTRIES = 100000
+# output formats of the service
+SERVER_FORMAT_JSON = "json"
+SERVER_FORMAT_CODEMETA = "codemeta"
+SERVER_FORMAT_TURTLE = "turtle"
+
+# somef worker: seconds a job is hidden from other workers once taken, attempts before giving up on a repository and
+# seconds to wait for new jobs when the queue is empty (--wait)
+QUEUE_VISIBILITY_TIMEOUT = 900
+QUEUE_MAX_ATTEMPTS = 3
+QUEUE_POLL_INTERVAL = 5
+# status of the jobs of the queue
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# JSON serializers (orjson is used when installed, producing the same output as the standard library)
+JSON_SERIALIZER_STDLIB = "json"
+JSON_SERIALIZER_ORJSON = "orjson"
+
 # constants with regular expressions. Right now this has room for becoming more efficient
 REGEXP_BINDER = r'\[\!\[Binder\]([^\]]+)\]\(([^)]+)\)'
 REGEXP_READTHEDOCS = r'http[s]?://[-a-zA-Z0-9+&@#/%?=~_|!:,.;]*[-a-zA-Z0-9+&@#/%=~_|]+.readthedocs.io/'
@@ -28,6 +78,50 @@ REGEXP_DOI = r'\[\!\[DOI\]([^\]]+)\]\(([^)]+)\)'
 REGEXP_LINKS = r"\[(.*?)?\]\(([^)]+)\)"
 REGEXP_IMAGES = r"!\[(.*?)?\]\((.*?)?\)"
 # r"!\[[^\]]*\]\((.*?)?\)"
+REGEXP_WIKI_LINKS = r"\[[^\]]*\]\((.*?)?\)"
+REGEXP_READTHEDOCS_NAME = r'https://([^.]+)\.readthedocs\.io'
+REGEXP_ARXIV_LINKS = r'https://arxiv.org/'
+REGEXP_ARXIV_REFS = r'arXiv:'
+REGEXP_HTML_TAGS = r'<.*?>'
+REGEXP_HEADER_TAGS = r'<[^<>]+>'
+# literal anchors that must appear in a README for each regular expression extractor to find something.
+# Anchors are matched in a lookahead, so overlapping anchors (e.g., the image inside a badge) are all detected
+REGEXP_README_ANCHORS = (r'(?=(?P<bibtex>@[a-zA-Z]+\{)|(?P<doi>\[!\[DOI\])'
+                         r'|(?P<binder>(?i:\[!\[binder\])|https://colab\.research\.google\.com/drive)'
+                         r'|(?P<readthedocs>readthedocs.io/)|(?P<status>\[!\[Project Status:)|(?P<wiki>wiki)'
+                         r'|(?P<support>\[!\[Gitter chat\]|\(https://www\.reddit\.com/r/|\(https://discord\.com/invite/)'
+                         r'|(?P<pypi>\[!\[PyPI\]|\[!\[Latest PyPI version\])|(?P<images>!\\?\[|<img )'
+                         r'|(?P<arxiv>https://arxiv.org/|arXiv:))')
+# workflow files
+REGEXP_GALAXY_WORKFLOW = r"(?i)a[_\s-]?galaxy[_\s-]?workflow"
+REGEXP_CWL_WORKFLOW = r"\bclass:\s*[Ww]orkflow\b"
+REGEXP_WORKFLOW_CONTENT = r"in:\s*[^}]*\s*out:\s*(?:\[.*?\]|.*?(?=\n\s*\S+:|$))"
+REGEXP_WORKFLOW = r'\bworkflow\b'
+REGEXP_NEXTFLOW_WORKFLOW = r"(?i)nextflow[\s\S]*?(workflow\s*\{[\s\S]*?\})"
+# software type heuristics
+REGEXP_COMMAND_LINE = r"(?i)command[-\s]?line"
+REGEXP_COMMAND_LINE_ARGUMENTS = r"(?i)(explanation\s+of\s+)?arguments\b"
+REGEXP_COMMAND_LINE_FLAG = r"(?i)-\w+:"
+REGEXP_PIPELINE_WORKFLOW = r'\b(pipeline|workflow)\b'
+REGEXP_WORKFLOW_HEADER_MD = r'##.*\b(workflow|pipeline)\b'
+REGEXP_WORKFLOW_HEADER_RST = r'^([^=\n]+(?:\n(?![-=]).*)*\b(workflow|pipeline)\b(?:\n(?![-=]).*)*)\n=+'
+REGEXP_PIPELINE_NAME = r"pipeline"
+REGEXP_MODEL_EXAMPLE_NAME = r"(model|example)"
+# text preprocessing for the application domain classifiers
+REGEXP_CODE_BLOCKS = r'```.*?```'
+REGEXP_PUNCTUATION = r'[^\w\s]|\_'
+REGEXP_URLS = r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»“”‘’]))"
+# JSON serialization with orjson: escape sequences written by str.encode("ascii", "backslashreplace"), turned into
+# JSON escapes, and lines with floats that orjson writes differently from the standard library (e.g., 1e16 vs 1e+16,
+# 0.00001 vs 1e-05)
+REGEXP_BACKSLASH_LATIN1 = rb"\\x([0-9a-f]{2})"
+REGEXP_BACKSLASH_ASTRAL = rb"\\U([0-9a-f]{8})"
+REGEXP_ORJSON_EXPONENT = r"e-?[0-9]+,?$"
+REGEXP_ORJSON_DECIMAL = r"0\.0000[0-9]*,?$"
+REGEXP_ORJSON_FLOAT = r' *(?:"(?:[^"\\]|\\.)*": )?-?[0-9]+(?:\.[0-9]+)?(?:e-?[0-9]+)?,?'
+# file names derived from repository URLs (see job_queue.url_to_file_name): scheme, and unsafe characters
+REGEXP_URL_SCHEME = r"^\w+://"
+REGEXP_FILE_NAME_UNSAFE = r"[^\w.-]+"
 
 
 # Categories recognized by SOMEF (they all start by CAT_
@@ -103,6 +197,7 @@ all_categories = [CAT_APPLICATION_DOMAIN, CAT_ACKNOWLEDGEMENT, CAT_CITATION, CAT
 # All properties used by SOMEF to label the output JSON
 # Provenance:
 PROP_PROVENANCE = "somef_provenance"
+PROP_STAGE_TIMES = "stage_times"
 PROP_SOMEF_VERSION = "somef_version"
 PROP_SOMEF_SCHEMA_VERSION = "somef_schema_version"
 PROP_DATE = "date"
@@ -174,6 +269,49 @@ GITHUB_DOMAIN = "github.com"
 GITHUB_ACCEPT_HEADER = "application/vnd.github.v3+json"
 GITHUB_API = "https://api.github.com/repos"
 
+# how the files of a repository are obtained: the archive of the repository, only its README and the key files at
+# its root (license, citation, contributing guidelines, etc.) through the GitHub contents API, or the files whose
+# content is analyzed, selected from the tree of the repository (the rest are created empty, as only their names
+# are analyzed), or a local bare git mirror of the repository, which is updated fetching only the new commits
+FETCH_MODE_ARCHIVE = "archive"
+FETCH_MODE_KEY_FILES = "key_files"
+FETCH_MODE_TREE = "tree"
+FETCH_MODE_MIRROR = "mirror"
+FETCH_MODES = [FETCH_MODE_ARCHIVE, FETCH_MODE_KEY_FILES, FETCH_MODE_TREE, FETCH_MODE_MIRROR]
+# in tree mode, the archive is downloaded instead if more files (or bytes) than these have to be downloaded
+TREE_MAX_FILES = 200
+TREE_MAX_BYTES = 50 * 2 ** 20
+# files downloaded at once in tree mode
+TREE_FETCH_WORKERS = 8
+# folder where the git mirrors are kept in mirror mode (<folder>/<host>/<owner>/<repo>.git)
+MIRROR_DEFAULT_DIR = "~/.somef/mirrors"
+# seconds to wait for a git command (e.g., the first clone of a repository)
+MIRROR_GIT_TIMEOUT = 600
+# folders skipped when walking the files of a repository (dependencies, version control, build outputs), and budget
+# of each walk (number of files and bytes, no limit if None)
+WALK_PRUNED_DIRS = [".git", ".hg", ".svn", "node_modules", "bower_components", "vendor", "third_party",
+                    "site-packages", "__pycache__", ".tox", ".venv", "build", "dist"]
+WALK_MAX_FILES = 100000
+WALK_MAX_BYTES = None
+# candidate ontologies bigger than this (in bytes) are not parsed
+ONTOLOGY_MAX_FILE_SIZE = 20 * 2 ** 20
+# candidate ontologies of a repository are parsed in a process pool if there are at least these files, with these
+# processes (the number of CPUs if None)
+ONTOLOGY_POOL_MIN_FILES = 8
+ONTOLOGY_WORKERS = None
+# bytes read at once when scanning a candidate ontology for an ontology declaration, before parsing it
+ONTOLOGY_PREFILTER_CHUNK = 2 ** 20
+# candidate ontologies parsed at once to find the type of a repository (it stops at the first ontology)
+ONTOLOGY_BATCH_SIZE = 32
+# extractors whose results are kept by the analysis cache (see analysis_cache), by their input files: ontology and
+# workflow detection (each file), and the extractors of the README (header analysis, classifiers, regular expressions)
+CACHE_ONTOLOGY = "ontology"
+CACHE_WORKFLOW = "workflow"
+CACHE_README = "readme"
+# key files, whose content is added to the results by process_files (upper case)
+KEY_FILES = ["LICENSE", "LICENCE", "LICENSE.MD", "CODE_OF_CONDUCT", "CODE_OF_CONDUCT.MD", "CONTRIBUTING",
+             "CONTRIBUTING.MD", "CONTRIBUTORS", "CONTRIBUTORS.MD", "CITATION", "CITATION.BIB", "CITATION.CFF"]
+
 # Crosswalk to retrieve easily contents of interest from the GitHub response
 github_crosswalk_table = {
     CAT_CODE_REPOSITORY: "html_url",
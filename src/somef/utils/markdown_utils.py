@@ -1,8 +1,7 @@
 import logging
 from io import StringIO
 from markdown import Markdown
-from ..utils import constants
-import re
+from ..utils import regexp
 
 
 ## Markdown to plain text conversion: begin ##
@@ -41,7 +40,7 @@ def remove_bibtex(string_list):
         The strings list without bibtex blocks
         """
     for x, element in enumerate(string_list):
-        bib_references = re.findall(constants.REGEXP_BIBTEX, element)
+        bib_references = regexp.REGEXP_BIBTEX.findall(element)
         if len(bib_references) > 0:
             top = element.find(bib_references[0])
             init = element.rfind("```", 0, top)
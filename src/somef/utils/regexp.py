@@ -0,0 +1,50 @@
+import re
+from . import constants
+
+# Precompiled versions of the regular expressions declared in constants.
+# Extractors should use these objects instead of passing the pattern strings to re.findall/re.search, so patterns
+# are compiled once per process instead of being looked up in the re cache (or recompiled) for every file.
+
+# README extraction
+REGEXP_BINDER = re.compile(constants.REGEXP_BINDER, re.IGNORECASE)
+REGEXP_READTHEDOCS = re.compile(constants.REGEXP_READTHEDOCS)
+REGEXP_READTHEDOCS_NAME = re.compile(constants.REGEXP_READTHEDOCS_NAME)
+REGEXP_BIBTEX = re.compile(constants.REGEXP_BIBTEX)
+REGEXP_DOI = re.compile(constants.REGEXP_DOI)
+REGEXP_LINKS = re.compile(constants.REGEXP_LINKS)
+REGEXP_IMAGES = re.compile(constants.REGEXP_IMAGES)
+REGEXP_WIKI_LINKS = re.compile(constants.REGEXP_WIKI_LINKS)
+REGEXP_ARXIV_LINKS = re.compile(constants.REGEXP_ARXIV_LINKS)
+REGEXP_ARXIV_REFS = re.compile(constants.REGEXP_ARXIV_REFS)
+REGEXP_HTML_TAGS = re.compile(constants.REGEXP_HTML_TAGS)
+REGEXP_HEADER_TAGS = re.compile(constants.REGEXP_HEADER_TAGS)
+REGEXP_README_ANCHORS = re.compile(constants.REGEXP_README_ANCHORS)
+
+# workflow files
+REGEXP_GALAXY_WORKFLOW = re.compile(constants.REGEXP_GALAXY_WORKFLOW)
+REGEXP_CWL_WORKFLOW = re.compile(constants.REGEXP_CWL_WORKFLOW)
+REGEXP_WORKFLOW_CONTENT = re.compile(constants.REGEXP_WORKFLOW_CONTENT)
+REGEXP_WORKFLOW = re.compile(constants.REGEXP_WORKFLOW, re.IGNORECASE)
+REGEXP_NEXTFLOW_WORKFLOW = re.compile(constants.REGEXP_NEXTFLOW_WORKFLOW)
+
+# software type heuristics
+REGEXP_COMMAND_LINE = re.compile(constants.REGEXP_COMMAND_LINE)
+REGEXP_COMMAND_LINE_ARGUMENTS = re.compile(constants.REGEXP_COMMAND_LINE_ARGUMENTS)
+REGEXP_COMMAND_LINE_FLAG = re.compile(constants.REGEXP_COMMAND_LINE_FLAG)
+REGEXP_PIPELINE_WORKFLOW = re.compile(constants.REGEXP_PIPELINE_WORKFLOW, re.IGNORECASE)
+REGEXP_WORKFLOW_HEADER_MD = re.compile(constants.REGEXP_WORKFLOW_HEADER_MD, re.IGNORECASE)
+REGEXP_WORKFLOW_HEADER_RST = re.compile(constants.REGEXP_WORKFLOW_HEADER_RST, re.MULTILINE | re.IGNORECASE)
+REGEXP_PIPELINE_NAME = re.compile(constants.REGEXP_PIPELINE_NAME, re.IGNORECASE)
+REGEXP_MODEL_EXAMPLE_NAME = re.compile(constants.REGEXP_MODEL_EXAMPLE_NAME, re.IGNORECASE)
+
+# text preprocessing for the application domain classifiers
+REGEXP_CODE_BLOCKS = re.compile(constants.REGEXP_CODE_BLOCKS)
+REGEXP_PUNCTUATION = re.compile(constants.REGEXP_PUNCTUATION)
+REGEXP_URLS = re.compile(constants.REGEXP_URLS)
+
+# JSON serialization with orjson
+REGEXP_BACKSLASH_LATIN1 = re.compile(constants.REGEXP_BACKSLASH_LATIN1)
+REGEXP_BACKSLASH_ASTRAL = re.compile(constants.REGEXP_BACKSLASH_ASTRAL)
+REGEXP_ORJSON_EXPONENT = re.compile(constants.REGEXP_ORJSON_EXPONENT, re.MULTILINE)
+REGEXP_ORJSON_DECIMAL = re.compile(constants.REGEXP_ORJSON_DECIMAL, re.MULTILINE)
+REGEXP_ORJSON_FLOAT = re.compile(constants.REGEXP_ORJSON_FLOAT)